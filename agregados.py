@@ -0,0 +1,309 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from puntuaciones import hash_clave
+
+# Agregados (rollups) de todas las noticias analizadas para los paneles de app_web.py: recuentos, sumas
+# e histogramas (noticias, falsas/reales, estrellas, emociones, categorías) por fuente, tema, categoría y día.
+# analizar_filtrar.py los actualiza con cada resultado que produce. Cada noticia deja en `aportaciones`
+# lo que aporta (su fuente, tema, día, estrellas...): si se vuelve a analizar, se resta lo que aportaba
+# antes y se suma lo nuevo, así que nunca cuenta dos veces. Todo son enteros, de modo que los agregados
+# de dos ejecuciones en paralelo (otra máquina, una carga histórica) se pueden fusionar sin errores de
+# redondeo, y se pueden rehacer desde cero a partir de los scores guardados.
+# La web solo lee la tabla `agregados`, cuyo tamaño depende del número de fuentes, temas y días, no del de noticias.
+# Uso: python agregados.py reconstruir | fusionar otra_base.sqlite
+
+TODOS = "*"  # "Día" de los agregados de todo el histórico
+SIN_FECHA = ""
+FILAS_POR_TANDA = 4096  # Aportaciones que se acumulan en memoria antes de escribirlas
+CAMPOS = ("clave", "fuente", "tema", "categoria", "dia", "fake_news", "estrellas", "emocion", "actualizada")
+
+
+def _clave_sqlite(clave):
+    """Hash de 64 bits de la noticia (el mismo que usa puntuaciones.py) como entero con signo de SQLite."""
+    valor = hash_clave(clave)
+    return valor - (1 << 64) if valor >= 1 << 63 else valor
+
+
+def aportacion(clave, fuente, tema, fake_news, estrellas, emocion, fecha, categoria, actualizada=None):
+    """Fila de `aportaciones` de una noticia (clave = URL o título)."""
+    return (_clave_sqlite(clave), fuente or "Fuente Desconocida", tema or "N/A", categoria, (fecha or SIN_FECHA)[:10],
+            fake_news or "N/A", int(estrellas or 0), (emocion or "N/A").lower(),
+            time.time() if actualizada is None else actualizada)
+
+
+def aportacion_de_noticia(noticia_procesada):
+    """Fila de `aportaciones` de una noticia procesada (la de construir_noticia_procesada)."""
+    return aportacion(noticia_procesada.get("url_noticia") or noticia_procesada.get("titulo"),
+                      noticia_procesada.get("fuente_nombre"), noticia_procesada.get("tema"),
+                      noticia_procesada.get("fake_news"), noticia_procesada.get("estrellas_sentimiento"),
+                      noticia_procesada.get("emocion"), noticia_procesada.get("fecha_publicacion"),
+                      noticia_procesada.get("categoria_final"))
+
+
+def _medidas(fila):
+    """{(dimensión, día, valor, medida): cantidad} que suma una aportación."""
+    _, fuente, tema, categoria, dia, fake_news, estrellas, emocion, _ = fila
+    medidas = {"noticias": 1, f"emocion:{emocion}": 1}
+    if fake_news == "LABEL_0":  # FAKE
+        medidas["falsas"] = 1
+    elif fake_news == "LABEL_1":  # REAL
+        medidas["reales"] = 1
+    if estrellas:
+        medidas.update({"con_estrellas": 1, "suma_estrellas": estrellas, f"estrellas:{estrellas}": 1})
+    resultado = {}
+    for dimension, valor in (("total", ""), ("fuente", fuente), ("tema", tema), ("categoria", categoria)):
+        for dia in (TODOS, dia):
+            for medida, cantidad in medidas.items():
+                resultado[(dimension, dia, valor, medida)] = cantidad
+            if dimension != "categoria":
+                resultado[(dimension, dia, valor, f"categoria:{categoria}")] = 1
+    return resultado
+
+
+class Agregados:
+    """Agregados por fuente, tema, categoría y día en SQLite, con las aportaciones de cada noticia."""
+
+    def __init__(self, ruta="agregados.sqlite"):
+        self.ruta = ruta
+        self._pendientes = {}  # clave -> aportación aún sin escribir (la última de cada noticia)
+        self._conexion = None
+        self._pid = None
+        self._candado = threading.Lock()
+
+    def _conectar(self):
+        """Abre la conexión la primera vez (y de nuevo en cada proceso hijo)."""
+        if self._conexion is None or self._pid != os.getpid():
+            # Sin transacciones implícitas: cada escritura abre la suya con BEGIN IMMEDIATE
+            self._conexion = sqlite3.connect(self.ruta, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conexion.execute("PRAGMA journal_mode=WAL")  # La web lee mientras el análisis escribe
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS aportaciones ("
+                " clave INTEGER PRIMARY KEY, fuente TEXT, tema TEXT, categoria TEXT, dia TEXT,"
+                " fake_news TEXT, estrellas INTEGER, emocion TEXT, actualizada REAL)"
+            )
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS agregados ("
+                " dimension TEXT NOT NULL, dia TEXT NOT NULL, valor TEXT NOT NULL, medida TEXT NOT NULL,"
+                " cantidad INTEGER NOT NULL,"
+                " PRIMARY KEY (dimension, dia, valor, medida)) WITHOUT ROWID"
+            )
+            self._conexion.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor INTEGER)")
+            self._conexion.execute("INSERT OR IGNORE INTO meta VALUES ('version', 0)")
+            self._pid = os.getpid()
+        return self._conexion
+
+    # --- Escritura ---
+
+    def registrar(self, noticia_procesada):
+        """Añade el resultado de una noticia (se escribe por tandas; llama a `guardar` al terminar)."""
+        fila = aportacion_de_noticia(noticia_procesada)
+        self._pendientes[fila[0]] = fila
+        if len(self._pendientes) >= FILAS_POR_TANDA:
+            self.guardar()
+
+    def guardar(self):
+        """Escribe las aportaciones pendientes y actualiza los agregados. Devuelve cuántas noticias cambiaron."""
+        filas, self._pendientes = list(self._pendientes.values()), {}
+        return self._aplicar(filas) if filas else 0
+
+    def _aplicar(self, filas, solo_mas_recientes=False):
+        """Guarda las aportaciones restando de los agregados lo que aportaban antes esas noticias."""
+        delta, nuevas = Counter(), []
+        with self._candado:
+            conexion = self._conectar()
+            conexion.execute("BEGIN IMMEDIATE")  # Otro proceso no puede cambiar estas aportaciones a la vez
+            try:
+                for inicio in range(0, len(filas), 500):
+                    tanda = filas[inicio:inicio + 500]
+                    previas = {fila[0]: fila for fila in conexion.execute(
+                        f"SELECT {', '.join(CAMPOS)} FROM aportaciones WHERE clave IN ({','.join('?' * len(tanda))})",
+                        [fila[0] for fila in tanda])}
+                    for fila in tanda:
+                        previa = previas.get(fila[0])
+                        if previa is not None:
+                            if previa[:-1] == fila[:-1] or (solo_mas_recientes and previa[-1] >= fila[-1]):
+                                continue
+                            delta.subtract(_medidas(previa))
+                        delta.update(_medidas(fila))
+                        nuevas.append(fila)
+                conexion.executemany(f"INSERT OR REPLACE INTO aportaciones VALUES ({','.join('?' * len(CAMPOS))})", nuevas)
+                self._sumar(conexion, delta)
+                if nuevas:
+                    conexion.execute("UPDATE meta SET valor = valor + 1 WHERE clave = 'version'")
+                conexion.execute("COMMIT")
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+        return len(nuevas)
+
+    @staticmethod
+    def _sumar(conexion, delta):
+        cambios = [(*clave, cantidad) for clave, cantidad in delta.items() if cantidad]
+        conexion.executemany(
+            "INSERT INTO agregados VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (dimension, dia, valor, medida) DO UPDATE SET cantidad = cantidad + excluded.cantidad",
+            cambios)
+        # Las filas que se quedan a cero sobran (p. ej. una fuente cuyas noticias cambiaron de tema)
+        conexion.executemany(
+            "DELETE FROM agregados WHERE dimension = ? AND dia = ? AND valor = ? AND medida = ? AND cantidad = 0",
+            [clave for *clave, cantidad in cambios if cantidad < 0])
+
+    def fusionar(self, ruta_otra):
+        """Incorpora las aportaciones de otra base de agregados (de cada noticia gana el análisis más reciente)."""
+        otra = sqlite3.connect(ruta_otra, timeout=30)
+        cambiadas = 0
+        try:
+            cursor = otra.execute(f"SELECT {', '.join(CAMPOS)} FROM aportaciones")
+            while True:
+                filas = cursor.fetchmany(FILAS_POR_TANDA)
+                if not filas:
+                    break
+                cambiadas += self._aplicar(filas, solo_mas_recientes=True)
+        finally:
+            otra.close()
+        return cambiadas
+
+    def reemplazar(self, filas):
+        """Sustituye todas las aportaciones por `filas` (una por noticia) y rehace los agregados, en una sola transacción."""
+        delta = Counter()
+        with self._candado:
+            conexion = self._conectar()
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                conexion.execute("DELETE FROM aportaciones")
+                conexion.execute("DELETE FROM agregados")
+                tanda = []
+                for fila in filas:
+                    tanda.append(fila)
+                    delta.update(_medidas(fila))
+                    if len(tanda) >= FILAS_POR_TANDA:
+                        conexion.executemany(f"INSERT OR REPLACE INTO aportaciones VALUES ({','.join('?' * len(CAMPOS))})", tanda)
+                        tanda = []
+                conexion.executemany(f"INSERT OR REPLACE INTO aportaciones VALUES ({','.join('?' * len(CAMPOS))})", tanda)
+                self._sumar(conexion, delta)
+                conexion.execute("UPDATE meta SET valor = valor + 1 WHERE clave = 'version'")
+                conexion.execute("COMMIT")
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+
+    # --- Lectura (app_web.py) ---
+
+    def version(self):
+        """Versión de los agregados (cambia con cada escritura); sirve como clave de caché en la web."""
+        with self._candado:
+            return self._conectar().execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()[0]
+
+    def por_valor(self, dimension, dia=TODOS):
+        """{valor: {medida: cantidad}} de una dimensión ("fuente", "tema", "categoria") en un día (o en todo el histórico)."""
+        resultado = {}
+        with self._candado:
+            filas = self._conectar().execute(
+                "SELECT valor, medida, cantidad FROM agregados WHERE dimension = ? AND dia = ?", (dimension, dia)).fetchall()
+        for valor, medida, cantidad in filas:
+            resultado.setdefault(valor, {})[medida] = cantidad
+        return resultado
+
+    def por_dia(self, dimension="total", valor=""):
+        """{día: {medida: cantidad}} de un valor de una dimensión (por defecto, todas las noticias), por orden de fecha."""
+        resultado = {}
+        with self._candado:
+            filas = self._conectar().execute(
+                "SELECT dia, medida, cantidad FROM agregados WHERE dimension = ? AND dia NOT IN (?, ?) AND valor = ?"
+                " ORDER BY dia", (dimension, TODOS, SIN_FECHA, valor)).fetchall()
+        for dia, medida, cantidad in filas:
+            resultado.setdefault(dia, {})[medida] = cantidad
+        return resultado
+
+    def cerrar(self):
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+
+def hay_agregados(ruta="agregados.sqlite"):
+    return os.path.exists(ruta)
+
+
+# --- Reconstrucción desde cero ---
+
+def aportaciones_historicas():
+    """Aportaciones de todo lo analizado, sin pasar ningún modelo.
+
+    Salen de los scores guardados (puntuaciones.py) junto con la fuente y la fecha de cada noticia del almacén,
+    y de los bloques de la carga histórica (carga_historica.py). La categoría se recalcula con las reglas actuales.
+    """
+    import analizar_filtrar
+    import carga_historica
+    import puntuaciones
+    from almacen_noticias import AlmacenNoticias
+
+    # Primero la carga histórica: si una noticia también la analizó analizar_filtrar.py, cuenta ese análisis
+    aportaciones = {}
+    for _, registros in carga_historica.leer_registros():
+        for registro in registros:
+            if "noticia" in registro:
+                n = registro["noticia"]
+                fila = aportacion(n.get("url_noticia") or n.get("titulo"), n.get("fuente_nombre"), n.get("tema"),
+                                  n.get("fake_news"), n.get("estrellas_sentimiento"), n.get("emocion"),
+                                  n.get("fecha_publicacion"),
+                                  analizar_filtrar.determinar_categoria(n.get("estrellas_sentimiento"), n.get("fake_news")))
+                aportaciones[fila[0]] = fila
+
+    claves, columnas = puntuaciones.AlmacenPuntuaciones(analizar_filtrar.directorio_puntuaciones).cargar()
+    etiquetas = {}
+    for columna, (matriz, nombres) in columnas.items():
+        etiquetas[columna] = [nombres[i] if i >= 0 else "N/A" for i in puntuaciones._principal(matriz).tolist()]
+    fila_de = {int(clave): i for i, clave in enumerate(claves.tolist())}
+    almacen = AlmacenNoticias(analizar_filtrar.ruta_almacen_noticias)
+    try:
+        for noticia in almacen.todas():
+            clave = noticia.get("url") or noticia.get("title")
+            i = fila_de.get(hash_clave(clave))
+            if i is None:  # Aún sin analizar (o analizada antes de que se guardaran los scores)
+                continue
+            estrellas = analizar_filtrar.extraer_estrellas(etiquetas["sentimiento"][i])
+            fake_news = etiquetas["fake_news"][i]
+            fila = aportacion(clave, (noticia.get("source") or {}).get("name"), etiquetas["tematica"][i], fake_news,
+                              estrellas, etiquetas["emocion"][i], noticia.get("publishedAt"),
+                              analizar_filtrar.determinar_categoria(estrellas, fake_news))
+            aportaciones[fila[0]] = fila
+    finally:
+        almacen.cerrar()
+    return aportaciones.values()
+
+
+def reconstruir(ruta=None):
+    """Rehace desde cero las aportaciones y los agregados (p. ej. tras cambiar las reglas de categoría)."""
+    import analizar_filtrar
+
+    agregados = Agregados(ruta or analizar_filtrar.ruta_agregados)
+    inicio = time.perf_counter()
+    filas = list(aportaciones_historicas())
+    agregados.reemplazar(filas)
+    agregados.cerrar()
+    print(f"✅ Agregados reconstruidos con {len(filas)} noticias en {time.perf_counter() - inicio:.1f} s "
+          f"('{agregados.ruta}')")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mantenimiento de los agregados por fuente, tema, categoría y día.")
+    parser.add_argument("accion", choices=["reconstruir", "fusionar"])
+    parser.add_argument("otra", nargs="?", help="Base de agregados a incorporar (para `fusionar`).")
+    argumentos = parser.parse_args()
+    if argumentos.accion == "reconstruir":
+        reconstruir()
+    elif not argumentos.otra:
+        parser.error("`fusionar` necesita la ruta de la otra base de agregados")
+    else:
+        import analizar_filtrar
+
+        agregados = Agregados(analizar_filtrar.ruta_agregados)
+        cambiadas = agregados.fusionar(argumentos.otra)
+        agregados.cerrar()
+        print(f"✅ {cambiadas} noticias incorporadas desde '{argumentos.otra}'.")
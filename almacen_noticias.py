@@ -0,0 +1,134 @@
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+
+# Almacén persistente de noticias crudas (formato GNews).
+# main.py añade aquí cada descarga; las noticias repetidas (misma URL o mismo título normalizado)
+# se descartan. Cada noticia nueva entra como "pendiente" y analizar_filtrar.py solo procesa
+# las pendientes, de modo que el coste de cada ejecución depende de lo nuevo, no del histórico.
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_ANALIZADA = "analizada"
+
+
+def normalizar_titulo(titulo):
+    """Normaliza un título para detectar duplicados: minúsculas, sin tildes ni signos de puntuación."""
+    titulo = unicodedata.normalize("NFKD", titulo or "")
+    titulo = "".join(c for c in titulo if not unicodedata.combining(c)).lower()
+    titulo = re.sub(r"[^\w\s]", " ", titulo)
+    return " ".join(titulo.split())
+
+
+class AlmacenNoticias:
+    """Almacén SQLite de noticias con deduplicación y cola de noticias pendientes de análisis."""
+
+    def __init__(self, ruta="noticias.sqlite"):
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta, timeout=30)
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS noticias ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " url TEXT UNIQUE,"
+            " titulo_normalizado TEXT,"
+            " datos TEXT NOT NULL,"
+            " ingresada REAL NOT NULL,"
+            " estado TEXT NOT NULL)"
+        )
+        self.conexion.execute("CREATE INDEX IF NOT EXISTS idx_noticias_titulo ON noticias (titulo_normalizado)")
+        self.conexion.execute("CREATE INDEX IF NOT EXISTS idx_noticias_estado ON noticias (estado)")
+        self.conexion.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+        self.conexion.commit()
+
+    def _es_duplicada(self, url, titulo_normalizado):
+        if url and self.conexion.execute("SELECT 1 FROM noticias WHERE url = ?", (url,)).fetchone():
+            return True
+        return bool(titulo_normalizado) and self.conexion.execute(
+            "SELECT 1 FROM noticias WHERE titulo_normalizado = ?", (titulo_normalizado,)
+        ).fetchone() is not None
+
+    def agregar(self, articulos):
+        """Añade artículos nuevos como pendientes. Devuelve (añadidos, duplicados)."""
+        anadidos = duplicados = 0
+        ahora = time.time()
+        for articulo in articulos:
+            url = articulo.get("url") or None
+            titulo_normalizado = normalizar_titulo(articulo.get("title"))
+            if self._es_duplicada(url, titulo_normalizado):
+                duplicados += 1
+                continue
+            self.conexion.execute(
+                "INSERT INTO noticias (url, titulo_normalizado, datos, ingresada, estado) VALUES (?, ?, ?, ?, ?)",
+                (url, titulo_normalizado, json.dumps(articulo, ensure_ascii=False), ahora, ESTADO_PENDIENTE)
+            )
+            anadidos += 1
+        self.conexion.commit()
+        return anadidos, duplicados
+
+    def importar_json(self, ruta_archivo):
+        """Importa un archivo JSON de noticias (como el antiguo noticias.json) si cambió desde la última vez."""
+        clave = f"importado:{os.path.abspath(ruta_archivo)}"
+        marca = str(os.path.getmtime(ruta_archivo))
+        fila = self.conexion.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        if fila and fila[0] == marca:
+            return 0, 0
+        with open(ruta_archivo, "r", encoding="utf-8") as f:
+            resultado = self.agregar(json.load(f))
+        self.conexion.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (clave, marca))
+        self.conexion.commit()
+        return resultado
+
+    def pendientes(self, limite=None):
+        """Devuelve una lista de (id, artículo) pendientes de análisis, en orden de llegada."""
+        consulta = "SELECT id, datos FROM noticias WHERE estado = ? ORDER BY id"
+        parametros = [ESTADO_PENDIENTE]
+        if limite:
+            consulta += " LIMIT ?"
+            parametros.append(limite)
+        return [(id_noticia, json.loads(datos)) for id_noticia, datos in self.conexion.execute(consulta, parametros)]
+
+    def marcar_analizadas(self, ids):
+        """Saca de la cola de pendientes las noticias ya analizadas."""
+        self.conexion.executemany(
+            "UPDATE noticias SET estado = ? WHERE id = ?", [(ESTADO_ANALIZADA, id_noticia) for id_noticia in ids]
+        )
+        self.conexion.commit()
+
+    def reencolar_todas(self):
+        """Vuelve a marcar todas las noticias como pendientes (para reprocesar el histórico completo)."""
+        self.conexion.execute("UPDATE noticias SET estado = ?", (ESTADO_PENDIENTE,))
+        self.conexion.commit()
+
+    def reencolar(self, seleccionar):
+        """Vuelve a marcar como pendientes las noticias para las que `seleccionar(artículo)` es cierto. Devuelve cuántas."""
+        ids = [id_noticia for id_noticia, datos in self.conexion.execute("SELECT id, datos FROM noticias")
+               if seleccionar(json.loads(datos))]
+        self.conexion.executemany("UPDATE noticias SET estado = ? WHERE id = ?", [(ESTADO_PENDIENTE, i) for i in ids])
+        self.conexion.commit()
+        return len(ids)
+
+    def todas(self):
+        """Recorre todos los artículos guardados (analizados o no), en orden de llegada."""
+        for (datos,) in self.conexion.execute("SELECT datos FROM noticias ORDER BY id"):
+            yield json.loads(datos)
+
+    def contar(self, estado=None):
+        """Cuenta las noticias guardadas (todas o solo las de un estado)."""
+        if estado is None:
+            return self.conexion.execute("SELECT COUNT(*) FROM noticias").fetchone()[0]
+        return self.conexion.execute("SELECT COUNT(*) FROM noticias WHERE estado = ?", (estado,)).fetchone()[0]
+
+    def leer_meta(self, clave):
+        """Devuelve un valor guardado en la tabla meta (o None)."""
+        fila = self.conexion.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        return fila[0] if fila else None
+
+    def guardar_meta(self, clave, valor):
+        """Guarda un valor en la tabla meta (p. ej. el ETag de una descarga)."""
+        self.conexion.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (clave, valor))
+        self.conexion.commit()
+
+    def cerrar(self):
+        self.conexion.close()
@@ -0,0 +1,122 @@
+import json
+import pathlib
+import sqlite3
+import sys
+
+# Base de datos SQLite con los resultados del análisis, para que la web no tenga que leer y
+# recorrer todo noticias_filtradas.json en cada recarga. Cada noticia clasificada es una fila con
+# las columnas por las que filtra la web (con índice) y el diccionario completo en `datos`.
+# analizar_filtrar.py la actualiza de forma incremental; consultas_noticias.py la lee.
+# Uso: python almacen_resultados.py  ->  reconstruye la base desde noticias_filtradas.json
+
+COLUMNAS_INDEXADAS = ["categoria_final", "fake_news", "emocion", "tema", "fuente_nombre", "fecha"]
+
+
+def conectar(ruta="resultados.sqlite"):
+    """Abre la base de resultados para escribir, creando (o migrando) la tabla y los índices si hace falta."""
+    conexion = sqlite3.connect(ruta, timeout=30)
+    conexion.execute("PRAGMA journal_mode=WAL")  # La web puede leer mientras el análisis escribe
+    conexion.execute(
+        "CREATE TABLE IF NOT EXISTS noticias ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " clave TEXT UNIQUE NOT NULL,"   # URL de la noticia (o título si no tiene)
+        " seccion TEXT NOT NULL,"        # Lista de noticias_filtradas.json a la que pertenece
+        " objetiva INTEGER NOT NULL,"    # 1 si cumple los criterios de "totalmente objetiva"
+        " dudosa INTEGER NOT NULL DEFAULT 0,"  # 1 si es dudosa o posiblemente falsa (ver `es_dudosa`)
+        " categoria_final TEXT,"
+        " fake_news TEXT,"
+        " emocion TEXT,"
+        " tema TEXT,"
+        " fuente_nombre TEXT,"
+        " fecha TEXT,"                   # publishedAt de GNews (ISO 8601, ordena bien como texto)
+        " datos TEXT NOT NULL)"
+    )
+    _migrar(conexion)
+    for columna in COLUMNAS_INDEXADAS:
+        conexion.execute(f"CREATE INDEX IF NOT EXISTS idx_noticias_{columna} ON noticias ({columna})")
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_noticias_seccion ON noticias (seccion, fecha)")
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_noticias_objetiva ON noticias (objetiva, fecha)")
+    # Un índice por filtro de sección terminado en la fecha: la página sale del índice en orden, sin ordenar
+    # en un B-tree temporal (el id va implícito al final de cada índice y desempata)
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_noticias_dudosa ON noticias (dudosa, fecha)")
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_noticias_veracidad ON noticias (fake_news, categoria_final, fecha)")
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_noticias_emocion_veracidad ON noticias (emocion, fake_news, fecha)")
+    # Número de versión de los datos: sube con cada actualización, para que la web sepa cuándo invalidar su caché
+    conexion.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor INTEGER NOT NULL)")
+    conexion.execute("INSERT OR IGNORE INTO meta VALUES ('version', 0)")
+    conexion.commit()
+    return conexion
+
+
+def abrir_lectura(ruta="resultados.sqlite"):
+    """Abre la base solo para leer (la web): no crea tablas ni migra, así que nunca compite por el candado de escritura."""
+    return sqlite3.connect(f"{pathlib.Path(ruta).resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+
+
+def es_dudosa(noticia):
+    """Criterio de la sección de noticias dudosas o posiblemente falsas."""
+    return noticia.get("categoria_final") == "Dudosa/Falsa" or noticia.get("fake_news") == "LABEL_0"
+
+
+def _migrar(conexion):
+    """Añade la columna `dudosa` a las bases creadas antes de existir, calculándola para las filas que ya hay."""
+    columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(noticias)")}
+    if "dudosa" not in columnas:
+        conexion.execute("ALTER TABLE noticias ADD COLUMN dudosa INTEGER NOT NULL DEFAULT 0")
+        conexion.execute("UPDATE noticias SET dudosa = (categoria_final = 'Dudosa/Falsa' OR fake_news = 'LABEL_0')")
+
+
+def _fila(seccion, noticia, es_objetiva):
+    return (
+        noticia.get("url_noticia") or noticia.get("titulo"),
+        seccion,
+        int(bool(es_objetiva)),
+        int(es_dudosa(noticia)),
+        noticia.get("categoria_final"),
+        noticia.get("fake_news"),
+        (noticia.get("emocion") or "").lower(),
+        noticia.get("tema"),
+        noticia.get("fuente_nombre"),
+        noticia.get("fecha_publicacion") or "",
+        json.dumps(noticia, ensure_ascii=False),
+    )
+
+
+def actualizar(conexion, listas_nuevas, claves_reanalizadas, es_objetiva):
+    """Sustituye las noticias re-analizadas por sus nuevos resultados (las que ya no entran en ninguna lista se borran)."""
+    claves = list(claves_reanalizadas)
+    for inicio in range(0, len(claves), 500):
+        tanda = claves[inicio:inicio + 500]
+        conexion.execute(f"DELETE FROM noticias WHERE clave IN ({','.join('?' * len(tanda))})", tanda)
+    conexion.executemany(
+        "INSERT OR REPLACE INTO noticias (clave, seccion, objetiva, dudosa, categoria_final, fake_news, emocion, tema,"
+        " fuente_nombre, fecha, datos) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [_fila(seccion, noticia, es_objetiva(noticia)) for seccion, lista in listas_nuevas.items() for noticia in lista]
+    )
+    conexion.execute("UPDATE meta SET valor = valor + 1 WHERE clave = 'version'")
+    conexion.commit()
+
+
+def reconstruir(conexion, resultado_final, es_objetiva):
+    """Vacía la base y la vuelve a llenar con el contenido completo de noticias_filtradas.json."""
+    conexion.execute("DELETE FROM noticias")
+    actualizar(conexion, resultado_final, [], es_objetiva)
+
+
+def version(conexion):
+    """Versión actual de los datos (cambia cada vez que el análisis escribe)."""
+    return conexion.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()[0]
+
+
+def esta_vacia(conexion):
+    return conexion.execute("SELECT 1 FROM noticias LIMIT 1").fetchone() is None
+
+
+if __name__ == "__main__":
+    from analizar_filtrar import cargar_resultados_previos, es_totalmente_objetiva
+
+    ruta_json = sys.argv[1] if len(sys.argv) > 1 else "noticias_filtradas.json"
+    conexion = conectar()
+    reconstruir(conexion, cargar_resultados_previos(ruta_json), es_totalmente_objetiva)
+    total = conexion.execute("SELECT COUNT(*) FROM noticias").fetchone()[0]
+    print(f"✅ Base de resultados reconstruida desde '{ruta_json}': {total} noticias.")
@@ -1,144 +1,495 @@
-from transformers import pipeline
+import argparse
+import collections
+import functools
 import json
+import os
+import sys
+import time
+
+from agregados import Agregados
+from almacen_noticias import AlmacenNoticias
+import almacen_resultados
+import backends_inferencia
+from cache_analisis import CacheAnalisis
+import instantaneas
+from instantaneas import escribir_json
+from metricas import Metricas, perfilar
+from miniaturas import CacheMiniaturas
+from modelos import RegistroModelos
+from puntuaciones import AlmacenPuntuaciones
+import resumidor
+from servidor_inferencia import ClienteInferencia, ErrorServidorInferencia
 
 # Configuración
 device = -1  # CPU, cambiar a 0 si tienes GPU disponible y configurada
 modelo_sentimiento_nombre = "nlptown/bert-base-multilingual-uncased-sentiment"
 modelo_fake_news_nombre = "mrm8488/bert-tiny-finetuned-fake-news-detection"
 modelo_tematica_nombre = "facebook/bart-large-mnli"
+modelo_embeddings_nombre = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2" # Solo para motor_tematica = "embeddings"
+motor_tematica = "nli"  # "nli" (zero-shot con bart-large-mnli) o "embeddings" (similitud coseno, mucho más rápido)
 modelo_emocional_nombre = "j-hartmann/emotion-english-distilroberta-base" # Recuerda: optimizado para inglés
 modelo_resumen_nombre = "facebook/bart-large-cnn"
+modo_resumen = "abstractivo"  # "abstractivo" (bart-large-cnn), "extractivo" (frases clave, sin modelo) o "auto"
+presupuesto_resumen_ms = 2000  # En modo "auto": latencia máxima estimada por texto para usar el abstractivo (bart-large-cnn
+                               # en CPU tarda del orden de 20-40 ms por palabra; la estimación se mide en cada ejecución)
+min_palabras_abstractivo = 60  # En modo "auto": por debajo de estas palabras basta con el extractivo
+detectar_duplicados = True  # Agrupa la misma noticia publicada por varios medios y la analiza una sola vez
+umbral_duplicados = 0.8  # Similitud (Jaccard de secuencias de 3 palabras) a partir de la que dos noticias son la misma
+evaluacion_en_cascada = True  # Temática y resumen solo para las noticias que acaban en alguna lista (mismo resultado, menos trabajo)
+tamano_lote = 8  # Número de textos que se pasan juntos a cada modelo (súbelo si tienes RAM/GPU de sobra)
+usar_cache = True  # Reutiliza los resultados guardados de textos ya analizados en ejecuciones anteriores
+ruta_cache_analisis = "cache_analisis.sqlite"
+ruta_almacen_noticias = "noticias.sqlite"  # Almacén de noticias crudas que alimenta main.py
+ruta_noticias_json = "noticias.json"  # Si existe, se importa al almacén (las repetidas se descartan)
+ruta_salida_filtradas = "noticias_filtradas.json"
+ruta_resultados = "resultados.sqlite"  # Base indexada con los resultados que consulta la web
+ruta_agregados = "agregados.sqlite"  # Recuentos por fuente, tema, categoría y día para los paneles de la web; None para no mantenerlos
+# Backend de inferencia por modelo: "eager" (PyTorch), "int8" (cuantizado, CPU) u "onnx" (ONNX Runtime).
+# Los modelos convertidos se generan la primera vez (o con `python backends_inferencia.py exportar`).
+# Antes de cambiar uno, comprueba cuánto se desvía: `python backends_inferencia.py comprobar --backend int8`
+backends_modelos = {"sentimiento": "eager", "fake_news": "eager", "tematica": "eager",
+                    "embeddings": "eager", "emocional": "eager", "resumen": "eager"}
+# Si servidor_inferencia.py está arrancado (con los mismos modelos), los análisis se le piden a él:
+# los modelos ya están en memoria y las ejecuciones cortas terminan en segundos.
+usar_servidor_inferencia = True
+direccion_servidor_inferencia = "http://127.0.0.1:8766"  # O "unix:/ruta/al/socket"
+# Paquete local de modelos (`python paquete_modelos.py empaquetar`): si contiene un modelo, se carga de ahí
+# sin consultar el Hub y con los pesos mapeados en memoria (arranque rápido, memoria compartida entre procesos)
+directorio_paquete_modelos = "paquete_modelos"
+ruta_metricas_prometheus = "metricas_analisis.prom"  # Para el "textfile collector" de node_exporter
+ruta_resumen_ejecucion = "resumen_ejecucion.json"  # Tiempos, errores y recuentos de la última ejecución
+generar_miniaturas = True  # Descarga una vez cada imagen y guarda una miniatura local para la web
+directorio_miniaturas = "miniaturas"
+# Reglas de enrutado (a qué lista va cada noticia). Los scores completos de cada análisis se guardan en
+# `directorio_puntuaciones`: tras cambiar estas reglas, `python puntuaciones.py reenrutar` recalcula las
+# listas de todo el histórico sin volver a pasar ningún modelo.
+umbral_estrellas_buena = 4  # A partir de estas estrellas (y siendo REAL) la noticia es "Buena/Objetiva"
+umbral_estrellas_mejores = 4  # Estrellas mínimas de las "mejores noticias"
+umbral_estrellas_peores = 2  # Noticias REAL con estas estrellas o menos van a "peores noticias"
+emociones_neutras_positivas = ["neutral", "calm", "content"]  # Emociones de las "noticias destacadas"
+sentimiento_objetivo = "3 stars"  # Sentimiento de una noticia "totalmente objetiva"
+emociones_objetivas = ["neutral", "calm"]  # Emociones de una noticia "totalmente objetiva"
+umbral_confianza_sentimiento = 0.3  # Por debajo, el sentimiento se muestra como poco fiable
+directorio_puntuaciones = "puntuaciones"
+# Versiones publicadas (manifiesto + deltas) para una web desplegada sin la base de resultados, p. ej. en otra
+# máquina que solo recibe esta carpeta. Si la base existe, la web lee de ella, así que por defecto no se publican.
+directorio_instantaneas = None  # "instantaneas" para publicarlas
+directorio_etapas = "etapas_analisis"  # Resultados intermedios de la ejecución por etapas (--max-memory)
+categorias_tematica = ["salud", "tecnología", "educación", "deportes", "economía", "entretenimiento", "política", "ciencia", "medio ambiente", "cultura"] # Puedes ajustar esta lista
+
+# Registro de modelos: se declaran aquí pero cada uno se carga la primera vez que se usa
+# (asume que hiciste huggingface-cli login si fuera necesario para algún modelo).
+# Así, importar este módulo para usar sus funciones de reglas no carga ningún modelo.
+registro_modelos = RegistroModelos(constructor=backends_inferencia.construir_pipeline)
+registro_modelos.registrar("sentimiento", "text-classification", modelo_sentimiento_nombre, device=device,
+                           top_k=None,  # Scores de todas las estrellas (se guardan para poder re-enrutar)
+                           backend=backends_modelos["sentimiento"], paquete=directorio_paquete_modelos)
+registro_modelos.registrar("fake_news", "text-classification", modelo_fake_news_nombre, device=device,
+                           top_k=None,
+                           backend=backends_modelos["fake_news"], paquete=directorio_paquete_modelos)
+registro_modelos.registrar("tematica", "zero-shot-classification", modelo_tematica_nombre, device=device,
+                           backend=backends_modelos["tematica"], paquete=directorio_paquete_modelos)
+registro_modelos.registrar("embeddings", "feature-extraction", modelo_embeddings_nombre, device=device,
+                           backend=backends_modelos["embeddings"], paquete=directorio_paquete_modelos)
+registro_modelos.registrar("emocional", "text-classification", modelo_emocional_nombre, device=device,
+                           top_k=None,  # Para obtener scores de todas las emociones
+                           backend=backends_modelos["emocional"], paquete=directorio_paquete_modelos)
+registro_modelos.registrar("resumen", "summarization", modelo_resumen_nombre, device=device,
+                           backend=backends_modelos["resumen"], paquete=directorio_paquete_modelos)
+
+# Caché de resultados por contenido (hash del texto + modelo). La conexión se abre al primer uso.
+cache_analisis = CacheAnalisis(ruta_cache_analisis)
+
+_clasificador_embeddings = None
+estimador_latencia_resumen = resumidor.EstimadorLatencia()  # Aprende cuánto tarda realmente el abstractivo
+estadisticas_cascada = {}  # etapa -> {"ejecutadas": n, "omitidas": n}, acumulado durante la ejecución
+cache_miniaturas = CacheMiniaturas(directorio_miniaturas)
+metricas_analisis = Metricas()  # Tiempos, errores y recuentos de la ejecución (se exportan al final)
+almacen_puntuaciones = AlmacenPuntuaciones(directorio_puntuaciones, {"tematica": categorias_tematica})  # Scores para re-enrutar
+agregados_analisis = Agregados(ruta_agregados)  # Paneles de la web (la conexión se abre al primer uso)
+_detector_duplicados = None
+_cliente_inferencia = None  # None: sin comprobar; False: servidor no disponible
+
+
+def clasificador_tematico_embeddings():
+    """Devuelve el clasificador temático por embeddings (se crea la primera vez que se pide)."""
+    global _clasificador_embeddings
+    if _clasificador_embeddings is None or _clasificador_embeddings.categorias != categorias_tematica:
+        from tematica_embeddings import ClasificadorTematicoEmbeddings  # Import tardío: solo hace falta con ese motor
+
+        _clasificador_embeddings = ClasificadorTematicoEmbeddings(registro_modelos, "embeddings", categorias_tematica)
+    return _clasificador_embeddings
+
+
+def _modelo_tematica():
+    """Nombre en el registro del modelo que usa el motor temático configurado."""
+    return "embeddings" if motor_tematica == "embeddings" else "tematica"
+
+
+def cargar_modelos(nombres=None):
+    """Carga por adelantado los modelos indicados (o todos) y sale del programa si alguno falla."""
+    # Es buena práctica manejar excepciones aquí si la carga de modelos falla (ej. por falta de conexión)
+    try:
+        print(f"Cargando modelos de IA ({', '.join(nombres or registro_modelos.nombres())})...")
+        tiempos_carga = registro_modelos.precargar(nombres)
+        print("✅ Modelos cargados correctamente.")
+        for nombre, segundos in tiempos_carga.items():
+            print(f"   - {nombre}: {segundos:.1f} s")
+            metricas_analisis.fijar("noticias_carga_modelo_segundos", segundos, modelo=nombre)
+    except Exception as e:
+        metricas_analisis.registrar_error("carga_modelos", e)
+        print(f"🚨 Error cargando los modelos: {e}")
+        if not isinstance(e, MemoryError):  # P. ej. el modelo no cabe en el presupuesto de --max-memory
+            print("Asegúrate de tener conexión a internet y las librerías de Hugging Face instaladas correctamente.")
+        exit() # Salir si los modelos no pueden cargarse
 
-# Carga los modelos (asume que hiciste huggingface-cli login si fuera necesario para algún modelo)
-# Es buena práctica manejar excepciones aquí si la carga de modelos falla (ej. por falta de conexión)
-try:
-    print("Cargando modelos de IA...")
-    modelo_sentimiento = pipeline(
-        "text-classification",
-        model=modelo_sentimiento_nombre,
-        device=device
-    )
 
-    modelo_fake_news = pipeline(
-        "text-classification",
-        model=modelo_fake_news_nombre,
-        device=device
-    )
+def modelos_en_uso():
+    """Nombres en el registro de los modelos que usa la configuración actual."""
+    return ["sentimiento", "fake_news", _modelo_tematica(), "emocional", *(["resumen"] if modo_resumen != "extractivo" else [])]
 
-    modelo_tematica = pipeline(
-        "zero-shot-classification",
-        model=modelo_tematica_nombre,
-        device=device
-    )
 
-    modelo_emocional = pipeline(
-        "text-classification",
-        model=modelo_emocional_nombre,
-        device=device,
-        top_k=None  # Para obtener scores de todas las emociones
-    )
+def _identidad_modelo(nombre):
+    """Identifica un modelo en la caché por su nombre en el Hub, su revisión y su backend (si no es eager)."""
+    _, nombre_modelo, opciones = registro_modelos.especificacion(nombre)
+    backend = opciones.get("backend", "eager")
+    sufijo = "" if backend == "eager" else f"#{backend}"  # Un modelo cuantizado puede dar scores algo distintos
+    return f"{nombre_modelo}@{opciones.get('revision') or 'main'}{sufijo}"
+
+
+def _resultado_fallido(resultado):
+    """Indica si un resultado es el valor de reserva de un error (esos no se guardan en caché)."""
+    if isinstance(resultado, dict):
+        return resultado.get("label") == "N/A"
+    if isinstance(resultado, tuple):
+        return resultado[0] == "N/A"
+    return resultado == "Resumen no disponible."
+
+
+def _desde_cache(valor):
+    """Devuelve un valor leído de la caché (JSON) con el tipo que devuelve el análisis."""
+    return tuple(valor) if isinstance(valor, list) else valor
+
+
+def _con_cache(nombre_modelo, parametros=lambda: ""):
+    """Decorador: busca el resultado en la caché antes de llamar al modelo y guarda los nuevos."""
+    def decorador(analizar):
+        @functools.wraps(analizar)
+        def envoltura(texto, *args, **kwargs):
+            if not usar_cache:
+                return analizar(texto, *args, **kwargs)
+            nombre = nombre_modelo() if callable(nombre_modelo) else nombre_modelo
+            identidad, params = _identidad_modelo(nombre), parametros(*args, **kwargs)
+            valor = cache_analisis.obtener(identidad, texto, params)
+            if valor is not None:
+                return _desde_cache(valor)
+            resultado = analizar(texto, *args, **kwargs)
+            if not _resultado_fallido(resultado):
+                cache_analisis.guardar(identidad, texto, resultado, params)
+            return resultado
+        return envoltura
+    return decorador
+
+
+# Los resultados incluyen los scores de todas las etiquetas: las entradas de caché antiguas (solo con
+# la etiqueta principal) tienen otros parámetros y no se reutilizan
+PARAMETROS_CLASIFICADOR = "top_k=None"
+
+
+def _parametros_clasificador():
+    return PARAMETROS_CLASIFICADOR
 
-    modelo_resumen = pipeline(
-        "summarization",
-        model=modelo_resumen_nombre,
-        device=device
-    )
-    print("✅ Modelos cargados correctamente.")
-except Exception as e:
-    print(f"🚨 Error cargando los modelos: {e}")
-    print("Asegúrate de tener conexión a internet y las librerías de Hugging Face instaladas correctamente.")
-    exit() # Salir si los modelos no pueden cargarse
 
+def _parametros_tematica():
+    if motor_tematica == "embeddings":
+        clasificador = clasificador_tematico_embeddings()
+        return "|".join([*categorias_tematica, clasificador.plantilla, str(clasificador.temperatura), "puntuaciones"])
+    return "|".join([*categorias_tematica, "puntuaciones"])
 
+
+def _con_puntuaciones(salida):
+    """Reduce la salida de un clasificador con top_k=None a {"label", "score", "puntuaciones" de todas las etiquetas}."""
+    if salida and isinstance(salida[0], list):  # Para un solo texto algunas versiones anidan una lista más
+        salida = salida[0]
+    if isinstance(salida, dict):
+        salida = [salida]
+    mejor = max(salida, key=lambda x: x["score"])
+    return {"label": mejor["label"], "score": mejor["score"], "puntuaciones": {x["label"]: x["score"] for x in salida}}
+
+
+def _parametros_resumen(max_length=150, min_length=40):
+    return f"max_length={max_length},min_length={min_length}"
+
+
+@_con_cache("sentimiento", _parametros_clasificador)
 def analizar_sentimiento(texto):
     """Analiza el sentimiento del texto."""
     try:
-        resultado = modelo_sentimiento(texto)[0]
+        resultado = _con_puntuaciones(registro_modelos.obtener("sentimiento")(texto))
         return resultado
     except Exception as e:
+        metricas_analisis.registrar_error("sentimiento", e, modo="individual")
         print(f"Error en análisis de sentimiento: {e}")
         return {"label": "N/A", "score": 0.0}
 
 
+@_con_cache("fake_news", _parametros_clasificador)
 def analizar_fake_news(texto):
     """Analiza si el texto es probable fake news."""
     try:
-        resultado = modelo_fake_news(texto)[0]
+        resultado = _con_puntuaciones(registro_modelos.obtener("fake_news")(texto))
         return resultado
     except Exception as e:
+        metricas_analisis.registrar_error("fake_news", e, modo="individual")
         print(f"Error en análisis de fake news: {e}")
         return {"label": "N/A", "score": 0.0}
 
 
+@_con_cache(_modelo_tematica, _parametros_tematica)
 def analizar_tematica(texto):
-    """Clasifica el texto en una temática usando zero-shot."""
-    posibles_categorias = ["salud", "tecnología", "educación", "deportes", "economía", "entretenimiento", "política", "ciencia", "medio ambiente", "cultura"] # Puedes ajustar esta lista
+    """Clasifica el texto en una temática usando zero-shot (o embeddings, según `motor_tematica`)."""
     try:
-        resultado = modelo_tematica(texto, posibles_categorias, multi_label=False) # Asumimos una sola etiqueta principal
+        if motor_tematica == "embeddings":
+            return clasificador_tematico_embeddings().clasificar_lote([texto])[0]
+        resultado = registro_modelos.obtener("tematica")(texto, categorias_tematica, multi_label=False) # Asumimos una sola etiqueta principal
         etiqueta_principal = resultado["labels"][0]
         score_principal = resultado["scores"][0]
-        return etiqueta_principal, score_principal
+        return etiqueta_principal, score_principal, dict(zip(resultado["labels"], resultado["scores"]))
     except Exception as e:
+        metricas_analisis.registrar_error("tematica", e, modo="individual")
         print(f"Error en análisis temático: {e}")
-        return "N/A", 0.0
+        return "N/A", 0.0, {}
 
 
+@_con_cache("emocional")
 def analizar_emocional(texto):
     """Analiza la emoción predominante en el texto."""
     try:
         # El modelo devuelve una lista de listas de diccionarios si top_k=None
         # Si el texto es muy corto, podría no devolver lo esperado.
-        resultados_emociones = modelo_emocional(texto)
+        resultados_emociones = registro_modelos.obtener("emocional")(texto)
         
         if resultados_emociones and isinstance(resultados_emociones, list) and resultados_emociones[0]:
             # Si top_k=None, devuelve una lista (para batch) que contiene otra lista de diccionarios
             # Para un solo texto, tomamos el primer elemento de la lista exterior
-            lista_emociones = resultados_emociones[0]
-            
-            # Ordenamos para sacar la emoción con mayor score
-            resultados_ordenados = sorted(lista_emociones, key=lambda x: x['score'], reverse=True)
-            emocion_principal = resultados_ordenados[0]['label']
-            score_emocion = resultados_ordenados[0]['score']
-            return emocion_principal, score_emocion, resultados_ordenados # Devolvemos todos los detalles
+            return _emocion_principal(resultados_emociones[0])
         else:
             # Fallback si la estructura no es la esperada
             print(f"Respuesta inesperada del modelo emocional: {resultados_emociones}")
             return "N/A", 0.0, []
 
     except Exception as e:
+        metricas_analisis.registrar_error("emocional", e, modo="individual")
         print(f"Error en análisis emocional: {e}")
         return "N/A", 0.0, []
 
 
-def resumir_texto(texto, max_length=150, min_length=40): # Ajusta max/min length según tus necesidades
-    """Genera un resumen del texto."""
-    try:
-        # Asegurarse de que el texto no sea demasiado corto para resumir, algunos modelos tienen límites.
-        if len(texto.split()) < min_length / 2 : # Heurística muy simple
-             return texto # Si es muy corto, devuelve el original o un mensaje
+def _emocion_principal(lista_emociones):
+    """Ordena los scores de emoción y devuelve (emoción principal, score, detalles ordenados)."""
+    # Ordenamos para sacar la emoción con mayor score
+    resultados_ordenados = sorted(lista_emociones, key=lambda x: x['score'], reverse=True)
+    emocion_principal = resultados_ordenados[0]['label']
+    score_emocion = resultados_ordenados[0]['score']
+    return emocion_principal, score_emocion, resultados_ordenados # Devolvemos todos los detalles
+
+
+def _tipo_resumen(texto, min_length, modo=None):
+    """Decide si el texto se deja tal cual, se resume extractivamente o pasa por el modelo de resumen."""
+    # Asegurarse de que el texto no sea demasiado corto para resumir, algunos modelos tienen límites.
+    # Heurística muy simple: menos de min_length / 2 palabras se devuelve el original.
+    return resumidor.elegir_tipo_resumen(texto, modo or modo_resumen, min_length / 2, min_palabras_abstractivo,
+                                         presupuesto_resumen_ms, estimador_latencia_resumen)
 
-        resumen = modelo_resumen(texto, max_length=max_length, min_length=min_length, do_sample=False)
+
+def _indice_sonda_resumen(textos, min_length, modo=None):
+    """Texto que se resume con el modelo para medir su latencia (el más corto de los que lo admiten).
+
+    Solo en modo "auto" mientras el estimador no tenga ninguna medición; si no, None.
+    """
+    if (modo or modo_resumen) != "auto" or estimador_latencia_resumen.calibrado:
+        return None
+    candidatos = [i for i, texto in enumerate(textos)
+                  if resumidor.admite_abstractivo(texto, min_length / 2, min_palabras_abstractivo)]
+    return min(candidatos, key=lambda i: len(textos[i].split()), default=None)
+
+
+@_con_cache("resumen", _parametros_resumen)
+def _resumir_abstractivo(texto, max_length=150, min_length=40):
+    """Genera un resumen nuevo del texto con el modelo de resumen."""
+    try:
+        inicio = time.perf_counter()
+        resumen = registro_modelos.obtener("resumen")(texto, max_length=max_length, min_length=min_length, do_sample=False)
+        estimador_latencia_resumen.registrar(time.perf_counter() - inicio, len(texto.split()))
         texto_resumido = resumen[0]['summary_text']
         return texto_resumido
     except Exception as e:
+        metricas_analisis.registrar_error("resumen", e, modo="individual")
         print(f"Error en resumen de texto: {e}")
         return "Resumen no disponible."
 
 
+def _con_tipo(resumen, tipo):
+    """Empareja el resumen con su tipo (o "ninguno" si el modelo falló)."""
+    return (resumen, resumidor.TIPO_NO_DISPONIBLE) if resumen == "Resumen no disponible." else (resumen, tipo)
+
+
+def resumir_texto(texto, max_length=150, min_length=40, modo=None): # Ajusta max/min length según tus necesidades
+    """Genera un resumen del texto. Devuelve (resumen, tipo de resumen usado)."""
+    tipo = _tipo_resumen(texto, min_length, modo)
+    if _indice_sonda_resumen([texto], min_length, modo) == 0:
+        tipo = resumidor.TIPO_ABSTRACTIVO  # Sonda: su latencia calibra el modo "auto"
+    if tipo == resumidor.TIPO_ORIGINAL:
+        return texto, tipo # Si es muy corto, devuelve el original
+    if tipo == resumidor.TIPO_EXTRACTIVO:
+        return resumidor.resumir_extractivo(texto), tipo
+    return _con_tipo(_resumir_abstractivo(texto, max_length=max_length, min_length=min_length), tipo)
+
+
+# --- Versiones por lotes de los análisis ---
+# Cada función recibe una lista de textos y devuelve una lista de resultados en el mismo orden,
+# con el mismo formato que su versión de un solo texto. Los textos se ordenan por longitud antes
+# de agruparlos, así cada lote se rellena (padding) solo hasta su texto más largo.
+# Antes de llamar al modelo se buscan todos los textos en la caché; solo los fallos se analizan.
+
+def _lotes_por_longitud(textos, tamano):
+    """Genera listas de índices de `textos` agrupados en lotes de longitud parecida."""
+    orden = sorted(range(len(textos)), key=lambda i: len(textos[i]))
+    for inicio in range(0, len(orden), tamano):
+        yield orden[inicio:inicio + tamano]
+
+
+def _analizar_por_lotes(textos, tamano, analizar_lote, analizar_uno, nombre_analisis, nombre_modelo, parametros=""):
+    """Aplica `analizar_lote` por lotes y reordena los resultados al orden original de `textos`."""
+    tamano = max(1, int(tamano or 1))
+    resultados = [None] * len(textos)
+    pendientes = list(range(len(textos)))
+    identidad = _identidad_modelo(nombre_modelo)
+    if usar_cache and textos:
+        for indice, valor in cache_analisis.obtener_varios(identidad, textos, parametros).items():
+            resultados[indice] = _desde_cache(valor)
+        pendientes = [i for i in pendientes if resultados[i] is None]
+        metricas_analisis.incrementar("noticias_cache_total", len(textos) - len(pendientes), modelo=nombre_modelo, resultado="acierto")
+        metricas_analisis.incrementar("noticias_cache_total", len(pendientes), modelo=nombre_modelo, resultado="fallo")
+    if not pendientes:
+        return resultados
+
+    if not registro_modelos.esta_cargado(nombre_modelo):
+        cargar_modelos([nombre_modelo])  # Solo se carga el modelo si hay algo que no estaba en caché
+
+    textos_pendientes = [textos[i] for i in pendientes]
+    nuevos = []
+    for indices in _lotes_por_longitud(textos_pendientes, tamano):
+        lote = [textos_pendientes[i] for i in indices]
+        try:
+            with metricas_analisis.medir("noticias_modelo_segundos", modelo=nombre_modelo, modo="lote"):
+                salidas = analizar_lote(lote)
+        except Exception as e:
+            # Si falla el lote completo, repetimos noticia a noticia para aislar el texto problemático
+            metricas_analisis.registrar_error(nombre_modelo, e, modo="lote")
+            print(f"Error en {nombre_analisis} por lotes: {e}. Reintentando noticia a noticia.")
+            salidas = []
+            for texto in lote:
+                with metricas_analisis.medir("noticias_modelo_segundos", modelo=nombre_modelo, modo="individual"):
+                    salidas.append(analizar_uno(texto))
+        for indice, texto, salida in zip(indices, lote, salidas):
+            resultados[pendientes[indice]] = salida
+            if _resultado_fallido(salida):
+                metricas_analisis.incrementar("noticias_elementos_total", etapa=nombre_modelo, sentido="salida", categoria="fallido")
+            else:
+                nuevos.append((texto, salida))
+    if usar_cache:
+        cache_analisis.guardar_varios(identidad, nuevos, parametros)
+    return resultados
+
+
+def analizar_sentimiento_lote(textos, tamano=tamano_lote):
+    """Analiza el sentimiento de una lista de textos."""
+    return _analizar_por_lotes(
+        textos, tamano,
+        lambda lote: [_con_puntuaciones(s) for s in registro_modelos.obtener("sentimiento")(lote, batch_size=len(lote))],
+        analizar_sentimiento.__wrapped__, "análisis de sentimiento", "sentimiento", PARAMETROS_CLASIFICADOR
+    )
+
+
+def analizar_fake_news_lote(textos, tamano=tamano_lote):
+    """Analiza si cada texto de la lista es probable fake news."""
+    return _analizar_por_lotes(
+        textos, tamano,
+        lambda lote: [_con_puntuaciones(s) for s in registro_modelos.obtener("fake_news")(lote, batch_size=len(lote))],
+        analizar_fake_news.__wrapped__, "análisis de fake news", "fake_news", PARAMETROS_CLASIFICADOR
+    )
+
+
+def analizar_tematica_lote(textos, tamano=tamano_lote):
+    """Clasifica cada texto de la lista en una temática usando zero-shot (o embeddings, según `motor_tematica`)."""
+    def _lote(lote):
+        if motor_tematica == "embeddings":
+            return clasificador_tematico_embeddings().clasificar_lote(lote, tamano_lote=len(lote))
+        resultados = registro_modelos.obtener("tematica")(lote, categorias_tematica, multi_label=False, batch_size=len(lote))
+        return [(resultado["labels"][0], resultado["scores"][0], dict(zip(resultado["labels"], resultado["scores"])))
+                for resultado in resultados]
+    return _analizar_por_lotes(textos, tamano, _lote, analizar_tematica.__wrapped__, "análisis temático", _modelo_tematica(),
+                               _parametros_tematica())
+
+
+def analizar_emocional_lote(textos, tamano=tamano_lote):
+    """Analiza la emoción predominante de cada texto de la lista."""
+    def _lote(lote):
+        # Con una lista de entrada y top_k=None, el modelo devuelve una lista de dicts por texto
+        return [_emocion_principal(lista_emociones) for lista_emociones in registro_modelos.obtener("emocional")(lote, batch_size=len(lote))]
+    return _analizar_por_lotes(textos, tamano, _lote, analizar_emocional.__wrapped__, "análisis emocional", "emocional")
+
+
+def resumir_texto_lote(textos, tamano=tamano_lote, max_length=150, min_length=40, modo=None):
+    """Genera un resumen para cada texto de la lista. Devuelve una lista de (resumen, tipo)."""
+    # Los textos cortos se devuelven tal cual y los extractivos se resumen aquí mismo;
+    # solo los que necesitan el resumen abstractivo pasan por el modelo
+    def _lote(lote):
+        inicio = time.perf_counter()
+        resultados = registro_modelos.obtener("resumen")(lote, max_length=max_length, min_length=min_length, do_sample=False, batch_size=len(lote))
+        estimador_latencia_resumen.registrar(time.perf_counter() - inicio, sum(len(t.split()) for t in lote))
+        return [resultado['summary_text'] for resultado in resultados]
+
+    def _uno(texto):
+        return _resumir_abstractivo.__wrapped__(texto, max_length=max_length, min_length=min_length)
+
+    def _generar(lista):
+        return _analizar_por_lotes(lista, tamano, _lote, _uno, "resumen de texto", "resumen",
+                                   _parametros_resumen(max_length, min_length))
+
+    resumenes = [None] * len(textos)
+    sonda = _indice_sonda_resumen(textos, min_length, modo)
+    if sonda is not None:
+        # Primero la sonda: con su latencia ya medida, el resto se decide con una estimación real
+        resumenes[sonda] = _con_tipo(_generar([textos[sonda]])[0], resumidor.TIPO_ABSTRACTIVO)
+    tipos = {i: _tipo_resumen(texto, min_length, modo) for i, texto in enumerate(textos) if resumenes[i] is None}
+    for i, tipo in tipos.items():
+        if tipo != resumidor.TIPO_ABSTRACTIVO:
+            resumenes[i] = (resumidor.resumir_extractivo(textos[i]) if tipo == resumidor.TIPO_EXTRACTIVO else textos[i], tipo)
+    indices_a_resumir = [i for i, tipo in tipos.items() if tipo == resumidor.TIPO_ABSTRACTIVO]
+    for indice, resumen in zip(indices_a_resumir, _generar([textos[i] for i in indices_a_resumir])):
+        resumenes[indice] = _con_tipo(resumen, resumidor.TIPO_ABSTRACTIVO)
+    return resumenes
+
+
 def cargar_noticias(ruta_archivo="noticias.json"):
     """Carga las noticias desde un archivo JSON."""
     try:
-        with open(ruta_archivo, "r", encoding="utf-8") as f:
-            noticias = json.load(f)
+        with metricas_analisis.medir("noticias_archivo_segundos", archivo=os.path.basename(ruta_archivo), operacion="lectura"):
+            with open(ruta_archivo, "r", encoding="utf-8") as f:
+                noticias = json.load(f)
         print(f"📰 Se han cargado {len(noticias)} noticias desde '{ruta_archivo}'.")
         return noticias
-    except FileNotFoundError:
+    except FileNotFoundError as e:
+        metricas_analisis.registrar_error("lectura_noticias", e)
         print(f"🚨 Error: El archivo '{ruta_archivo}' no fue encontrado. Ejecuta primero 'main.py'.")
         return []
-    except json.JSONDecodeError:
+    except json.JSONDecodeError as e:
+        metricas_analisis.registrar_error("lectura_noticias", e)
         print(f"🚨 Error: El archivo '{ruta_archivo}' contiene JSON inválido.")
         return []
     except Exception as e:
+        metricas_analisis.registrar_error("lectura_noticias", e)
         print(f"🚨 Error inesperado al cargar noticias: {e}")
         return []
 
@@ -155,147 +506,585 @@ def determinar_categoria(estrellas, etiqueta_fake_news_label):
     else: # Si la etiqueta es N/A u otra cosa
         fake_status = "INDETERMINADO"
 
-    umbral_estrellas_buena = 4 # A partir de 4 estrellas se considera sentimiento positivo para "Buena"
-
     if fake_status == "FAKE":
         return "Dudosa/Falsa"
     elif fake_status == "REAL":
-        if estrellas >= umbral_estrellas_buena:
+        if estrellas >= umbral_estrellas_buena: # Por defecto, 4 estrellas o más se considera sentimiento positivo para "Buena"
             return "Buena/Objetiva" # "Objetiva" aquí es por el sentimiento, no por un análisis de objetividad profundo
-        else: # Menos de 4 estrellas pero real
+        else: # Menos estrellas pero real
             return "Subjetiva pero verdadera"
     else: # Si el fake_status es INDETERMINADO
         return "Veracidad no determinada"
 
 
-def main():
-    noticias_originales = cargar_noticias()
+def extraer_estrellas(label_sentimiento):
+    """Extrae el número de estrellas de una etiqueta del tipo "X stars"."""
+    try:
+        return int(label_sentimiento[0]) if label_sentimiento != "N/A" else 0
+    except (ValueError, TypeError, IndexError):
+        return 0 # Fallback si la etiqueta no es como "X stars"
+
+
+def construir_noticia_procesada(noticia_original_data, analisis_sentimiento, analisis_fake, analisis_tematica,
+                                analisis_emocional, resumen):
+    """Junta la noticia original y los resultados de los cinco análisis en el diccionario que se guarda."""
+    label_sentimiento = analisis_sentimiento["label"]
+    score_sentimiento = analisis_sentimiento["score"]
+    estrellas_sentimiento = extraer_estrellas(label_sentimiento)
+    etiqueta_fake = analisis_fake["label"]
+    score_fake = analisis_fake["score"]
+    tema_principal, score_tema = analisis_tematica[:2]  # El tercer elemento son los scores de todas las categorías
+    emocion_predominante, score_emocion, detalles_completos_emocion = analisis_emocional
+    resumen_generado, tipo_resumen = resumen
+
+    # --- Determinar categoría final ---
+    categoria_final_calculada = determinar_categoria(estrellas_sentimiento, etiqueta_fake)
+
+    # --- Recopilar información de la fuente y URL ---
+    fuente_data = noticia_original_data.get("source", {}) # GNews devuelve 'source' como un dict
+    nombre_fuente = fuente_data.get("name", "Fuente Desconocida")
+    url_articulo_original = noticia_original_data.get("url", "")
+    url_imagen_articulo = noticia_original_data.get("image", "") # GNews usa 'image' para la URL de la imagen
+
+    # --- Crear el diccionario con toda la información para guardar ---
+    return {
+        "titulo": noticia_original_data.get("title"),
+        "descripcion_original": noticia_original_data.get("description"), # Guardamos la original
+        "url_noticia": url_articulo_original,
+        "imagen_url": url_imagen_articulo,
+        "fuente_nombre": nombre_fuente,
+        "fecha_publicacion": noticia_original_data.get("publishedAt"), # Fecha ISO 8601 de GNews
+        "sentimiento": label_sentimiento,
+        "confianza_sentimiento": score_sentimiento,
+        "estrellas_sentimiento": estrellas_sentimiento, # Útil tener las estrellas directamente
+        "fake_news": etiqueta_fake, # Etiqueta original del modelo (LABEL_0 o LABEL_1)
+        "confianza_fake": score_fake,
+        "categoria_final": categoria_final_calculada,
+        "tema": tema_principal,
+        "confianza_tema": score_tema,
+        "emocion": emocion_predominante,
+        "confianza_emocion": score_emocion,
+        "detalles_emocion": detalles_completos_emocion, # Lista completa de emociones y scores
+        "resumen": resumen_generado,
+        "tipo_resumen": tipo_resumen # "abstractivo", "extractivo", "original" o "ninguno"
+    }
+
+
+def imprimir_noticia_procesada(noticia_procesada):
+    """Imprime por consola el resultado del análisis de una noticia."""
+    # Condición para avisar si la confianza del sentimiento es muy baja (ajusta `umbral_confianza_sentimiento`)
+    if noticia_procesada["confianza_sentimiento"] < umbral_confianza_sentimiento and noticia_procesada["sentimiento"] != "N/A":
+        print(f"Sentimiento: {noticia_procesada['sentimiento']} (confianza muy baja {noticia_procesada['confianza_sentimiento']:.2f}), análisis poco fiable.")
+        print("Se omite clasificación final basada en sentimiento por baja confianza.\n")
+        # Podrías decidir marcarla como "Análisis no concluyente" y guardarla en otra lista.
+
+    print(f"Título: {noticia_procesada['titulo'] or 'Sin título'}")
+    print(f"Sentimiento: {noticia_procesada['sentimiento']} (Confianza: {noticia_procesada['confianza_sentimiento']:.2f}, Estrellas: {noticia_procesada['estrellas_sentimiento']})")
+    print(f"Fake News: {noticia_procesada['fake_news']} (Confianza: {noticia_procesada['confianza_fake']:.2f})")
+    print(f"Categoría Final IA: {noticia_procesada['categoria_final']}")
+    print(f"Tema Principal: {noticia_procesada['tema']} (Confianza: {noticia_procesada['confianza_tema']:.2f})")
+    print(f"Emoción Predominante: {noticia_procesada['emocion']} (Confianza: {noticia_procesada['confianza_emocion']:.2f})")
+    print(f"Resumen ({noticia_procesada['tipo_resumen']}): {noticia_procesada['resumen']}\n")
+
+
+def clasificar_noticia(noticia_procesada):
+    """Devuelve la lista de noticias_filtradas.json a la que va la noticia, o None si no entra en ninguna."""
+    categoria_final_calculada = noticia_procesada["categoria_final"]
+    emocion_predominante = noticia_procesada["emocion"]
+    estrellas_sentimiento = noticia_procesada["estrellas_sentimiento"]
+    etiqueta_fake = noticia_procesada["fake_news"]
+
+    # Noticias destacadas: Buenas/Objetivas Y emoción neutra/calma/contenta (ajusta `emociones_neutras_positivas`
+    # si tu modelo usa otras etiquetas)
+    if categoria_final_calculada == "Buena/Objetiva" and emocion_predominante.lower() in emociones_neutras_positivas:
+        return "noticias_destacadas"
+
+    # Mejores noticias: Buenas/Objetivas Y con alto rating de estrellas (y no necesariamente emoción neutra)
+    # Usamos 'elif' para que no se dupliquen si ya están en 'destacadas' por la emoción.
+    elif categoria_final_calculada == "Buena/Objetiva" and estrellas_sentimiento >= umbral_estrellas_mejores:
+        return "mejores_noticias"
+
+    # Peores noticias: Dudosas/Falsas O con muy bajo rating de estrellas (aunque sean verdaderas)
+    elif categoria_final_calculada == "Dudosa/Falsa" or (etiqueta_fake == "LABEL_1" and estrellas_sentimiento <= umbral_estrellas_peores):
+        return "peores_noticias"
+
+    # Aquí podrías añadir más 'elif' para otras categorías que quieras pre-filtrar en el JSON.
+    return None
+
+
+def texto_para_analisis(noticia_original_data):
+    """Forma el texto que se pasa a los modelos: título y descripción."""
+    return noticia_original_data.get("title", "") + ". " + noticia_original_data.get("description", "")
+
+
+# --- Evaluación en cascada ---
+# El destino de una noticia (clasificar_noticia) solo depende del sentimiento, el fake news y la emoción.
+# Con `evaluacion_en_cascada`, esos tres modelos (los baratos) se ejecutan primero para todas las noticias
+# y la temática y el resumen (zero-shot y bart-large-cnn, los caros) solo para las que se van a guardar.
+# Las descartadas reciben un resultado "omitido" que nunca llega a noticias_filtradas.json.
+TEMATICA_OMITIDA = ("N/A", 0.0, {})
+RESUMEN_OMITIDO = ("", resumidor.TIPO_OMITIDO)
+
+
+def destino_por_analisis(analisis_sentimiento, analisis_fake, analisis_emocional):
+    """Calcula a qué lista irá la noticia usando solo los análisis de los que depende el enrutado."""
+    estrellas = extraer_estrellas(analisis_sentimiento["label"])
+    return clasificar_noticia({
+        "categoria_final": determinar_categoria(estrellas, analisis_fake["label"]),
+        "emocion": analisis_emocional[0],
+        "estrellas_sentimiento": estrellas,
+        "fake_news": analisis_fake["label"],
+    })
+
+
+def _contar_cascada(etapa, ejecutadas, omitidas):
+    contador = estadisticas_cascada.setdefault(etapa, {"ejecutadas": 0, "omitidas": 0})
+    contador["ejecutadas"] += ejecutadas
+    contador["omitidas"] += omitidas
+
+
+def imprimir_estadisticas_cascada():
+    """Muestra cuántas noticias se ahorraron cada etapa cara gracias a la evaluación en cascada."""
+    for etapa, contador in estadisticas_cascada.items():
+        total = contador["ejecutadas"] + contador["omitidas"]
+        if total:
+            print(f"⏭️ Cascada - {etapa}: {contador['omitidas']} de {total} noticias omitidas "
+                  f"({100 * contador['omitidas'] / total:.0f}% de trabajo evitado)")
+
+
+def analizar_textos(textos, tamano=tamano_lote):
+    """Pasa los textos por los cinco análisis (modelo a modelo, por lotes).
+
+    Devuelve, para cada texto, la tupla (sentimiento, fake news, temática, emoción, resumen)
+    en el formato que espera `construir_noticia_procesada`. Con `evaluacion_en_cascada`, la temática
+    y el resumen de las noticias que no van a ninguna lista se sustituyen por resultados "omitidos".
+    """
+    sentimiento_lote, fake_news_lote, emocional_lote, tematica_lote, resumen_lote = _analizadores_lote()
+    print(f"Analizando sentimiento ({len(textos)} textos, lotes de {tamano})...")
+    analisis_sentimiento = sentimiento_lote(textos, tamano)
+    print("Analizando fake news...")
+    analisis_fake = fake_news_lote(textos, tamano)
+    print("Analizando emociones...")
+    analisis_emocional = emocional_lote(textos, tamano)
+
+    conservados = indices_conservados(analisis_sentimiento, analisis_fake, analisis_emocional)
+    textos_conservados = [textos[i] for i in conservados]
+    omitidos = len(textos) - len(conservados)
+
+    print("Clasificando temática...")
+    analisis_tematica = [TEMATICA_OMITIDA] * len(textos)
+    for i, resultado in zip(conservados, tematica_lote(textos_conservados, tamano)):
+        analisis_tematica[i] = resultado
+    contar_omitidos("tematica", len(conservados), omitidos)
+    print("Generando resúmenes...\n")
+    resumenes = [RESUMEN_OMITIDO] * len(textos)
+    for i, resultado in zip(conservados, resumen_lote(textos_conservados, tamano)):
+        resumenes[i] = resultado
+    contar_omitidos("resumen", len(conservados), omitidos)
+    return list(zip(analisis_sentimiento, analisis_fake, analisis_tematica, analisis_emocional, resumenes))
+
+
+def indices_conservados(analisis_sentimiento, analisis_fake, analisis_emocional):
+    """Índices de las noticias que necesitan temática y resumen (todas, sin `evaluacion_en_cascada`).
+
+    Los análisis pueden ser listas o iteradores (p. ej. leídos del disco): se recorren una sola vez.
+    """
+    conservados, total = [], 0
+    for i, analisis in enumerate(zip(analisis_sentimiento, analisis_fake, analisis_emocional)):
+        total += 1
+        if not evaluacion_en_cascada or destino_por_analisis(*analisis):
+            conservados.append(i)
+    omitidos = total - len(conservados)
+    if omitidos:
+        print(f"⏭️ {omitidos} noticias descartadas por el enrutado: se omiten su temática y su resumen.")
+    return conservados
+
+
+def contar_omitidos(etapa, ejecutadas, omitidas):
+    """Registra en las estadísticas de la cascada y en las métricas las noticias que se saltó una etapa."""
+    _contar_cascada("temática" if etapa == "tematica" else etapa, ejecutadas, omitidas)
+    metricas_analisis.incrementar("noticias_elementos_total", omitidas, etapa=etapa, sentido="salida", categoria="omitida")
+
+
+# --- Servidor de inferencia ---
+# Con `usar_servidor_inferencia`, si hay un servidor_inferencia.py arrancado con la misma configuración,
+# los cinco análisis por lotes se le piden a él en lugar de cargar los modelos en este proceso.
+# Si el servidor falla a mitad de ejecución, ese análisis se hace localmente.
+
+def configuracion_analisis():
+    """Lo que determina los resultados: modelos (con revisión y backend), categorías y modo de resumen."""
+    return {
+        "sentimiento": _identidad_modelo("sentimiento"),
+        "fake_news": _identidad_modelo("fake_news"),
+        "emocional": _identidad_modelo("emocional"),
+        "tematica": [_identidad_modelo(_modelo_tematica()), motor_tematica, categorias_tematica],
+        "resumen": [_identidad_modelo("resumen"), modo_resumen, min_palabras_abstractivo, presupuesto_resumen_ms],
+    }
+
+
+def cliente_inferencia():
+    """Devuelve el cliente del servidor de inferencia si está arrancado y configurado igual (si no, None)."""
+    global _cliente_inferencia
+    if not usar_servidor_inferencia:
+        return None
+    if _cliente_inferencia is None:
+        cliente = ClienteInferencia(direccion_servidor_inferencia)
+        salud = cliente.salud()
+        _cliente_inferencia = False
+        if salud is None:
+            pass  # No hay servidor: se analiza localmente sin avisar
+        elif salud.get("configuracion") != json.loads(json.dumps(configuracion_analisis())):
+            print(f"⚠️ El servidor de inferencia de {direccion_servidor_inferencia} usa otros modelos o parámetros; "
+                  "se analiza localmente.")
+        else:
+            print(f"🔌 Usando el servidor de inferencia de {direccion_servidor_inferencia} (modelos ya cargados).")
+            _cliente_inferencia = cliente
+    return _cliente_inferencia or None
+
+
+def _analisis_remoto(cliente, analisis, analizar_local):
+    """Versión por lotes de un análisis que se ejecuta en el servidor (o localmente si el servidor falla)."""
+    def analizar(textos, tamano=tamano_lote):
+        if not textos:
+            return []
+        try:
+            with metricas_analisis.medir("noticias_modelo_segundos", modelo=analisis, modo="servidor"):
+                return [_desde_cache(resultado) for resultado in cliente.analizar(analisis, textos)]
+        except (OSError, ValueError, ErrorServidorInferencia) as e:
+            metricas_analisis.registrar_error(analisis, e, modo="servidor")
+            print(f"🚨 Error en el servidor de inferencia ({e}); {analisis} se hace localmente.")
+            return analizar_local(textos, tamano)
+    return analizar
+
+
+def _analizadores_lote():
+    """Funciones por lotes de sentimiento, fake news, emoción, temática y resumen (remotas o locales)."""
+    locales = {
+        "analizar_sentimiento": analizar_sentimiento_lote,
+        "analizar_fake_news": analizar_fake_news_lote,
+        "analizar_emocional": analizar_emocional_lote,
+        "analizar_tematica": analizar_tematica_lote,
+        "resumir_texto": resumir_texto_lote,
+    }
+    cliente = cliente_inferencia()
+    if cliente is None:
+        return tuple(locales.values())
+    return tuple(_analisis_remoto(cliente, analisis, local) for analisis, local in locales.items())
+
+
+# --- Noticias casi duplicadas ---
+# La misma noticia de agencia llega publicada por varios medios con el título algo cambiado.
+# Antes del análisis se agrupan (MinHash + LSH, ver duplicados.py), se analiza un texto por grupo
+# y su resultado se copia a todas las noticias del grupo, que conservan su propia fuente y URL.
+
+def detector_duplicados():
+    """Devuelve el detector de duplicados (se crea la primera vez que se pide)."""
+    global _detector_duplicados
+    if _detector_duplicados is None or _detector_duplicados.umbral != umbral_duplicados:
+        from duplicados import DetectorDuplicados  # Import tardío: necesita numpy
+
+        _detector_duplicados = DetectorDuplicados(umbral=umbral_duplicados)
+    return _detector_duplicados
+
+
+def analizar_agrupando_duplicados(textos, analizar):
+    """Analiza con `analizar(textos)` un texto por grupo de duplicados y reparte los resultados.
+
+    Devuelve (análisis de cada texto, tamaño del grupo de cada texto).
+    """
+    if not detectar_duplicados or len(textos) < 2:
+        return analizar(textos), [1] * len(textos)
+    with metricas_analisis.medir("noticias_etapa_segundos", etapa="duplicados"):
+        representantes = detector_duplicados().agrupar(textos)
+    unicos = sorted(set(representantes))
+    duplicadas = len(textos) - len(unicos)
+    if duplicadas:
+        print(f"🧬 {duplicadas} noticias son duplicados de otras: se analizan {len(unicos)} historias distintas.")
+        metricas_analisis.incrementar("noticias_elementos_total", duplicadas, etapa="duplicados", sentido="salida",
+                                      categoria="agrupada")
+    analisis_unicos = dict(zip(unicos, analizar([textos[i] for i in unicos])))
+    tamanos = collections.Counter(representantes)
+    return [analisis_unicos[r] for r in representantes], [tamanos[r] for r in representantes]
+
+
+# --- Análisis en varios procesos ---
+# Gran parte del tiempo se va en tokenizar y post-procesar en Python, que no aprovecha más de un núcleo.
+# Con --workers N, los textos se reparten en N fragmentos consecutivos y cada proceso analiza el suyo:
+# carga sus modelos una sola vez (registro perezoso) y usa solo su parte de los hilos de torch.
+
+def _inicializar_trabajador(hilos):
+    """Limita los hilos de cada proceso para que entre todos no saturen la CPU."""
+    os.environ["OMP_NUM_THREADS"] = str(hilos)
+    os.environ["MKL_NUM_THREADS"] = str(hilos)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"  # Los tokenizers ya corren en paralelo entre procesos
+    try:
+        import torch
+
+        torch.set_num_threads(hilos)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass  # Sin torch (o con sus hilos ya fijados) no hay nada que limitar
+
+
+def _analizar_fragmento(fragmento, tamano):
+    """Tarea de cada proceso: analiza su fragmento y devuelve los resultados y sus estadísticas (caché y cascada)."""
+    cache_analisis.estadisticas = {}
+    estadisticas_cascada.clear()
+    metricas_analisis.reiniciar()
+    resultados = analizar_textos(fragmento, tamano)
+    cache_analisis.cerrar()
+    return resultados, cache_analisis.estadisticas, estadisticas_cascada, metricas_analisis.estado()
+
+
+def analizar_textos_en_paralelo(textos, tamano=tamano_lote, trabajadores=2):
+    """Igual que `analizar_textos`, pero repartiendo los textos entre varios procesos."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    trabajadores = min(trabajadores, len(textos))
+    hilos = max(1, (os.cpu_count() or 1) // trabajadores)
+    tamano_fragmento = -(-len(textos) // trabajadores)  # División redondeando hacia arriba
+    fragmentos = [textos[i:i + tamano_fragmento] for i in range(0, len(textos), tamano_fragmento)]
+    print(f"Repartiendo {len(textos)} textos en {len(fragmentos)} procesos ({hilos} hilos de torch cada uno)...")
+
+    resultados = []
+    with ProcessPoolExecutor(max_workers=len(fragmentos), initializer=_inicializar_trabajador,
+                             initargs=(hilos,)) as ejecutor:
+        # map devuelve los resultados en el orden de los fragmentos, así se conserva el orden original
+        for resultados_fragmento, estadisticas, cascada, metricas in ejecutor.map(_analizar_fragmento, fragmentos,
+                                                                                  [tamano] * len(fragmentos)):
+            resultados.extend(resultados_fragmento)
+            for modelo, contador in estadisticas.items():
+                cache_analisis._contar(modelo, contador["aciertos"], contador["fallos"])
+            for etapa, contador in cascada.items():
+                _contar_cascada(etapa, contador["ejecutadas"], contador["omitidas"])
+            metricas_analisis.fusionar(metricas)
+    return resultados
+
+
+def anadir_miniaturas(noticias_procesadas):
+    """Genera (o reutiliza) la miniatura local de cada noticia y guarda su ruta en el campo "miniatura"."""
+    if not generar_miniaturas or not noticias_procesadas:
+        return
+    print(f"🖼️ Preparando miniaturas de {len(noticias_procesadas)} noticias...")
+    rutas = cache_miniaturas.obtener_varias([n.get("imagen_url") for n in noticias_procesadas])
+    for noticia, ruta in zip(noticias_procesadas, rutas):
+        noticia["miniatura"] = ruta
+
+
+def cargar_resultados_previos(ruta=ruta_salida_filtradas):
+    """Carga las listas de una ejecución anterior de noticias_filtradas.json (o listas vacías)."""
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"🚨 No se pudieron leer los resultados previos de '{ruta}' ({e}); se empieza de cero.")
+        return {}
+
+
+def _clave_noticia(noticia_procesada):
+    """Identifica una noticia procesada por su URL (o por su título si no tiene URL)."""
+    return noticia_procesada.get("url_noticia") or noticia_procesada.get("titulo")
+
+
+def fusionar_resultados(resultados_previos, listas_nuevas, claves_reanalizadas):
+    """Añade las noticias recién analizadas a las listas previas, sustituyendo las que se re-analizaron."""
+    fusionadas = {}
+    for clave_lista in dict.fromkeys([*resultados_previos, *listas_nuevas]):
+        conservadas = [
+            n for n in resultados_previos.get(clave_lista, []) if _clave_noticia(n) not in claves_reanalizadas
+        ]
+        fusionadas[clave_lista] = conservadas + listas_nuevas.get(clave_lista, [])
+    return fusionadas
+
+
+def exportar_metricas(**extra):
+    """Escribe las métricas de la ejecución (Prometheus y resumen JSON)."""
+    for nombre, segundos in registro_modelos.tiempos_carga.items():
+        metricas_analisis.fijar("noticias_carga_modelo_segundos", segundos, modelo=nombre)
+    try:
+        metricas_analisis.exportar(ruta_metricas_prometheus, ruta_resumen_ejecucion, **extra)
+        print(f"📈 Métricas guardadas en '{ruta_metricas_prometheus}' y '{ruta_resumen_ejecucion}'")
+    except OSError as e:
+        print(f"🚨 No se pudieron guardar las métricas: {e}")
+
+
+def main(tamano=tamano_lote, reprocesar_todo=False, trabajadores=1, max_memoria_mb=None):
+    metricas_analisis.reiniciar()
+    almacen = AlmacenNoticias(ruta_almacen_noticias)
+    if os.path.exists(ruta_noticias_json):
+        with metricas_analisis.medir("noticias_archivo_segundos", archivo=os.path.basename(ruta_noticias_json), operacion="importacion"):
+            anadidas, _ = almacen.importar_json(ruta_noticias_json)
+        if anadidas:
+            print(f"📥 {anadidas} noticias nuevas importadas desde '{ruta_noticias_json}'.")
+    if reprocesar_todo:
+        almacen.reencolar_todas()
+
+    pendientes = almacen.pendientes()
+    noticias_originales = [noticia for _, noticia in pendientes]
+    metricas_analisis.incrementar("noticias_elementos_total", len(noticias_originales), etapa="pendientes", sentido="entrada", categoria="todas")
     if not noticias_originales:
-        print("No hay noticias para procesar. Saliendo.")
+        print("No hay noticias nuevas para procesar. Saliendo.")
+        almacen.cerrar()
+        exportar_metricas(noticias_pendientes=0)
         return
 
-    print(f"\n🌀 Analizando {len(noticias_originales)} noticias...\n")
+    if usar_cache:
+        # Si se cambió algún modelo en la configuración, sus resultados antiguos ya no sirven
+        purgadas = cache_analisis.purgar_modelos_obsoletos(_identidad_modelo(n) for n in registro_modelos.nombres())
+        if purgadas:
+            print(f"📦 Caché: {purgadas} resultados de modelos que ya no se usan eliminados.")
 
-    noticias_destacadas_filtradas = []
-    mejores_noticias_filtradas = []
-    peores_noticias_filtradas = []
-    # Puedes añadir más listas si necesitas otras categorizaciones directas aquí
+    print(f"\n🌀 Analizando {len(noticias_originales)} noticias pendientes ({almacen.contar()} en el almacén)...\n")
 
+    # --- Preparar los textos válidos para el análisis ---
+    noticias_validas = []
+    textos = []
     for i, noticia_original_data in enumerate(noticias_originales, 1):
-        print(f"--- Procesando noticia {i}/{len(noticias_originales)}: {noticia_original_data.get('title', 'Sin título')} ---")
-
         # El texto para análisis se suele formar del título y la descripción
-        texto_noticia = noticia_original_data.get("title", "") + ". " + noticia_original_data.get("description", "")
+        texto_noticia = texto_para_analisis(noticia_original_data)
         if not texto_noticia.strip() or texto_noticia == ". ":
-            print("Texto de noticia vacío o inválido, omitiendo.")
+            print(f"Noticia {i}/{len(noticias_originales)}: texto de noticia vacío o inválido, omitiendo.")
+            metricas_analisis.incrementar("noticias_elementos_total", etapa="preparacion", sentido="salida", categoria="texto_vacio")
             continue
+        noticias_validas.append((i, noticia_original_data))
+        textos.append(texto_noticia)
+
+    # --- Realizar todos los análisis, modelo a modelo y por lotes (o repartidos entre procesos) ---
+    metricas_analisis.incrementar("noticias_elementos_total", len(textos), etapa="analisis", sentido="entrada", categoria="todas")
+    with metricas_analisis.medir("noticias_etapa_segundos", etapa="analisis"):
+        if max_memoria_mb:
+            import ejecucion_por_etapas  # Import tardío: solo para la ejecución con presupuesto de memoria
+
+            analizar = lambda unicos: ejecucion_por_etapas.analizar_textos(unicos, tamano, max_memoria_mb)
+        elif trabajadores > 1 and len(textos) > 1:
+            analizar = lambda unicos: analizar_textos_en_paralelo(unicos, tamano, trabajadores)
+        else:
+            analizar = lambda unicos: analizar_textos(unicos, tamano)
+        analisis_por_texto, tamanos_grupo = analizar_agrupando_duplicados(textos, analizar)
+    imprimir_estadisticas_cascada()
+
+    listas_filtradas = {
+        "noticias_destacadas": [],
+        "mejores_noticias": [],
+        "peores_noticias": []
+        # Puedes añadir más listas si necesitas otras categorizaciones directas aquí
+    }
 
-        # --- Realizar todos los análisis ---
-        analisis_sentimiento = analizar_sentimiento(texto_noticia)
-        label_sentimiento = analisis_sentimiento["label"]
-        score_sentimiento = analisis_sentimiento["score"]
-        
-        # Extraer número de estrellas del sentimiento
-        try:
-            estrellas_sentimiento = int(label_sentimiento[0]) if label_sentimiento != "N/A" else 0
-        except (ValueError, TypeError, IndexError):
-            estrellas_sentimiento = 0 # Fallback si la etiqueta no es como "X stars"
-
-        # Condición para omitir si la confianza del sentimiento es muy baja
-        umbral_confianza_sentimiento = 0.3 # Ajusta este umbral si es necesario
-        if score_sentimiento < umbral_confianza_sentimiento and label_sentimiento != "N/A":
-            print(f"Sentimiento: {label_sentimiento} (confianza muy baja {score_sentimiento:.2f}), análisis poco fiable.")
-            print("Se omite clasificación final basada en sentimiento por baja confianza.\n")
-            # Podrías decidir continuar y marcarla como "Análisis no concluyente" en lugar de 'continue'
-            # Por ahora, la saltamos para las listas principales, pero podrías guardarla en otra lista.
-            # continue # Descomenta si quieres saltar completamente estas noticias
-
-        analisis_fake = analizar_fake_news(texto_noticia)
-        etiqueta_fake = analisis_fake["label"]
-        score_fake = analisis_fake["score"]
-
-        tema_principal, score_tema = analizar_tematica(texto_noticia)
-        emocion_predominante, score_emocion, detalles_completos_emocion = analizar_emocional(texto_noticia)
-        resumen_generado = resumir_texto(texto_noticia)
-
-        # --- Determinar categoría final ---
-        categoria_final_calculada = determinar_categoria(estrellas_sentimiento, etiqueta_fake)
-
-        # --- Recopilar información de la fuente y URL ---
-        fuente_data = noticia_original_data.get("source", {}) # GNews devuelve 'source' como un dict
-        nombre_fuente = fuente_data.get("name", "Fuente Desconocida")
-        url_articulo_original = noticia_original_data.get("url", "")
-        url_imagen_articulo = noticia_original_data.get("image", "") # GNews usa 'image' para la URL de la imagen
-
-        # --- Imprimir resultados para esta noticia ---
-        print(f"Título: {noticia_original_data.get('title', 'Sin título')}")
-        print(f"Sentimiento: {label_sentimiento} (Confianza: {score_sentimiento:.2f}, Estrellas: {estrellas_sentimiento})")
-        print(f"Fake News: {etiqueta_fake} (Confianza: {score_fake:.2f})")
-        print(f"Categoría Final IA: {categoria_final_calculada}")
-        print(f"Tema Principal: {tema_principal} (Confianza: {score_tema:.2f})")
-        print(f"Emoción Predominante: {emocion_predominante} (Confianza: {score_emocion:.2f})")
-        print(f"Resumen: {resumen_generado}\n")
-
-        # --- Crear el diccionario con toda la información para guardar ---
-        noticia_procesada_completa = {
-            "titulo": noticia_original_data.get("title"),
-            "descripcion_original": noticia_original_data.get("description"), # Guardamos la original
-            "url_noticia": url_articulo_original,
-            "imagen_url": url_imagen_articulo,
-            "fuente_nombre": nombre_fuente,
-            "sentimiento": label_sentimiento,
-            "confianza_sentimiento": score_sentimiento,
-            "estrellas_sentimiento": estrellas_sentimiento, # Útil tener las estrellas directamente
-            "fake_news": etiqueta_fake, # Etiqueta original del modelo (LABEL_0 o LABEL_1)
-            "confianza_fake": score_fake,
-            "categoria_final": categoria_final_calculada,
-            "tema": tema_principal,
-            "confianza_tema": score_tema,
-            "emocion": emocion_predominante,
-            "confianza_emocion": score_emocion,
-            "detalles_emocion": detalles_completos_emocion, # Lista completa de emociones y scores
-            "resumen": resumen_generado
-        }
+    for (i, noticia_original_data), analisis, tamano_grupo in zip(noticias_validas, analisis_por_texto, tamanos_grupo):
+        print(f"--- Procesando noticia {i}/{len(noticias_originales)}: {noticia_original_data.get('title', 'Sin título')} ---")
+        noticia_procesada_completa = construir_noticia_procesada(noticia_original_data, *analisis)
+        noticia_procesada_completa["fuentes_misma_noticia"] = tamano_grupo  # Medios que publicaron esta historia
+        imprimir_noticia_procesada(noticia_procesada_completa)
+        if ruta_agregados:
+            agregados_analisis.registrar(noticia_procesada_completa)  # También las descartadas: los paneles cuentan todo
 
         # --- Clasificación en las listas principales para noticias_filtradas.json ---
-        # (Puedes ajustar esta lógica según tus necesidades)
-        # Noticias destacadas: Buenas/Objetivas Y emoción neutra/calma/contenta
-        emociones_neutras_positivas = ["neutral", "calm", "content"] # Ajusta si tu modelo usa otras etiquetas
-        if categoria_final_calculada == "Buena/Objetiva" and emocion_predominante.lower() in emociones_neutras_positivas:
-            noticias_destacadas_filtradas.append(noticia_procesada_completa)
-        
-        # Mejores noticias: Buenas/Objetivas Y con alto rating de estrellas (y no necesariamente emoción neutra)
-        # Usamos 'elif' para que no se dupliquen si ya están en 'destacadas' por la emoción.
-        # Si quieres que puedan estar en ambas, quita el 'elif' y usa 'if'.
-        elif categoria_final_calculada == "Buena/Objetiva" and estrellas_sentimiento >= 4:
-            mejores_noticias_filtradas.append(noticia_procesada_completa)
-        
-        # Peores noticias: Dudosas/Falsas O con muy bajo rating de estrellas (aunque sean verdaderas)
-        elif categoria_final_calculada == "Dudosa/Falsa" or (etiqueta_fake == "LABEL_1" and estrellas_sentimiento <= 2):
-            peores_noticias_filtradas.append(noticia_procesada_completa)
-        
-        # Aquí podrías añadir más 'elif' o 'if' para otras categorías que quieras pre-filtrar en el JSON.
-
-    # --- Guardar resultado en archivo para la web ---
-    resultado_final_para_json = {
-        "noticias_destacadas": noticias_destacadas_filtradas,
-        "mejores_noticias": mejores_noticias_filtradas,
-        "peores_noticias": peores_noticias_filtradas
-        # Puedes añadir más claves aquí si creaste más listas.
+        destino = clasificar_noticia(noticia_procesada_completa)
+        metricas_analisis.incrementar("noticias_elementos_total", etapa="enrutado", sentido="salida",
+                                      categoria=destino or "descartada")
+        if destino:
+            listas_filtradas[destino].append(noticia_procesada_completa)
+
+    # Scores completos de todas las noticias (también las descartadas) para poder re-enrutar sin los modelos
+    almacen_puntuaciones.agregar([n.get("url") or n.get("title") for _, n in noticias_validas], analisis_por_texto)
+    almacen_puntuaciones.guardar()
+    if ruta_agregados:
+        with metricas_analisis.medir("noticias_etapa_segundos", etapa="agregados"):
+            agregados_analisis.guardar()
+
+    # Solo las noticias que se van a mostrar en la web necesitan miniatura
+    with metricas_analisis.medir("noticias_etapa_segundos", etapa="miniaturas"):
+        anadir_miniaturas([noticia for lista in listas_filtradas.values() for noticia in lista])
+
+    # --- Fusionar con los resultados de ejecuciones anteriores ---
+    # Las noticias re-analizadas (mismas URLs) sustituyen a su versión anterior, esté en la lista que esté
+    claves_reanalizadas = {
+        noticia.get("url") or noticia.get("title") for noticia in noticias_originales
     }
+    resultados_previos = {} if reprocesar_todo else cargar_resultados_previos()
+    resultado_final_para_json = fusionar_resultados(resultados_previos, listas_filtradas, claves_reanalizadas)
 
-    ruta_salida_filtradas = "noticias_filtradas.json"
+    # --- Guardar resultado en archivo para la web ---
+    guardado = False
     try:
-        with open(ruta_salida_filtradas, "w", encoding="utf-8") as f:
-            json.dump(resultado_final_para_json, f, ensure_ascii=False, indent=4) # indent=4 para mejor lectura
+        with metricas_analisis.medir("noticias_archivo_segundos", archivo=os.path.basename(ruta_salida_filtradas), operacion="escritura"):
+            escribir_json(ruta_salida_filtradas, resultado_final_para_json)  # A un temporal y después rename: la web nunca lo ve a medias
         print(f"✅ Análisis completado. Resultados guardados en '{ruta_salida_filtradas}'")
+        guardado = True
     except Exception as e:
+        metricas_analisis.registrar_error("escritura_resultados", e)
         print(f"🚨 Error al guardar {ruta_salida_filtradas}: {e}")
 
     # --- Llamada a la función para extraer noticias 100% objetivas (según criterios más estrictos) ---
     # Esta función ahora usará el mismo `noticia_procesada_completa` que tiene todos los campos.
-    extraer_noticias_totalmente_objetivas(todas_las_noticias_procesadas_completas=noticias_originales, #Pasa las originales para referencia
-                                         noticias_ya_analizadas=resultado_final_para_json)
+    noticias_objetivas = extraer_noticias_totalmente_objetivas(todas_las_noticias_procesadas_completas=noticias_originales, #Pasa las originales para referencia
+                                                               noticias_ya_analizadas=resultado_final_para_json)
+    if guardado:
+        publicar_resultados(resultado_final_para_json, noticias_objetivas)
+
+    # --- Actualizar la base de resultados que consulta la web (solo las noticias re-analizadas) ---
+    with metricas_analisis.medir("noticias_etapa_segundos", etapa="base_resultados"):
+        conexion_resultados = almacen_resultados.conectar(ruta_resultados)
+        if reprocesar_todo or almacen_resultados.esta_vacia(conexion_resultados):
+            almacen_resultados.reconstruir(conexion_resultados, resultado_final_para_json, es_totalmente_objetiva)
+        else:
+            almacen_resultados.actualizar(conexion_resultados, listas_filtradas, claves_reanalizadas, es_totalmente_objetiva)
+        conexion_resultados.close()
+
+    # Solo ahora que los resultados están guardados salen de la cola de pendientes
+    if guardado:
+        almacen.marcar_analizadas(id_noticia for id_noticia, _ in pendientes)
+    almacen.cerrar()
+
+    if usar_cache:
+        cache_analisis.desalojar()
+        cache_analisis.imprimir_estadisticas()
+        cache_analisis.cerrar()
+    exportar_metricas(noticias_pendientes=len(noticias_originales), trabajadores=trabajadores, guardado=guardado,
+                      max_memoria_mb=max_memoria_mb)
+
+
+# Contenido de noticias_objetivas.json cuando no hay ninguna
+MENSAJE_SIN_OBJETIVAS = {
+    "mensaje": "🕊️ Hoy no se ha encontrado ninguna noticia que cumpla todos los criterios de 'totalmente objetiva'. Seguimos filtrando para ti."
+}
+
+
+def publicar_resultados(resultado_final, noticias_objetivas):
+    """Publica una nueva versión de los resultados para la web (instantánea con manifiesto y delta)."""
+    if not directorio_instantaneas:
+        return
+    try:
+        with metricas_analisis.medir("noticias_etapa_segundos", etapa="publicacion"):
+            version = instantaneas.publicar(resultado_final, noticias_objetivas or MENSAJE_SIN_OBJETIVAS,
+                                            directorio_instantaneas)
+        print(f"📤 Versión {version} de los resultados publicada en '{directorio_instantaneas}'")
+    except OSError as e:
+        metricas_analisis.registrar_error("publicacion", e)
+        print(f"🚨 No se pudo publicar la versión de los resultados: {e}")
+
+
+def es_totalmente_objetiva(noticia_analizada):
+    """Indica si una noticia procesada cumple todos los criterios de "totalmente objetiva"."""
+    es_real = noticia_analizada.get("fake_news") == "LABEL_1"
+    es_buena_objetiva_categoria = noticia_analizada.get("categoria_final") == "Buena/Objetiva"
+    
+    # Sentimiento neutro (3 estrellas) o ligeramente positivo pero no extremo
+    # El modelo nlptown da estrellas. "3 stars" es el más neutro.
+    sentimiento_noticia = noticia_analizada.get("sentimiento", "")
+    es_sentimiento_neutro = sentimiento_noticia == sentimiento_objetivo
+    
+    # Emoción neutra
+    emocion_noticia = noticia_analizada.get("emocion", "").lower()
+    es_emocion_neutra = emocion_noticia in emociones_objetivas # Ajusta según tu modelo
+
+    # Podrías añadir un umbral de confianza para el tema si es relevante para la objetividad
+    # confianza_tema = noticia_analizada.get("confianza_tema", 0)
+    # tema_confiable = confianza_tema > 0.6 # Ejemplo
+
+    return es_real and es_buena_objetiva_categoria and es_sentimiento_neutro and es_emocion_neutra
 
 
 def extraer_noticias_totalmente_objetivas(todas_las_noticias_procesadas_completas, noticias_ya_analizadas):
@@ -338,48 +1127,57 @@ def extraer_noticias_totalmente_objetivas(todas_las_noticias_procesadas_completa
 
 
     for noticia_analizada in candidatas_unicas:
-        # Condiciones para ser "totalmente objetiva":
-        es_real = noticia_analizada.get("fake_news") == "LABEL_1"
-        es_buena_objetiva_categoria = noticia_analizada.get("categoria_final") == "Buena/Objetiva"
-        
-        # Sentimiento neutro (3 estrellas) o ligeramente positivo pero no extremo
-        # El modelo nlptown da estrellas. "3 stars" es el más neutro.
-        sentimiento_noticia = noticia_analizada.get("sentimiento", "")
-        es_sentimiento_neutro = sentimiento_noticia == "3 stars"
-        
-        # Emoción neutra
-        emocion_noticia = noticia_analizada.get("emocion", "").lower()
-        es_emocion_neutra = emocion_noticia in ["neutral", "calm"] # Ajusta según tu modelo
-
-        # Podrías añadir un umbral de confianza para el tema si es relevante para la objetividad
-        # confianza_tema = noticia_analizada.get("confianza_tema", 0)
-        # tema_confiable = confianza_tema > 0.6 # Ejemplo
-
-        if es_real and es_buena_objetiva_categoria and es_sentimiento_neutro and es_emocion_neutra:
+        if es_totalmente_objetiva(noticia_analizada):
             noticias_objetivas_extraidas.append(noticia_analizada)
 
     ruta_salida_objetivas = "noticias_objetivas.json"
     if noticias_objetivas_extraidas:
         try:
-            with open(ruta_salida_objetivas, "w", encoding="utf-8") as f:
-                json.dump(noticias_objetivas_extraidas, f, ensure_ascii=False, indent=4)
+            escribir_json(ruta_salida_objetivas, noticias_objetivas_extraidas)
             print(f"✅ Se han guardado {len(noticias_objetivas_extraidas)} noticias totalmente objetivas en '{ruta_salida_objetivas}'")
         except Exception as e:
             print(f"🚨 Error al guardar {ruta_salida_objetivas}: {e}")
     else:
-        mensaje_no_objetivas = {
-            "mensaje": "🕊️ Hoy no se ha encontrado ninguna noticia que cumpla todos los criterios de 'totalmente objetiva'. Seguimos filtrando para ti."
-        }
         try:
-            with open(ruta_salida_objetivas, "w", encoding="utf-8") as f:
-                json.dump(mensaje_no_objetivas, f, ensure_ascii=False, indent=4)
+            escribir_json(ruta_salida_objetivas, MENSAJE_SIN_OBJETIVAS)
             print(f"🕊️ No se encontraron noticias totalmente objetivas. Mensaje guardado en '{ruta_salida_objetivas}'.")
         except Exception as e:
             print(f"🚨 Error al guardar mensaje en {ruta_salida_objetivas}: {e}")
 
+    return noticias_objetivas_extraidas
+
 
 if __name__ == "__main__":
-    main()
+    # Los módulos que hacen `import analizar_filtrar` (p. ej. ejecucion_por_etapas) deben ver este mismo
+    # módulo, con su configuración, su registro de modelos y sus métricas, y no cargar una segunda copia
+    sys.modules.setdefault("analizar_filtrar", sys.modules[__name__])
+    parser = argparse.ArgumentParser(description="Analiza con IA las noticias pendientes y actualiza noticias_filtradas.json.")
+    parser.add_argument("--tamano-lote", type=int, default=tamano_lote, help="Textos por pasada de cada modelo.")
+    parser.add_argument("--reprocesar-todo", action="store_true",
+                        help="Vuelve a analizar todo el histórico en lugar de solo las noticias nuevas.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Número de procesos que analizan noticias en paralelo (cada uno carga sus modelos).")
+    parser.add_argument("--perfil", choices=["cprofile", "torch"], default=None,
+                        help="Perfila esta ejecución y guarda el resultado en perfil_analisis.prof/.json.")
+    parser.add_argument("--sin-servidor", action="store_true",
+                        help="No usa el servidor de inferencia aunque esté arrancado (carga los modelos aquí).")
+    parser.add_argument("--max-memory", default=None,
+                        help="Presupuesto de memoria (p. ej. 2GB): analiza etapa a etapa con un solo modelo cargado a la vez.")
+    argumentos = parser.parse_args()
+    if argumentos.sin_servidor:
+        usar_servidor_inferencia = False
+    max_memoria_mb = None
+    if argumentos.max_memory:
+        from ejecucion_por_etapas import parsear_memoria
+
+        max_memoria_mb = parsear_memoria(argumentos.max_memory)
+        usar_servidor_inferencia = False  # El presupuesto es para los modelos de este proceso
+        if argumentos.workers > 1:
+            print("⚠️ Con --max-memory el análisis se hace en un solo proceso; se ignora --workers.")
+            argumentos.workers = 1
+    with perfilar(argumentos.perfil):
+        main(tamano=argumentos.tamano_lote, reprocesar_todo=argumentos.reprocesar_todo, trabajadores=argumentos.workers,
+             max_memoria_mb=max_memoria_mb)
     # La llamada a `extraer_noticias_totalmente_objetivas` ahora está dentro de `main`
     # para asegurar que se ejecuta después de que `resultado_final_para_json` esté listo.
     # O, si prefieres, la puedes llamar después de main() como antes,
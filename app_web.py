@@ -1,6 +1,14 @@
 import json
+import os
+import time
+
 import streamlit as st
 
+import agregados
+import consultas_noticias
+import indice_busqueda
+import instantaneas
+
 # Traducciones de emociones (puedes expandir esto)
 emociones_traducidas = {
     "neutral": "Neutral",
@@ -14,14 +22,27 @@ emociones_traducidas = {
     # Añade más si tu modelo de emoción devuelve otras etiquetas
 }
 
+def version_archivo(ruta):
+    """Versión de un archivo (su fecha de modificación en ns), o None si no existe."""
+    try:
+        return os.stat(ruta).st_mtime_ns
+    except OSError:
+        return None
+
+# Streamlit vuelve a ejecutar todo el script en cada interacción: el JSON solo se vuelve a leer
+# de disco cuando cambia su versión (fecha de modificación), que forma parte de la clave de la caché.
+@st.cache_data(show_spinner=False, max_entries=4)
+def leer_json_cacheado(ruta, version):
+    """Lee un archivo JSON; el resultado se reutiliza mientras no cambie `version`."""
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
 def cargar_datos(ruta="noticias_filtradas.json"):
     """Carga los datos de noticias filtradas desde un archivo JSON."""
     try:
-        with open(ruta, "r", encoding="utf-8") as f:
-            datos = json.load(f)
         # El JSON tiene claves como "noticias_destacadas", "mejores_noticias", etc.
         # Devolvemos el diccionario completo para que la app web pueda acceder a las secciones
-        return datos
+        return leer_json_cacheado(ruta, version_archivo(ruta))
     except FileNotFoundError:
         st.error(f"Error: El archivo {ruta} no fue encontrado. Asegúrate de ejecutar primero el script de análisis.")
         return {} # Devuelve un diccionario vacío para evitar más errores
@@ -32,6 +53,13 @@ def cargar_datos(ruta="noticias_filtradas.json"):
         st.error(f"Error inesperado al cargar noticias: {e}")
         return {}
 
+# Cómo se obtuvo el resumen de cada noticia (campo "tipo_resumen" de analizar_filtrar.py)
+tipos_resumen = {
+    "abstractivo": "🤖 Resumen generado por IA",
+    "extractivo": "✂️ Resumen extractivo (frases clave de la noticia)",
+    "original": "📝 Texto original (demasiado corto para resumir)",
+}
+
 def formatear_fake_news(label_fake_news):
     """Formatea la etiqueta de fake news para mostrarla de forma amigable."""
     if label_fake_news == "LABEL_1": # Asumiendo que LABEL_1 es REAL
@@ -52,8 +80,9 @@ def mostrar_noticia_card(noticia, index):
     col1, col2 = st.columns([1, 3]) # Proporción de las columnas
 
     with col1:
-        if noticia.get("imagen_url"):
-            st.image(noticia["imagen_url"], use_container_width=True)
+        # Miniatura local generada durante el análisis (la imagen original del medio puede ser enorme o lenta)
+        if noticia.get("miniatura") and os.path.exists(noticia["miniatura"]):
+            st.image(noticia["miniatura"], use_container_width=True)
         else:
             st.caption("Sin imagen disponible") # Placeholder si no hay imagen
 
@@ -67,8 +96,12 @@ def mostrar_noticia_card(noticia, index):
         st.caption(f"Fuente: {noticia.get('fuente_nombre', 'N/A')}") # Necesitarías añadir 'fuente_nombre' a noticias_filtradas.json
                                                                     # o extraerlo del campo 'descripcion' si está ahí.
                                                                     # GNews lo da en source.name en el JSON original.
+        if noticia.get("fuentes_misma_noticia", 1) > 1: # Misma historia publicada por varios medios (analizar_filtrar.py)
+            st.caption(f"📡 Publicada por {noticia['fuentes_misma_noticia']} medios")
 
         st.markdown(f"_{noticia.get('resumen', 'Sin resumen disponible.')}_")
+        if noticia.get("tipo_resumen") in tipos_resumen:
+            st.caption(tipos_resumen[noticia["tipo_resumen"]])
 
         # Detalles del análisis
         sentimiento_str = noticia.get('sentimiento', 'N/A')
@@ -98,99 +131,286 @@ def mostrar_noticia_card(noticia, index):
         #     st.json(noticia.get("detalles_emocion", {}))
 
 
-def mostrar_seccion_noticias(titulo_seccion, lista_noticias):
-    """Muestra una sección completa de noticias."""
+# Noticias por página de cada sección: solo se pintan las tarjetas visibles, y "Cargar más" añade otra página
+noticias_por_pagina = 10
+
+def paginas_visibles(seccion):
+    """Número de páginas que el usuario ha pedido ver en la sección."""
+    return st.session_state.get(f"paginas_{seccion}", 1)
+
+def noticias_visibles(seccion):
+    """Número de noticias que el usuario ha pedido ver en la sección."""
+    return paginas_visibles(seccion) * noticias_por_pagina
+
+def _cargar_mas(seccion):
+    st.session_state[f"paginas_{seccion}"] = paginas_visibles(seccion) + 1
+
+def mostrar_seccion_noticias(titulo_seccion, lista_noticias, total=None, seccion=None):
+    """Muestra una sección de noticias. Si hay más de las visibles (`total`), ofrece cargar más."""
     st.header(titulo_seccion)
     if lista_noticias:
-        # st.write(f"Encontradas: {len(lista_noticias)} noticias") # Opcional: contador
+        total = len(lista_noticias) if total is None else total
+        st.caption(f"Mostrando {len(lista_noticias)} de {total} noticias.")
         for i, noticia in enumerate(lista_noticias):
             mostrar_noticia_card(noticia, i)
+        if seccion and total > len(lista_noticias):
+            st.button("⬇️ Cargar más", key=f"mas_{seccion}", on_click=_cargar_mas, args=(seccion,))
     else:
         st.info("🕊️ No hay noticias para mostrar en esta sección en este momento.")
     st.markdown("---")
 
 
-def app():
-    st.set_page_config(page_title="NotiAnalyst AI", layout="wide", page_icon="📢")
+def cargar_noticias_objetivas(ruta="noticias_objetivas.json"):
+    """Carga la lista de noticias totalmente objetivas (vacía si el archivo solo tiene un mensaje)."""
+    try:
+        contenido_objetivas = leer_json_cacheado(ruta, version_archivo(ruta))
+        if isinstance(contenido_objetivas, dict) and "mensaje" in contenido_objetivas:
+            return [] # Si es un mensaje, no hay noticias
+        return contenido_objetivas # Asume que es una lista de noticias
+    except Exception: #FileNotFoundError, json.JSONDecodeError
+        return []
 
-    st.title("📢 NotiAnalyst AI - Análisis y Filtrado Inteligente")
-    st.markdown("""
-    *Bienvenido a NotiAnalyst AI, tu fuente de noticias analizadas con inteligencia artificial.
-    Explora las noticias clasificadas por sentimiento, veracidad, tema y emoción.*
-    """)
 
-    # Cargar los datos estructurados
-    datos_noticias = cargar_datos() # Carga el JSON con las diferentes secciones
+def calcular_secciones_desde_json(datos_noticias, noticias_totalmente_objetivas, emocion_a_filtrar):
+    """Construye las listas de cada sección a partir de los JSON (cuando no hay base de resultados)."""
+    # Creamos listas para otras categorías basadas en todas las noticias procesadas
+    # si no están directamente en 'noticias_filtradas.json' de la forma que quieres
+    todas_las_noticias_procesadas = []
+    for key in datos_noticias:
+        todas_las_noticias_procesadas.extend(datos_noticias[key])
 
-    if not datos_noticias:
-        st.warning("No se pudieron cargar los datos de las noticias. Por favor, ejecuta el script de análisis (`analizar_filtrar.py`) primero.")
-        return
+    return {
+        # Sección de "Noticias 100% Objetivas" (del archivo noticias_objetivas.json)
+        "objetivas": noticias_totalmente_objetivas,
+        "destacadas": datos_noticias.get("noticias_destacadas", []),
+        "mejores": datos_noticias.get("mejores_noticias", []),
+        "subjetivas_verdaderas": [
+            n for n in todas_las_noticias_procesadas
+            if n.get("fake_news") == "LABEL_1" and n.get("categoria_final") == "Subjetiva pero verdadera"
+        ],
+        "dudosas": [
+            n for n in todas_las_noticias_procesadas
+            if n.get("categoria_final") == "Dudosa/Falsa" or n.get("fake_news") == "LABEL_0"
+        ],
+        "emocion_verdaderas": [
+            n for n in todas_las_noticias_procesadas
+            if n.get("emocion", "").lower() == emocion_a_filtrar and n.get("fake_news") == "LABEL_1" # Solo verdaderas con esa emocion
+        ],
+    }
+
+
+# Las secciones se calculan una sola vez por versión de los datos; los argumentos con "_" no
+# forman parte de la clave de la caché (Streamlit no los "hashea"), solo las versiones y la emoción.
+@st.cache_data(show_spinner=False, max_entries=8)
+def calcular_secciones_cacheadas(versiones, emocion_a_filtrar, _datos_noticias, _noticias_totalmente_objetivas):
+    """Versión cacheada de `calcular_secciones_desde_json` para unas versiones concretas de los JSON."""
+    return calcular_secciones_desde_json(_datos_noticias, _noticias_totalmente_objetivas, emocion_a_filtrar)
+
+
+# Copia en memoria de la última versión publicada por el análisis, compartida por todas las sesiones:
+# en cada recarga solo se mira el manifiesto, y cuando hay una versión nueva se aplican sus deltas.
+@st.cache_resource(show_spinner=False)
+def lector_instantaneas():
+    return instantaneas.LectorInstantaneas()
+
+
+def mostrar_secciones_calculadas(secciones, listas):
+    """Muestra cada sección a partir de sus listas completas (solo las noticias visibles)."""
+    for titulo_seccion, seccion, _ in secciones:
+        lista_noticias = listas[seccion]
+        mostrar_seccion_noticias(titulo_seccion, lista_noticias[:noticias_visibles(seccion)], len(lista_noticias), seccion)
+
+
+# El índice de búsqueda se construye una sola vez por versión de los datos y lo comparten todas las sesiones
+@st.cache_resource(show_spinner="🔎 Preparando el índice de búsqueda...", max_entries=2)
+def indice_cacheado(version, _cargar_noticias):
+    """Índice de facetas y texto completo de una versión de los datos."""
+    return indice_busqueda.IndiceNoticias(_cargar_noticias())
+
+
+# Facetas de la barra lateral: campo de la noticia -> título del filtro
+facetas_barra_lateral = {
+    "tema": "Tema",
+    "emocion": "Emoción",
+    "categoria_final": "Categoría",
+    "fake_news": "Veracidad",
+    "fuente_nombre": "Fuente",
+}
 
-    # Definir las secciones que quieres mostrar y qué datos usar
-    # Estas claves deben coincidir con las que usaste en `analizar_filtrar.py` al guardar `resultado_final`
-    # y con las que se usan en `extraer_noticias_objetivas.py` (si decides integrar ese archivo)
-    
-    # Para las noticias objetivas, cargamos el archivo 'noticias_objetivas.json'
+def formatear_valor_faceta(campo, valor):
+    if not valor:
+        return "(sin dato)"
+    if campo == "fake_news":
+        return formatear_fake_news(valor)
+    if campo == "emocion":
+        return traducir_emocion(valor)
+    return valor
+
+def barra_busqueda(indice):
+    """Buscador y filtros por faceta (con sus recuentos) en la barra lateral. Devuelve (consulta, filtros)."""
+    st.sidebar.header("🔎 Buscar y filtrar")
+    consulta = st.sidebar.text_input("Buscar en título, descripción y resumen", key="consulta")
+    # Los recuentos usan la selección que ya está en session_state (la de la interacción que provocó esta recarga)
+    filtros = {campo: st.session_state.get(f"faceta_{campo}", []) for campo in facetas_barra_lateral}
+    recuentos = indice.facetas(consulta, filtros)
+    for campo, titulo in facetas_barra_lateral.items():
+        cuentas = dict(recuentos[campo])
+        opciones = [valor for valor, n in recuentos[campo] if n or valor in filtros[campo]]
+        filtros[campo] = st.sidebar.multiselect(
+            titulo, opciones, key=f"faceta_{campo}",
+            format_func=lambda valor, campo=campo, cuentas=cuentas: f"{formatear_valor_faceta(campo, valor)} ({cuentas.get(valor, 0)})")
+    return consulta, filtros
+
+
+# Los paneles solo leen los agregados (recuentos por fuente, tema y día que mantiene el análisis), nunca
+# las noticias: cuestan lo mismo con mil noticias que con millones
+@st.cache_data(show_spinner=False, max_entries=4)
+def agregados_cacheados(version):
+    """Agregados de todo el histórico por fuente y por tema, serie diaria y totales, cacheados por versión."""
+    base = agregados.Agregados()
     try:
-        with open("noticias_objetivas.json", "r", encoding="utf-8") as f:
-            contenido_objetivas = json.load(f)
-            if isinstance(contenido_objetivas, dict) and "mensaje" in contenido_objetivas:
-                noticias_totalmente_objetivas = [] # Si es un mensaje, no hay noticias
-            else:
-                noticias_totalmente_objetivas = contenido_objetivas # Asume que es una lista de noticias
-    except Exception: #FileNotFoundError, json.JSONDecodeError
-        noticias_totalmente_objetivas = []
-
+        return base.por_valor("fuente"), base.por_valor("tema"), base.por_dia(), base.por_valor("total").get("", {})
+    finally:
+        base.cerrar()
+
+def porcentaje_falsas(medidas):
+    """Porcentaje de noticias falsas entre las que tienen veredicto (None si no hay ninguna)."""
+    con_veredicto = medidas.get("falsas", 0) + medidas.get("reales", 0)
+    return 100 * medidas.get("falsas", 0) / con_veredicto if con_veredicto else None
+
+def mostrar_panel_tendencias(max_fuentes=15, max_dias=90):
+    """Gráficos de fake news por fuente, emociones por tema y estrellas medias por día."""
+    import pandas as pd  # Viene con streamlit
+
+    base = agregados.Agregados()
+    version = base.version()
+    base.cerrar()
+    por_fuente, por_tema, por_dia, total = agregados_cacheados(version)
+    if not total:
+        return
+    with st.expander("📊 Panel de tendencias", expanded=False):
+        columnas = st.columns(3)
+        columnas[0].metric("Noticias analizadas", total["noticias"])
+        falsas = porcentaje_falsas(total)
+        columnas[1].metric("Posiblemente falsas", "—" if falsas is None else f"{falsas:.1f}%")
+        columnas[2].metric("Estrellas medias", f"{total['suma_estrellas'] / total['con_estrellas']:.2f}" if total.get("con_estrellas") else "—")
+
+        st.subheader(f"🚨 Noticias posiblemente falsas por fuente (las {max_fuentes} con más noticias)")
+        fuentes = sorted(por_fuente.items(), key=lambda par: -par[1].get("noticias", 0))[:max_fuentes]
+        porcentajes = {fuente: porcentaje_falsas(medidas) for fuente, medidas in fuentes}
+        st.bar_chart(pd.Series({f: p for f, p in porcentajes.items() if p is not None}, name="% falsas", dtype=float))
+
+        st.subheader("🎭 Emociones por tema (%)")
+        emociones = pd.DataFrame({
+            tema: {traducir_emocion(medida.split(":", 1)[1]): n for medida, n in medidas.items() if medida.startswith("emocion:")}
+            for tema, medidas in por_tema.items() if tema != "N/A"  # Sin tema: descartadas antes de clasificarlas (cascada)
+        }).T.fillna(0)
+        if not emociones.empty:
+            st.bar_chart(100 * emociones.div(emociones.sum(axis=1), axis=0))
+
+        st.subheader(f"⭐ Estrellas medias por día (últimos {max_dias} días con noticias)")
+        medias = {dia: medidas["suma_estrellas"] / medidas["con_estrellas"]
+                  for dia, medidas in list(por_dia.items())[-max_dias:] if medidas.get("con_estrellas")}
+        st.line_chart(pd.Series(medias, name="Estrellas medias", dtype=float))
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def consultar_pagina_cacheada(version_datos, seccion, parametro, cursor):
+    """Una página de una sección de la base de resultados y el cursor de la siguiente, cacheadas por versión de los datos."""
+    conexion = consultas_noticias.abrir()
+    try:
+        return consultas_noticias.consultar_seccion(conexion, seccion, noticias_por_pagina, cursor, parametro)
+    finally:
+        conexion.close()
 
-    # Ejemplo de secciones (ajusta según las claves de tu JSON 'noticias_filtradas.json')
-    # y cómo las quieres presentar.
-    # Tu 'noticias_filtradas.json' tiene: "noticias_destacadas", "mejores_noticias", "peores_noticias"
 
-    # Sección de "Noticias 100% Objetivas" (del archivo noticias_objetivas.json)
-    mostrar_seccion_noticias("🎯 Noticias Verificadas como Objetivas", noticias_totalmente_objetivas)
+@st.cache_data(show_spinner=False, max_entries=64)
+def contar_seccion_cacheada(version_datos, seccion, parametro):
+    conexion = consultas_noticias.abrir()
+    try:
+        return consultas_noticias.contar_seccion(conexion, seccion, parametro)
+    finally:
+        conexion.close()
 
-    # Sección "Destacadas" (Buenas y Objetivas con emoción neutra)
-    mostrar_seccion_noticias("🌟 Noticias Destacadas (Buenas, Objetivas y Neutras)", datos_noticias.get("noticias_destacadas", []))
 
-    # Sección "Mejores Noticias" (Buenas y Objetivas con >= 4 estrellas)
-    # Para evitar duplicados con "Destacadas", podrías filtrarlas si hay solapamiento.
-    # Por ahora, las mostramos tal cual vienen del JSON.
-    mostrar_seccion_noticias("👍 Mejores Noticias (Buenas y Objetivas, rating alto)", datos_noticias.get("mejores_noticias", []))
+def consultar_seccion_cacheada(version_datos, seccion, paginas, parametro):
+    """Las `paginas` primeras páginas y el total de una sección. "Cargar más" solo consulta la página nueva."""
+    lista_noticias, cursor = [], None
+    for _ in range(paginas):
+        pagina, cursor = consultar_pagina_cacheada(version_datos, seccion, parametro, cursor)
+        lista_noticias.extend(pagina)
+        if cursor is None:
+            break
+    return lista_noticias, contar_seccion_cacheada(version_datos, seccion, parametro)
 
-    # Creamos listas para otras categorías basadas en todas las noticias procesadas
-    # si no están directamente en 'noticias_filtradas.json' de la forma que quieres
-    todas_las_noticias_procesadas = []
-    for key in datos_noticias:
-        todas_las_noticias_procesadas.extend(datos_noticias[key])
-    
-    # Eliminar duplicados si una noticia puede estar en múltiples listas originales de `datos_noticias`
-    # Esto se puede hacer guardando los títulos o URLs ya mostrados y saltándolos.
-    # O, mejor, hacer que las listas en `noticias_filtradas.json` sean exclusivas si es el objetivo.
-
-    noticias_subjetivas_verdaderas = [
-        n for n in todas_las_noticias_procesadas
-        if n.get("fake_news") == "LABEL_1" and n.get("categoria_final") == "Subjetiva pero verdadera"
-    ]
-    mostrar_seccion_noticias("🧐 Noticias Subjetivas pero Verdaderas", noticias_subjetivas_verdaderas)
 
+def app():
+    st.set_page_config(page_title="NotiAnalyst AI", layout="wide", page_icon="📢")
 
-    noticias_dudosas_o_falsas = [
-        n for n in todas_las_noticias_procesadas
-        if n.get("categoria_final") == "Dudosa/Falsa" or n.get("fake_news") == "LABEL_0"
-    ]
-    mostrar_seccion_noticias("🚨 Noticias Dudosas o Posiblemente Falsas", noticias_dudosas_o_falsas)
-    
-    # Ejemplo de sección por emoción (puedes crear más o hacer esto dinámico con un selector)
-    emocion_a_filtrar = "anger" # Puedes cambiar esto o hacerlo un input del usuario
-    noticias_con_emocion_especifica = [
-        n for n in todas_las_noticias_procesadas
-        if n.get("emocion", "").lower() == emocion_a_filtrar and n.get("fake_news") == "LABEL_1" # Solo verdaderas con esa emocion
+    st.title("📢 NotiAnalyst AI - Análisis y Filtrado Inteligente")
+    st.markdown("""
+    *Bienvenido a NotiAnalyst AI, tu fuente de noticias analizadas con inteligencia artificial.
+    Explora las noticias clasificadas por sentimiento, veracidad, tema y emoción.*
+    """)
+    if agregados.hay_agregados():
+        mostrar_panel_tendencias()
+
+    # Emoción de la sección de noticias verdaderas con una emoción concreta
+    emocion_a_filtrar = st.sidebar.selectbox("Emoción de la sección por emoción", list(emociones_traducidas),
+                                             index=list(emociones_traducidas).index("anger"), format_func=traducir_emocion)
+
+    # Secciones a mostrar: (título, clave de la sección, parámetro de la consulta)
+    # Las claves son las de `consultas_noticias.SECCIONES`.
+    secciones = [
+        ("🎯 Noticias Verificadas como Objetivas", "objetivas", None),
+        # Sección "Destacadas" (Buenas y Objetivas con emoción neutra)
+        ("🌟 Noticias Destacadas (Buenas, Objetivas y Neutras)", "destacadas", None),
+        # Sección "Mejores Noticias" (Buenas y Objetivas con >= 4 estrellas)
+        ("👍 Mejores Noticias (Buenas y Objetivas, rating alto)", "mejores", None),
+        ("🧐 Noticias Subjetivas pero Verdaderas", "subjetivas_verdaderas", None),
+        ("🚨 Noticias Dudosas o Posiblemente Falsas", "dudosas", None),
+        (f"😠 Noticias (Verdaderas) con Emoción de {traducir_emocion(emocion_a_filtrar)}", "emocion_verdaderas", emocion_a_filtrar),
     ]
-    mostrar_seccion_noticias(f"😠 Noticias (Verdaderas) con Emoción de {traducir_emocion(emocion_a_filtrar)}", noticias_con_emocion_especifica)
+
+    # --- Datos de la versión actual: base de resultados, versiones publicadas o los JSON ---
+    if consultas_noticias.hay_base():
+        # Con la base de resultados, cada sección es una consulta indexada que trae solo las noticias visibles
+        conexion = consultas_noticias.abrir()
+        version_datos = consultas_noticias.version_datos(conexion)
+        conexion.close()
+        version_indice, listas, cargar_todas = ("base", version_datos), None, consultas_noticias.todas_las_noticias
+    else:
+        if instantaneas.hay_instantaneas():
+            # Versiones publicadas por el análisis: nunca se lee un archivo a medio escribir
+            version, datos_noticias, noticias_objetivas = lector_instantaneas().actual()
+            versiones = ("instantanea", version)
+        else:
+            # Sin base de resultados (p. ej. en el despliegue con solo los JSON), se leen los archivos completos
+            datos_noticias = cargar_datos() # Carga el JSON con las diferentes secciones
+            if not datos_noticias:
+                st.warning("No se pudieron cargar los datos de las noticias. Por favor, ejecuta el script de análisis (`analizar_filtrar.py`) primero.")
+                return
+            versiones = (version_archivo("noticias_filtradas.json"), version_archivo("noticias_objetivas.json"))
+            noticias_objetivas = cargar_noticias_objetivas()
+        listas = calcular_secciones_cacheadas(versiones, emocion_a_filtrar, datos_noticias, noticias_objetivas)
+        version_indice = versiones
+        cargar_todas = lambda: [noticia for lista in datos_noticias.values() for noticia in lista]
+
+    indice = indice_cacheado(version_indice, cargar_todas)
+    consulta, filtros = barra_busqueda(indice)
+    if consulta.strip() or any(filtros.values()):
+        inicio = time.perf_counter()
+        lista_noticias, total = indice.buscar(consulta, filtros, limite=noticias_visibles("busqueda"))
+        st.sidebar.caption(f"{total} noticias encontradas en {1000 * (time.perf_counter() - inicio):.1f} ms")
+        mostrar_seccion_noticias("🔎 Resultados de la búsqueda", lista_noticias, total, "busqueda")
+    elif listas is None:
+        for titulo_seccion, seccion, parametro in secciones:
+            lista_noticias, total = consultar_seccion_cacheada(version_datos, seccion, paginas_visibles(seccion), parametro)
+            mostrar_seccion_noticias(titulo_seccion, lista_noticias, total, seccion)
+    else:
+        mostrar_secciones_calculadas(secciones, listas)
 
     st.sidebar.info("Proyecto de IA para análisis de noticias. Creado con Streamlit y Transformers.")
-    # Podrías añadir filtros en la sidebar:
-    # st.sidebar.multiselect("Filtrar por Tema:", ["salud", "tecnología", ...])
 
 
 if __name__ == "__main__":
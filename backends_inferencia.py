@@ -0,0 +1,189 @@
+import argparse
+import os
+import re
+import shutil
+import time
+
+# Backends de inferencia para los pipelines de Hugging Face.
+#   - "eager": PyTorch normal (el comportamiento de siempre).
+#   - "int8":  PyTorch con las capas Linear cuantizadas dinámicamente a int8 (más rápido y ligero en CPU).
+#   - "onnx":  grafo exportado a ONNX y ejecutado con ONNX Runtime (requiere `optimum[onnxruntime]`).
+# Los modelos convertidos se guardan una vez en `directorio_artefactos` (una carpeta por modelo, revisión y
+# backend) y se reutilizan después. Cada exportación se escribe en una carpeta temporal que se renombra
+# al terminar, así que una carpeta de artefacto siempre está completa.
+# Uso:
+#   python backends_inferencia.py exportar --backend onnx [--modelos sentimiento emocional]
+#   python backends_inferencia.py comprobar --backend int8 [--archivo noticias.json]
+
+BACKENDS = ("eager", "int8", "onnx")
+DIRECTORIO_ARTEFACTOS = "modelos_convertidos"
+
+# Clase de optimum.onnxruntime que corresponde a cada tarea de pipeline
+CLASES_ONNX = {
+    "text-classification": "ORTModelForSequenceClassification",
+    "zero-shot-classification": "ORTModelForSequenceClassification",
+    "summarization": "ORTModelForSeq2SeqLM",
+    "feature-extraction": "ORTModelForFeatureExtraction",
+}
+
+
+def ruta_artefacto(modelo, backend, directorio=DIRECTORIO_ARTEFACTOS, revision=None):
+    """Carpeta donde se guarda el modelo convertido a un backend (la revisión fijada forma parte del nombre)."""
+    nombre = re.sub(r"[^\w.-]", "_", f"{modelo}-{revision or 'main'}")
+    return os.path.join(directorio, f"{nombre}-{backend}")
+
+
+def _clase_onnx(tarea):
+    import optimum.onnxruntime  # Import tardío: solo hace falta con el backend "onnx"
+
+    return getattr(optimum.onnxruntime, CLASES_ONNX[tarea])
+
+
+def exportar(tarea, modelo, backend, directorio=DIRECTORIO_ARTEFACTOS, revision=None):
+    """Convierte el modelo al backend y guarda el resultado en disco. Devuelve la carpeta del artefacto."""
+    from transformers import AutoTokenizer
+
+    if backend not in ("onnx", "int8"):
+        raise ValueError(f"El backend '{backend}' no necesita exportación.")
+    destino = ruta_artefacto(modelo, backend, directorio, revision)
+    temporal = f"{destino}.{os.getpid()}.tmp"
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    try:
+        if backend == "onnx":
+            modelo_onnx = _clase_onnx(tarea).from_pretrained(modelo, export=True, revision=revision)
+            modelo_onnx.save_pretrained(temporal)
+        else:
+            import torch
+            from transformers import pipeline
+
+            modelo_torch = pipeline(tarea, model=modelo, revision=revision, device=-1).model
+            cuantizado = torch.quantization.quantize_dynamic(modelo_torch, {torch.nn.Linear}, dtype=torch.qint8)
+            # La cuantización dinámica no se puede guardar con save_pretrained: se guarda el módulo completo
+            torch.save(cuantizado, os.path.join(temporal, "modelo_int8.pt"))
+        AutoTokenizer.from_pretrained(modelo, revision=revision).save_pretrained(temporal)
+        # Solo ahora aparece la carpeta definitiva: una exportación interrumpida no deja un artefacto a medias
+        try:
+            os.replace(temporal, destino)
+        except OSError:
+            if not os.path.isdir(destino):
+                raise
+            # Ya había un artefacto completo (otro proceso terminó antes la misma exportación): se conserva
+    finally:
+        shutil.rmtree(temporal, ignore_errors=True)
+    return destino
+
+
+def construir_pipeline(tarea, model, backend="eager", directorio_artefactos=DIRECTORIO_ARTEFACTOS, paquete=None, **opciones):
+    """Construye el pipeline con el backend indicado, exportando el modelo la primera vez si hace falta.
+
+    Con backend "eager", si el modelo está en el paquete local `paquete` (ver paquete_modelos.py),
+    se carga de ahí sin red.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconocido '{backend}'. Opciones: {', '.join(BACKENDS)}")
+    if backend == "eager" and paquete:
+        import paquete_modelos
+
+        if paquete_modelos.entrada_paquete(model, opciones.get("revision"), paquete):
+            return paquete_modelos.cargar_pipeline(tarea, model, paquete, **opciones)
+
+    from transformers import pipeline
+
+    if backend == "eager":
+        return pipeline(tarea, model=model, **opciones)
+
+    artefacto = ruta_artefacto(model, backend, directorio_artefactos, opciones.get("revision"))
+    if not os.path.isdir(artefacto):
+        print(f"🔧 Convirtiendo '{model}' a {backend} (solo la primera vez)...")
+        exportar(tarea, model, backend, directorio_artefactos, opciones.get("revision"))
+    opciones.pop("revision", None)  # El artefacto ya se exportó desde la revisión indicada
+    if backend == "onnx":
+        opciones.pop("device", None)  # ONNX Runtime usa su propio proveedor de ejecución (CPU por defecto)
+        modelo_cargado = _clase_onnx(tarea).from_pretrained(artefacto)
+    else:
+        import torch
+
+        modelo_cargado = torch.load(os.path.join(artefacto, "modelo_int8.pt"), weights_only=False)
+        modelo_cargado.eval()
+    return pipeline(tarea, model=modelo_cargado, tokenizer=artefacto, **opciones)
+
+
+def _resumir_salida(tarea, salida):
+    """Reduce la salida de un pipeline a (etiqueta principal, score principal, scores por etiqueta)."""
+    if tarea == "zero-shot-classification":
+        return salida["labels"][0], salida["scores"][0], dict(zip(salida["labels"], salida["scores"]))
+    if tarea == "summarization":
+        return salida[0]["summary_text"], 0.0, {}  # "Etiqueta" = el resumen: el acuerdo es la tasa de resúmenes idénticos
+    if tarea == "feature-extraction":
+        import numpy as np
+
+        vector = np.asarray(salida, dtype="float32").reshape(-1, np.shape(salida)[-1]).mean(axis=0)
+        return None, 0.0, dict(enumerate(vector.tolist()))  # Sin etiqueta: solo cuenta la deriva por dimensión
+    if salida and isinstance(salida[0], list):  # Con top_k=None algunas versiones anidan una lista más
+        salida = salida[0]
+    if isinstance(salida, dict):
+        salida = [salida]
+    ordenadas = sorted(salida, key=lambda x: x["score"], reverse=True)
+    return ordenadas[0]["label"], ordenadas[0]["score"], {x["label"]: x["score"] for x in ordenadas}
+
+
+def comprobar(nombre, registro, textos, backend, argumentos_extra=()):
+    """Compara un backend con el eager para un modelo del registro: acuerdo de etiquetas, deriva de scores y tiempos."""
+    tarea, modelo, opciones = registro.especificacion(nombre)
+    opciones = {k: v for k, v in opciones.items() if k != "backend"}
+    resultados = {}
+    for nombre_backend in ("eager", backend):
+        pipe = construir_pipeline(tarea, modelo, backend=nombre_backend, **opciones)
+        inicio = time.perf_counter()
+        salidas = [pipe(texto, *argumentos_extra) for texto in textos]
+        segundos = time.perf_counter() - inicio
+        resultados[nombre_backend] = ([_resumir_salida(tarea, s) for s in salidas], segundos)
+
+    (base, tiempo_base), (alternativo, tiempo_alternativo) = resultados["eager"], resultados[backend]
+    acuerdo = sum(b[0] == a[0] for b, a in zip(base, alternativo)) / len(textos)
+    derivas = [abs(b[2].get(etiqueta, 0.0) - a[2].get(etiqueta, 0.0))
+               for b, a in zip(base, alternativo) for etiqueta in b[2]]
+    return {
+        "modelo": modelo,
+        "acuerdo": acuerdo,
+        "deriva_media": sum(derivas) / len(derivas) if derivas else 0.0,
+        "deriva_maxima": max(derivas, default=0.0),
+        "segundos_eager": tiempo_base,
+        f"segundos_{backend}": tiempo_alternativo,
+    }
+
+
+def main():
+    import analizar_filtrar
+
+    parser = argparse.ArgumentParser(description="Exporta y comprueba modelos en backends int8/ONNX.")
+    parser.add_argument("accion", choices=["exportar", "comprobar"])
+    parser.add_argument("--backend", choices=["int8", "onnx"], required=True)
+    parser.add_argument("--modelos", nargs="*", default=None,
+                        help=f"Nombres del registro (por defecto todos: {', '.join(analizar_filtrar.registro_modelos.nombres())}).")
+    parser.add_argument("--archivo", default=analizar_filtrar.ruta_noticias_json, help="Noticias para la comprobación.")
+    argumentos = parser.parse_args()
+
+    registro = analizar_filtrar.registro_modelos
+    nombres = argumentos.modelos or registro.nombres()
+    if argumentos.accion == "exportar":
+        for nombre in nombres:
+            tarea, modelo, opciones = registro.especificacion(nombre)
+            inicio = time.perf_counter()
+            destino = exportar(tarea, modelo, argumentos.backend, revision=opciones.get("revision"))
+            print(f"✅ {nombre}: '{modelo}' exportado a {argumentos.backend} en '{destino}' ({time.perf_counter() - inicio:.1f} s)")
+        return
+
+    textos = [analizar_filtrar.texto_para_analisis(n) for n in analizar_filtrar.cargar_noticias(argumentos.archivo)]
+    for nombre in nombres:
+        argumentos_extra = (analizar_filtrar.categorias_tematica,) if nombre == "tematica" else ()
+        informe = comprobar(nombre, registro, textos, argumentos.backend, argumentos_extra)
+        print(f"\n📊 {nombre} ({informe['modelo']}) - eager vs {argumentos.backend}")
+        print(f"   Acuerdo de etiquetas: {100 * informe['acuerdo']:.0f}%")
+        print(f"   Deriva de scores: media {informe['deriva_media']:.4f}, máxima {informe['deriva_maxima']:.4f}")
+        print(f"   Tiempo: eager {informe['segundos_eager']:.2f} s, {argumentos.backend} {informe[f'segundos_{argumentos.backend}']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
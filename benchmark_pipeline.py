@@ -0,0 +1,374 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import analizar_filtrar
+from memoria import MonitorMemoria, rss_actual_mb, rss_maximo_mb
+
+# Benchmark del análisis completo, etapa a etapa, para saber dónde se va el tiempo y comparar commits.
+# Corpus: noticias.json o corpus sintéticos de N noticias (deterministas, generados a partir de una semilla).
+# Modos:
+#   - "simulado": modelos falsos deterministas e instantáneos -> mide solo la orquestación, la lectura
+#     y escritura de JSON, la construcción de resultados y el enrutado.
+#   - "real": los modelos de verdad (descargados o ya en la caché de Hugging Face).
+# Para cada etapa, cada función analizar_* y cada modelo ("modelo:<nombre>", una medida por lote) informa
+# noticias/s, latencias p50/p95/p99 por llamada (un lote en las etapas por lotes, una noticia en
+# categorización y enrutado), el pico de memoria residente (RSS) mientras corre la etapa y el tiempo de
+# carga de modelos, y guarda un JSON en `resultados_benchmark/` con el commit en el nombre.
+# Uso:
+#   python benchmark_pipeline.py --modo simulado --corpus 1000 10000 100000
+#   python benchmark_pipeline.py --modo real --corpus noticias.json
+#   python benchmark_pipeline.py --comparar resultados_benchmark/a.json resultados_benchmark/b.json
+
+DIRECTORIO_RESULTADOS = "resultados_benchmark"
+
+# Funciones por lotes que se miden por separado (nombre en analizar_filtrar -> modelo del registro)
+FUNCIONES_ANALISIS = {
+    "analizar_sentimiento_lote": "sentimiento",
+    "analizar_fake_news_lote": "fake_news",
+    "analizar_emocional_lote": "emocional",
+    "analizar_tematica_lote": "tematica",
+    "resumir_texto_lote": "resumen",
+}
+
+PALABRAS_SINTETICAS = (
+    "gobierno economía elecciones salud hospital vacuna equipo partido liga tecnología empresa mercado inflación "
+    "clima incendio lluvia universidad estudiantes museo festival película ciencia investigación espacio satélite "
+    "ministro congreso acuerdo crisis récord victoria derrota descubrimiento inversión empleo ciudad país mundo"
+).split()
+EMOCIONES_SIMULADAS = ["neutral", "joy", "sadness", "anger", "fear", "surprise", "disgust"]
+
+
+# --- Modelos simulados ---
+
+def _hash(texto, modulo):
+    return int(hashlib.md5(texto.encode("utf-8")).hexdigest(), 16) % modulo
+
+
+class PipelineSimulado:
+    """Imita la salida de un pipeline de Hugging Face con resultados deterministas (hash del texto) y sin coste."""
+
+    def __init__(self, tarea, model=None, top_k="", **opciones):
+        self.tarea = tarea
+        self.modelo = model or ""
+        self.top_k = top_k
+
+    def _uno(self, texto, etiquetas_candidatas=None):
+        if self.tarea == "zero-shot-classification":
+            k = _hash(texto, len(etiquetas_candidatas))
+            etiquetas = list(etiquetas_candidatas[k:]) + list(etiquetas_candidatas[:k])
+            scores = [1 / (i + 2) for i in range(len(etiquetas))]
+            return {"sequence": texto, "labels": etiquetas, "scores": [s / sum(scores) for s in scores]}
+        if self.tarea == "summarization":
+            return {"summary_text": " ".join(texto.split()[:30])}
+        if self.tarea == "feature-extraction":
+            return [[(_hash(texto + str(i), 1000) / 1000.0) for i in range(8)]]
+        if "sentiment" in self.modelo:
+            estrellas = _hash(texto, 5) + 1
+            todas = [{"label": f"{e} star{'s' if e > 1 else ''}", "score": 0.6 if e == estrellas else 0.1} for e in range(1, 6)]
+        elif "fake" in self.modelo:
+            etiqueta = _hash(texto, 2)
+            todas = [{"label": f"LABEL_{i}", "score": 0.9 if i == etiqueta else 0.1} for i in range(2)]
+        else:  # Emociones
+            k = _hash(texto, len(EMOCIONES_SIMULADAS))
+            todas = [{"label": e, "score": 0.5 if i == k else 0.5 / 6} for i, e in enumerate(EMOCIONES_SIMULADAS)]
+        # Con top_k=None, scores de todas las etiquetas (de mayor a menor); si no, solo la principal
+        return sorted(todas, key=lambda x: x["score"], reverse=True) if self.top_k is None else max(todas, key=lambda x: x["score"])
+
+    def __call__(self, entrada, *args, **opciones):
+        etiquetas = args[0] if args else opciones.get("candidate_labels")
+        if isinstance(entrada, str):
+            resultado = self._uno(entrada, etiquetas)
+            return resultado if self.tarea == "zero-shot-classification" else [resultado]
+        return [self._uno(texto, etiquetas) for texto in entrada]
+
+
+def construir_pipeline_simulado(tarea, model=None, **opciones):
+    opciones.pop("device", None)
+    opciones.pop("backend", None)
+    opciones.pop("paquete", None)
+    return PipelineSimulado(tarea, model=model, **opciones)
+
+
+# --- Corpus ---
+
+def generar_corpus(n, semilla=1234):
+    """Genera `n` noticias con formato GNews (siempre las mismas para la misma semilla)."""
+    aleatorio = random.Random(semilla)
+    fecha_base = datetime(2024, 1, 1)
+    noticias = []
+    for i in range(n):
+        titulo = " ".join(aleatorio.choices(PALABRAS_SINTETICAS, k=aleatorio.randint(6, 14))).capitalize()
+        descripcion = ". ".join(
+            " ".join(aleatorio.choices(PALABRAS_SINTETICAS, k=aleatorio.randint(8, 20))).capitalize()
+            for _ in range(aleatorio.randint(1, 6))
+        ) + "."
+        noticias.append({
+            "title": titulo,
+            "description": descripcion,
+            "url": f"https://ejemplo.local/noticia/{i}",
+            "image": "",
+            "publishedAt": (fecha_base + timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "source": {"name": f"Fuente {i % 50}", "url": "https://ejemplo.local"},
+        })
+    return noticias
+
+
+def cargar_corpus(corpus, directorio):
+    """Devuelve (nombre, ruta al JSON) del corpus: un archivo existente o uno sintético de N noticias."""
+    if corpus.isdigit():
+        ruta = os.path.join(directorio, f"sinteticas_{corpus}.json")
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(generar_corpus(int(corpus)), f, ensure_ascii=False)
+        return f"sinteticas_{corpus}", ruta
+    return os.path.splitext(os.path.basename(corpus))[0], corpus
+
+
+# --- Medición ---
+
+def percentil(valores, p):
+    """Percentil por el método del rango más cercano (valores ya ordenados)."""
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, max(0, math.ceil(p * len(valores) / 100) - 1))]
+
+
+class Medidor:
+    """Acumula, por etapa, el tiempo total, las noticias procesadas, la duración de cada llamada y el pico de RSS."""
+
+    def __init__(self):
+        self.etapas = {}
+
+    def registrar(self, etapa, segundos, noticias, rss_mb=None):
+        """Registra una llamada (un lote o una noticia). Sin `rss_mb`, se toma la memoria residente de este momento."""
+        datos = self.etapas.setdefault(etapa, {"segundos": 0.0, "noticias": 0, "latencias": [], "rss_mb": 0.0})
+        datos["segundos"] += segundos
+        datos["noticias"] += noticias
+        datos["latencias"].append(segundos)
+        datos["rss_mb"] = max(datos["rss_mb"], rss_actual_mb() if rss_mb is None else rss_mb)
+
+    def medir(self, etapa, funcion, noticias=lambda args: len(args[0]), muestrear=True):
+        """Envuelve `funcion` para que cada llamada se registre en `etapa`.
+
+        Con `muestrear`, un hilo lee la memoria durante la llamada para captar su pico; en las funciones por
+        noticia (miles de llamadas muy cortas) basta con leerla al terminar cada una.
+        """
+        def envoltura(*args, **kwargs):
+            if not muestrear:
+                inicio = time.perf_counter()
+                resultado = funcion(*args, **kwargs)
+                self.registrar(etapa, time.perf_counter() - inicio, noticias(args))
+                return resultado
+            with MonitorMemoria() as memoria:
+                inicio = time.perf_counter()
+                resultado = funcion(*args, **kwargs)
+                segundos = time.perf_counter() - inicio
+            self.registrar(etapa, segundos, noticias(args), memoria.pico)
+            return resultado
+        return envoltura
+
+    def informe(self):
+        informe = {}
+        for etapa, datos in self.etapas.items():
+            latencias = sorted(datos["latencias"])
+            informe[etapa] = {
+                "noticias": datos["noticias"],
+                "llamadas": len(latencias),
+                "segundos": round(datos["segundos"], 6),
+                "noticias_por_segundo": round(datos["noticias"] / datos["segundos"], 2) if datos["segundos"] else None,
+                "p50_ms": round(1000 * percentil(latencias, 50), 4),
+                "p95_ms": round(1000 * percentil(latencias, 95), 4),
+                "p99_ms": round(1000 * percentil(latencias, 99), 4),
+                "rss_maximo_mb": round(datos["rss_mb"], 1),
+            }
+        return informe
+
+
+_medidor_activo = None  # Medidor del corpus en curso (los pipelines medidos registran en él)
+
+
+class PipelineMedido:
+    """Envuelve un pipeline para registrar cada llamada al modelo (un lote) en la etapa "modelo:<nombre>"."""
+
+    def __init__(self, pipeline, nombre_modelo):
+        self._pipeline = pipeline
+        self._etapa = f"modelo:{nombre_modelo}"
+
+    def __getattr__(self, atributo):
+        return getattr(self._pipeline, atributo)
+
+    def __call__(self, entrada, *args, **kwargs):
+        with MonitorMemoria() as memoria:
+            inicio = time.perf_counter()
+            resultado = self._pipeline(entrada, *args, **kwargs)
+            segundos = time.perf_counter() - inicio
+        if _medidor_activo is not None:
+            _medidor_activo.registrar(self._etapa, segundos, 1 if isinstance(entrada, str) else len(entrada), memoria.pico)
+        return resultado
+
+
+def constructor_medido(constructor):
+    """Constructor de pipelines para el registro que devuelve pipelines medidos."""
+    def construir(tarea, model=None, **opciones):
+        if constructor is None:
+            from transformers import pipeline as constructor_hf
+
+            return PipelineMedido(constructor_hf(tarea, model=model, **opciones), model)
+        return PipelineMedido(constructor(tarea, model=model, **opciones), model)
+    return construir
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def ejecutar_benchmark(ruta_corpus, tamano, directorio_trabajo):
+    """Ejecuta las etapas del análisis de `main()` sobre el corpus, midiendo cada una."""
+    global _medidor_activo
+    medidor = _medidor_activo = Medidor()
+    originales = {nombre: getattr(analizar_filtrar, nombre) for nombre in FUNCIONES_ANALISIS}
+    for nombre in FUNCIONES_ANALISIS:
+        setattr(analizar_filtrar, nombre, medidor.medir(nombre, originales[nombre]))
+    try:
+        with MonitorMemoria() as memoria_total:
+            inicio_total = time.perf_counter()
+
+            with MonitorMemoria() as memoria:
+                inicio = time.perf_counter()
+                noticias = analizar_filtrar.cargar_noticias(ruta_corpus)
+                segundos = time.perf_counter() - inicio
+            medidor.registrar("lectura_json", segundos, len(noticias), memoria.pico)
+
+            inicio = time.perf_counter()
+            validas = [n for n in noticias if analizar_filtrar.texto_para_analisis(n).strip() not in ("", ".")]
+            textos = [analizar_filtrar.texto_para_analisis(n) for n in validas]
+            medidor.registrar("preparacion_textos", time.perf_counter() - inicio, len(noticias))
+
+            if analizar_filtrar.detectar_duplicados:
+                detector = analizar_filtrar.detector_duplicados()
+                detector.agrupar = medidor.medir("duplicados", detector.agrupar)
+            analizar_textos = medidor.medir("analisis", analizar_filtrar.analizar_agrupando_duplicados)
+            analisis, _ = analizar_textos(textos, lambda unicos: analizar_filtrar.analizar_textos(unicos, tamano))
+
+            construir = medidor.medir("categorizacion", analizar_filtrar.construir_noticia_procesada, lambda args: 1, muestrear=False)
+            procesadas = [construir(noticia, *resultado) for noticia, resultado in zip(validas, analisis)]
+
+            clasificar = medidor.medir("enrutado", analizar_filtrar.clasificar_noticia, lambda args: 1, muestrear=False)
+            listas = {"noticias_destacadas": [], "mejores_noticias": [], "peores_noticias": []}
+            for noticia_procesada in procesadas:
+                destino = clasificar(noticia_procesada)
+                if destino:
+                    listas[destino].append(noticia_procesada)
+
+            with MonitorMemoria() as memoria:
+                inicio = time.perf_counter()
+                with open(os.path.join(directorio_trabajo, "noticias_filtradas.json"), "w", encoding="utf-8") as f:
+                    json.dump(listas, f, ensure_ascii=False, indent=4)
+                segundos = time.perf_counter() - inicio
+            medidor.registrar("escritura_json", segundos, sum(len(l) for l in listas.values()), memoria.pico)
+            segundos_total = time.perf_counter() - inicio_total
+        medidor.registrar("total", segundos_total, len(noticias), memoria_total.pico)
+    finally:
+        for nombre, funcion in originales.items():
+            setattr(analizar_filtrar, nombre, funcion)
+        if analizar_filtrar.detectar_duplicados:
+            vars(analizar_filtrar.detector_duplicados()).pop("agrupar", None)
+        _medidor_activo = None
+    return medidor.informe(), {destino: len(lista) for destino, lista in listas.items()}
+
+
+def comparar(ruta_a, ruta_b):
+    """Muestra la variación de noticias/s y p95 entre dos resultados de benchmark."""
+    with open(ruta_a, "r", encoding="utf-8") as f:
+        a = json.load(f)
+    with open(ruta_b, "r", encoding="utf-8") as f:
+        b = json.load(f)
+    print(f"📊 {a['commit']} ({a['modo']}, {a['corpus']}) -> {b['commit']} ({b['modo']}, {b['corpus']})")
+    for etapa, datos_b in b["etapas"].items():
+        datos_a = a["etapas"].get(etapa)
+        if not datos_a or not datos_a["noticias_por_segundo"] or not datos_b["noticias_por_segundo"]:
+            continue
+        cambio = 100 * (datos_b["noticias_por_segundo"] / datos_a["noticias_por_segundo"] - 1)
+        print(f"   {etapa:28} {datos_a['noticias_por_segundo']:>12.1f} -> {datos_b['noticias_por_segundo']:>12.1f} noticias/s "
+              f"({cambio:+.1f}%) | p95 {datos_a['p95_ms']:.3f} -> {datos_b['p95_ms']:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark por etapas del análisis de noticias.")
+    parser.add_argument("--modo", choices=["simulado", "real"], default="simulado")
+    parser.add_argument("--corpus", nargs="+", default=["noticias.json", "1000", "10000", "100000"],
+                        help="Archivos JSON de noticias o tamaños de corpus sintéticos.")
+    parser.add_argument("--tamano-lote", type=int, default=analizar_filtrar.tamano_lote)
+    parser.add_argument("--con-cache", action="store_true", help="Usa la caché de análisis (por defecto se mide sin ella).")
+    parser.add_argument("--salida", default=DIRECTORIO_RESULTADOS, help="Carpeta donde guardar los resultados JSON.")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DESPUES"), help="Compara dos resultados guardados.")
+    argumentos = parser.parse_args()
+
+    if argumentos.comparar:
+        comparar(*argumentos.comparar)
+        return
+
+    analizar_filtrar.generar_miniaturas = False
+    analizar_filtrar.usar_servidor_inferencia = False  # Se mide la inferencia de este proceso
+    registro = analizar_filtrar.registro_modelos
+    registro.constructor = constructor_medido(construir_pipeline_simulado if argumentos.modo == "simulado" else registro.constructor)
+    os.makedirs(argumentos.salida, exist_ok=True)
+    commit = _commit_actual()
+
+    with tempfile.TemporaryDirectory() as directorio_trabajo:
+        analizar_filtrar.usar_cache = argumentos.con_cache
+        if argumentos.con_cache:
+            analizar_filtrar.cache_analisis = analizar_filtrar.CacheAnalisis(os.path.join(directorio_trabajo, "cache.sqlite"))
+
+        inicio = time.perf_counter()
+        nombres_modelos = [m for m in FUNCIONES_ANALISIS.values() if m != "tematica"] + [analizar_filtrar._modelo_tematica()]
+        analizar_filtrar.registro_modelos.precargar(nombres_modelos)
+        carga_modelos = {"total_segundos": round(time.perf_counter() - inicio, 3),
+                         **{n: round(s, 3) for n, s in analizar_filtrar.registro_modelos.tiempos_carga.items()}}
+        print(f"⏱️ Modelos ({argumentos.modo}) cargados en {carga_modelos['total_segundos']:.2f} s")
+
+        for corpus in argumentos.corpus:
+            nombre_corpus, ruta_corpus = cargar_corpus(corpus, directorio_trabajo)
+            if not os.path.exists(ruta_corpus):
+                print(f"⚠️ Corpus '{corpus}' no encontrado, se omite.")
+                continue
+            print(f"\n🏁 Corpus '{nombre_corpus}'...")
+            etapas, destinos = ejecutar_benchmark(ruta_corpus, argumentos.tamano_lote, directorio_trabajo)
+            resultado = {
+                "commit": commit,
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "modo": argumentos.modo,
+                "corpus": nombre_corpus,
+                "tamano_lote": argumentos.tamano_lote,
+                "con_cache": argumentos.con_cache,
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "carga_modelos": carga_modelos,
+                "destinos": destinos,
+                "rss_maximo_mb": round(rss_maximo_mb(), 1),
+                "etapas": etapas,
+            }
+            ruta_resultado = os.path.join(argumentos.salida, f"{commit}_{argumentos.modo}_{nombre_corpus}.json")
+            with open(ruta_resultado, "w", encoding="utf-8") as f:
+                json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+            for etapa, datos in etapas.items():
+                print(f"   {etapa:28} {datos['noticias_por_segundo'] or 0:>12.1f} noticias/s | p50 {datos['p50_ms']:.3f} "
+                      f"p95 {datos['p95_ms']:.3f} p99 {datos['p99_ms']:.3f} ms | RSS {datos['rss_maximo_mb']:.0f} MB")
+            print(f"💾 Resultados guardados en '{ruta_resultado}'")
+
+
+if __name__ == "__main__":
+    main()
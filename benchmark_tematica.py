@@ -0,0 +1,61 @@
+import argparse
+import time
+
+import analizar_filtrar
+
+# Comparativa de los dos motores temáticos sobre las mismas noticias:
+# zero-shot NLI (bart-large-mnli) frente a similitud de embeddings.
+# Mide el tiempo de inferencia (sin contar la carga de modelos) y el acuerdo entre etiquetas.
+# Uso: python benchmark_tematica.py [--archivo noticias.json] [--tamano-lote 8] [--repeticiones 3]
+
+
+def medir_motor(motor, textos, tamano, repeticiones):
+    """Ejecuta el motor indicado y devuelve (resultados, mejor tiempo en segundos)."""
+    analizar_filtrar.motor_tematica = motor
+    nombre_modelo = analizar_filtrar._modelo_tematica()
+    inicio = time.perf_counter()
+    analizar_filtrar.registro_modelos.precargar([nombre_modelo])
+    print(f"   Carga del modelo '{nombre_modelo}': {time.perf_counter() - inicio:.1f} s")
+    if motor == "embeddings":
+        inicio = time.perf_counter()
+        analizar_filtrar.clasificador_tematico_embeddings().matriz_etiquetas()
+        print(f"   Embeddings de etiquetas (una sola vez, luego desde disco): {time.perf_counter() - inicio:.2f} s")
+
+    mejor_tiempo = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultados = analizar_filtrar.analizar_tematica_lote(textos, tamano)
+        mejor_tiempo = min(mejor_tiempo, time.perf_counter() - inicio)
+    return resultados, mejor_tiempo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara el motor temático NLI con el de embeddings.")
+    parser.add_argument("--archivo", default="noticias.json", help="Noticias en formato GNews.")
+    parser.add_argument("--tamano-lote", type=int, default=analizar_filtrar.tamano_lote)
+    parser.add_argument("--repeticiones", type=int, default=3, help="Se queda con el mejor tiempo de N repeticiones.")
+    argumentos = parser.parse_args()
+
+    noticias = analizar_filtrar.cargar_noticias(argumentos.archivo)
+    textos = [analizar_filtrar.texto_para_analisis(n) for n in noticias]
+    if not textos:
+        return
+    analizar_filtrar.usar_cache = False  # Queremos medir inferencia real, no aciertos de caché
+
+    resultados = {}
+    for motor in ("nli", "embeddings"):
+        print(f"\n⏱️ Motor '{motor}'")
+        resultados[motor], segundos = medir_motor(motor, textos, argumentos.tamano_lote, argumentos.repeticiones)
+        print(f"   {len(textos)} noticias en {segundos:.2f} s ({len(textos) / segundos:.1f} noticias/s)")
+        resultados[motor + "_tiempo"] = segundos
+
+    coincidencias = sum(nli[0] == emb[0] for nli, emb in zip(resultados["nli"], resultados["embeddings"]))
+    print(f"\n📊 Acuerdo de etiquetas: {coincidencias}/{len(textos)} ({100 * coincidencias / len(textos):.0f}%)")
+    print(f"🚀 Aceleración del motor de embeddings: x{resultados['nli_tiempo'] / resultados['embeddings_tiempo']:.1f}\n")
+    for texto, nli, emb in zip(textos, resultados["nli"], resultados["embeddings"]):
+        marca = "✅" if nli[0] == emb[0] else "❌"
+        print(f"{marca} NLI: {nli[0]} ({nli[1]:.2f}) | Embeddings: {emb[0]} ({emb[1]:.2f}) | {texto[:70]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Caché persistente de resultados de los modelos, direccionada por contenido.
+# Cada entrada se identifica por el modelo que la produjo ("nombre@revision" más los parámetros
+# que cambian el resultado) y por el hash SHA-256 del texto analizado. Como el modelo forma parte
+# de la clave, cambiar un modelo en la configuración solo invalida las entradas de ese modelo.
+
+
+def hash_texto(texto, parametros=""):
+    """Calcula la clave de contenido de un texto (y de los parámetros que afectan al resultado)."""
+    return hashlib.sha256(f"{parametros}\x00{texto}".encode("utf-8")).hexdigest()
+
+
+class CacheAnalisis:
+    """Caché SQLite de resultados de análisis, con desalojo por antigüedad y por número de entradas."""
+
+    def __init__(self, ruta="cache_analisis.sqlite", max_entradas=200_000, max_dias=30):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self.max_dias = max_dias
+        self.estadisticas = {}  # modelo -> {"aciertos": n, "fallos": n}
+        self._conexion = None
+        self._pid = None
+        self._candado = threading.Lock()
+
+    def _conectar(self):
+        """Abre la conexión la primera vez (y de nuevo en cada proceso hijo)."""
+        if self._conexion is None or self._pid != os.getpid():
+            self._conexion = sqlite3.connect(self.ruta, timeout=30, check_same_thread=False)
+            self._conexion.execute("PRAGMA journal_mode=WAL")  # Varios procesos pueden leer mientras otro escribe
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS resultados ("
+                " modelo TEXT NOT NULL,"
+                " clave TEXT NOT NULL,"
+                " valor TEXT NOT NULL,"
+                " creado REAL NOT NULL,"
+                " accedido REAL NOT NULL,"
+                " PRIMARY KEY (modelo, clave))"
+            )
+            self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_resultados_accedido ON resultados (accedido)")
+            self._pid = os.getpid()
+        return self._conexion
+
+    def _contar(self, modelo, aciertos, fallos):
+        contador = self.estadisticas.setdefault(modelo, {"aciertos": 0, "fallos": 0})
+        contador["aciertos"] += aciertos
+        contador["fallos"] += fallos
+
+    def obtener_varios(self, modelo, textos, parametros=""):
+        """Busca varios textos a la vez. Devuelve {índice en `textos`: valor} solo para los aciertos."""
+        claves = [hash_texto(texto, parametros) for texto in textos]
+        encontrados = {}
+        with self._candado:
+            conexion = self._conectar()
+            # SQLite limita el número de parámetros por consulta, así que consultamos por tandas
+            for inicio in range(0, len(claves), 500):
+                tanda = list(set(claves[inicio:inicio + 500]))
+                filas = conexion.execute(
+                    f"SELECT clave, valor FROM resultados WHERE modelo = ? AND clave IN ({','.join('?' * len(tanda))})",
+                    [modelo, *tanda]
+                ).fetchall()
+                encontrados.update(filas)
+            if encontrados:
+                ahora = time.time()
+                conexion.executemany(
+                    "UPDATE resultados SET accedido = ? WHERE modelo = ? AND clave = ?",
+                    [(ahora, modelo, clave) for clave in encontrados]
+                )
+                conexion.commit()
+        aciertos = {i: json.loads(encontrados[clave]) for i, clave in enumerate(claves) if clave in encontrados}
+        self._contar(modelo, len(aciertos), len(textos) - len(aciertos))
+        return aciertos
+
+    def obtener(self, modelo, texto, parametros=""):
+        """Busca un texto. Devuelve el valor guardado o None si no está."""
+        return self.obtener_varios(modelo, [texto], parametros).get(0)
+
+    def guardar_varios(self, modelo, pares, parametros=""):
+        """Guarda una lista de pares (texto, valor)."""
+        if not pares:
+            return
+        ahora = time.time()
+        filas = [
+            (modelo, hash_texto(texto, parametros), json.dumps(valor, ensure_ascii=False), ahora, ahora)
+            for texto, valor in pares
+        ]
+        with self._candado:
+            conexion = self._conectar()
+            conexion.executemany("INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?)", filas)
+            conexion.commit()
+
+    def guardar(self, modelo, texto, valor, parametros=""):
+        """Guarda el resultado de un texto."""
+        self.guardar_varios(modelo, [(texto, valor)], parametros)
+
+    def purgar_modelos_obsoletos(self, modelos_vigentes):
+        """Borra las entradas de modelos que ya no están en la configuración. Devuelve cuántas borró."""
+        modelos_vigentes = list(modelos_vigentes)
+        with self._candado:
+            conexion = self._conectar()
+            cursor = conexion.execute(
+                f"DELETE FROM resultados WHERE modelo NOT IN ({','.join('?' * len(modelos_vigentes))})",
+                modelos_vigentes
+            )
+            conexion.commit()
+        return cursor.rowcount
+
+    def desalojar(self):
+        """Borra las entradas más antiguas que `max_dias` y, si sobran, las menos usadas recientemente."""
+        with self._candado:
+            conexion = self._conectar()
+            borradas = conexion.execute(
+                "DELETE FROM resultados WHERE accedido < ?", (time.time() - self.max_dias * 86400,)
+            ).rowcount
+            total = conexion.execute("SELECT COUNT(*) FROM resultados").fetchone()[0]
+            if total > self.max_entradas:
+                borradas += conexion.execute(
+                    "DELETE FROM resultados WHERE rowid IN "
+                    "(SELECT rowid FROM resultados ORDER BY accedido LIMIT ?)",
+                    (total - self.max_entradas,)
+                ).rowcount
+            conexion.commit()
+        return borradas
+
+    def imprimir_estadisticas(self):
+        """Muestra los aciertos y fallos de caché de la ejecución, por modelo."""
+        if not self.estadisticas:
+            return
+        print("📦 Caché de análisis:")
+        for modelo, contador in self.estadisticas.items():
+            total = contador["aciertos"] + contador["fallos"]
+            porcentaje = 100 * contador["aciertos"] / total if total else 0
+            print(f"   - {modelo}: {contador['aciertos']} aciertos, {contador['fallos']} fallos ({porcentaje:.0f}% aciertos)")
+
+    def cerrar(self):
+        """Cierra la conexión si está abierta en este proceso."""
+        with self._candado:
+            if self._conexion is not None and self._pid == os.getpid():
+                self._conexion.close()
+            self._conexion = None
@@ -0,0 +1,262 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+# Carga histórica: analiza un volcado JSONL grande (millones de noticias con formato GNews, una por
+# línea) por bloques de tamaño fijo, con puntos de control para poder retomarlo si se interrumpe.
+# Cada bloque se escribe en su propio archivo `bloque_000042.jsonl` (un registro por línea de la
+# entrada, con su número de línea) y después se guarda de forma duradera el punto de control: posición
+# en bytes en la entrada, último bloque terminado y huella de la configuración. Si el proceso muere
+# (Ctrl+C, kill, falta de memoria...), al relanzar el mismo comando se sigue justo después del último
+# bloque guardado; un bloque a medias se repite entero y su archivo se sustituye, así que nunca hay
+# registros duplicados ni perdidos. Con otra configuración de modelos o reglas no se retoma.
+# Uso:
+#   python carga_historica.py procesar volcado.jsonl [--directorio historico] [--tamano-bloque 5000]
+#   python carga_historica.py cargar [--directorio historico]   # vuelca los bloques en resultados.sqlite
+
+DIRECTORIO = "historico"
+PUNTO_CONTROL = "punto_control.json"
+TAMANO_BLOQUE = 5000
+BYTES_HUELLA_ENTRADA = 1 << 16  # Bytes del principio de la entrada que identifican el archivo
+
+
+def _escribir_duradero(ruta, contenido):
+    """Escribe `contenido` (bytes) en un temporal, lo fuerza a disco y lo renombra (también a disco)."""
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(contenido)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+    try:
+        descriptor = os.open(os.path.dirname(os.path.abspath(ruta)), os.O_RDONLY)
+    except OSError:
+        return  # Sistemas sin fsync de directorios (Windows)
+    try:
+        os.fsync(descriptor)  # Que el rename también sobreviva a un corte de luz
+    finally:
+        os.close(descriptor)
+
+
+def huella_configuracion(tamano_bloque):
+    """Huella de todo lo que cambia los resultados: modelos, reglas de enrutado, duplicados y tamaño de bloque."""
+    import analizar_filtrar as af
+
+    configuracion = {
+        "analisis": af.configuracion_analisis(),
+        "enrutado": [af.umbral_estrellas_buena, af.umbral_estrellas_mejores, af.umbral_estrellas_peores,
+                     af.emociones_neutras_positivas],
+        "cascada": af.evaluacion_en_cascada,
+        "duplicados": [af.detectar_duplicados, af.umbral_duplicados],  # Se agrupan dentro de cada bloque
+        "tamano_bloque": tamano_bloque,
+    }
+    return hashlib.sha256(json.dumps(configuracion, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def huella_entrada(ruta):
+    """Identifica el volcado por su principio (así se puede seguir si solo se le han añadido líneas al final)."""
+    with open(ruta, "rb") as f:
+        return hashlib.sha256(f.read(BYTES_HUELLA_ENTRADA)).hexdigest()
+
+
+def leer_punto_control(directorio=DIRECTORIO):
+    try:
+        with open(os.path.join(directorio, PUNTO_CONTROL), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _ruta_bloque(directorio, numero):
+    return os.path.join(directorio, f"bloque_{numero:06d}.jsonl")
+
+
+def leer_bloque(f, tamano_bloque):
+    """Lee hasta `tamano_bloque` líneas no vacías de `f` (binario). Devuelve [(número relativo, línea)] y líneas leídas."""
+    lineas, leidas = [], 0
+    while len(lineas) < tamano_bloque:
+        linea = f.readline()
+        if not linea:
+            break
+        if linea.strip():
+            lineas.append((leidas, linea))
+        leidas += 1
+    return lineas, leidas
+
+
+def analizar_bloque(lineas, primera_linea, tamano_lote, trabajadores=1):
+    """Analiza las noticias de un bloque. Devuelve un registro por línea: destino y noticia procesada, o el motivo de omitirla."""
+    import analizar_filtrar as af
+
+    registros, validas, textos = {}, [], []
+    for relativa, linea in lineas:
+        numero = primera_linea + relativa
+        try:
+            noticia = json.loads(linea)
+            texto = af.texto_para_analisis(noticia)
+        except (ValueError, TypeError, AttributeError):  # JSON roto o sin título/descripción de texto
+            registros[numero] = {"linea": numero, "omitida": "noticia inválida"}
+            continue
+        if not texto.strip() or texto == ". ":
+            registros[numero] = {"linea": numero, "omitida": "texto vacío"}
+            continue
+        validas.append((numero, noticia))
+        textos.append(texto)
+
+    if trabajadores > 1 and len(textos) > 1:
+        analizar = lambda unicos: af.analizar_textos_en_paralelo(unicos, tamano_lote, trabajadores)
+    else:
+        analizar = lambda unicos: af.analizar_textos(unicos, tamano_lote)
+    analisis_por_texto, tamanos_grupo = af.analizar_agrupando_duplicados(textos, analizar) if textos else ([], [])
+    for (numero, noticia), analisis, tamano_grupo in zip(validas, analisis_por_texto, tamanos_grupo):
+        procesada = af.construir_noticia_procesada(noticia, *analisis)
+        procesada["fuentes_misma_noticia"] = tamano_grupo
+        registros[numero] = {"linea": numero, "destino": af.clasificar_noticia(procesada), "noticia": procesada}
+    return [registros[numero] for numero in sorted(registros)]
+
+
+def _formatear_duracion(segundos):
+    horas, resto = divmod(int(segundos), 3600)
+    return f"{horas} h {resto // 60:02d} min" if horas else f"{resto // 60} min {resto % 60:02d} s"
+
+
+def procesar(ruta_entrada, directorio=DIRECTORIO, tamano_bloque=TAMANO_BLOQUE, tamano_lote=None, trabajadores=1,
+             reiniciar=False):
+    """Procesa (o retoma) el volcado por bloques con puntos de control. Devuelve el punto de control final."""
+    import analizar_filtrar as af
+
+    tamano_lote = tamano_lote or af.tamano_lote
+    os.makedirs(directorio, exist_ok=True)
+    huella = huella_configuracion(tamano_bloque)
+    entrada = huella_entrada(ruta_entrada)
+    punto = None if reiniciar else leer_punto_control(directorio)
+    if punto is not None:
+        if punto["huella_configuracion"] != huella:
+            sys.exit(f"🚨 '{directorio}' se generó con otra configuración (modelos, reglas o tamaño de bloque). "
+                     "Usa otro --directorio o --reiniciar para empezar de cero.")
+        if punto["huella_entrada"] != entrada:
+            sys.exit(f"🚨 El punto de control de '{directorio}' es de otro volcado. Usa otro --directorio o --reiniciar.")
+        print(f"⏯️ Retomando tras el bloque {punto['bloque']} (línea {punto['lineas']}, byte {punto['offset']}).")
+    else:
+        for ruta in glob.glob(os.path.join(directorio, "bloque_*")):  # También temporales abandonados
+            os.remove(ruta)
+        punto = {"entrada": os.path.abspath(ruta_entrada), "huella_entrada": entrada, "huella_configuracion": huella,
+                 "tamano_bloque": tamano_bloque, "bloque": 0, "offset": 0, "lineas": 0,
+                 "registros": 0, "omitidas": 0, "por_destino": {}}
+
+    af.metricas_analisis.reiniciar()
+    tamano_total = os.path.getsize(ruta_entrada)
+    inicio_sesion, offset_sesion, noticias_sesion = time.perf_counter(), punto["offset"], 0
+    print(f"\n🗄️ Carga histórica de '{ruta_entrada}' ({tamano_total / 1e6:.1f} MB) en bloques de {tamano_bloque} "
+          f"noticias -> '{directorio}'\n")
+    with open(ruta_entrada, "rb") as f:
+        f.seek(punto["offset"])
+        try:
+            while True:
+                inicio_bloque = time.perf_counter()
+                lineas, leidas = leer_bloque(f, tamano_bloque)
+                if not lineas:
+                    break
+                offset = f.tell()
+                numero = punto["bloque"] + 1
+                registros = analizar_bloque(lineas, punto["lineas"], tamano_lote, trabajadores)
+
+                # 1) Los resultados del bloque; 2) el punto de control que lo da por terminado
+                contenido = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in registros).encode("utf-8")
+                _escribir_duradero(_ruta_bloque(directorio, numero), contenido)
+                if af.ruta_agregados:  # Repetir un bloque no cuenta dos veces: cada noticia sustituye su aportación
+                    for registro in registros:
+                        if "noticia" in registro:
+                            af.agregados_analisis.registrar(registro["noticia"])
+                    af.agregados_analisis.guardar()
+                por_destino = dict(punto["por_destino"])
+                for registro in registros:
+                    if "omitida" not in registro:
+                        destino = registro["destino"] or "descartada"
+                        por_destino[destino] = por_destino.get(destino, 0) + 1
+                punto = {**punto, "bloque": numero, "offset": offset, "lineas": punto["lineas"] + leidas,
+                         "registros": punto["registros"] + len(registros),
+                         "omitidas": punto["omitidas"] + sum("omitida" in r for r in registros),
+                         "por_destino": por_destino, "actualizado": datetime.now().isoformat(timespec="seconds")}
+                _escribir_duradero(os.path.join(directorio, PUNTO_CONTROL),
+                                   json.dumps(punto, ensure_ascii=False, indent=2).encode("utf-8"))
+
+                # Ritmo de esta sesión (al retomar no cuenta lo ya hecho); la ETA va por bytes porque
+                # no se sabe cuántas líneas quedan sin leer todo el archivo
+                noticias_sesion += len(registros)
+                transcurrido = time.perf_counter() - inicio_sesion
+                ritmo_bytes = (offset - offset_sesion) / transcurrido if transcurrido else 0
+                restante = (tamano_total - offset) / ritmo_bytes if ritmo_bytes else 0
+                print(f"📦 Bloque {numero}: {len(registros)} noticias en {time.perf_counter() - inicio_bloque:.1f} s · "
+                      f"{noticias_sesion / transcurrido:.1f} noticias/s · {100 * offset / tamano_total:.1f}% · "
+                      f"ETA {_formatear_duracion(restante)}")
+                if af.usar_cache:
+                    af.cache_analisis.desalojar()  # Que la caché no crezca sin límite con millones de textos
+        except KeyboardInterrupt:
+            print(f"\n⏸️ Interrumpido. Se retomará tras el bloque {punto['bloque']} al relanzar el mismo comando.")
+            raise
+
+    print(f"\n✅ Carga histórica completa: {punto['registros']} registros en {punto['bloque']} bloques "
+          f"({punto['omitidas']} líneas omitidas). Por destino: {punto['por_destino']}")
+    af.imprimir_estadisticas_cascada()
+    if af.usar_cache:
+        af.cache_analisis.imprimir_estadisticas()
+    af.exportar_metricas(modo="carga_historica", bloques=punto["bloque"], registros=punto["registros"])
+    return punto
+
+
+def leer_registros(directorio=DIRECTORIO):
+    """Recorre los registros de los bloques terminados (según el punto de control), bloque a bloque y en orden."""
+    punto = leer_punto_control(directorio)
+    for numero in range(1, (punto or {}).get("bloque", 0) + 1):
+        with open(_ruta_bloque(directorio, numero), "r", encoding="utf-8") as f:
+            yield numero, [json.loads(linea) for linea in f]
+
+
+def cargar(directorio=DIRECTORIO, ruta_resultados=None):
+    """Vuelca los bloques en la base de resultados de la web. Se puede repetir: cada noticia se guarda por su clave."""
+    import almacen_resultados
+    import analizar_filtrar as af
+
+    conexion = almacen_resultados.conectar(ruta_resultados or af.ruta_resultados)
+    total = 0
+    try:
+        for numero, registros in leer_registros(directorio):
+            listas = {}
+            for registro in registros:
+                if registro.get("destino"):
+                    listas.setdefault(registro["destino"], []).append(registro["noticia"])
+            almacen_resultados.actualizar(conexion, listas, [], af.es_totalmente_objetiva)  # Una transacción por bloque
+            total += sum(len(lista) for lista in listas.values())
+            print(f"💾 Bloque {numero} cargado ({total} noticias hasta ahora)")
+    finally:
+        conexion.close()
+    print(f"✅ {total} noticias de la carga histórica en '{ruta_resultados or af.ruta_resultados}'.")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analiza un volcado JSONL grande por bloques, con puntos de control para retomarlo.")
+    parser.add_argument("accion", choices=["procesar", "cargar"])
+    parser.add_argument("entrada", nargs="?", help="Volcado JSONL (una noticia GNews por línea). Solo para `procesar`.")
+    parser.add_argument("--directorio", default=DIRECTORIO, help="Carpeta de los bloques y del punto de control.")
+    parser.add_argument("--tamano-bloque", type=int, default=TAMANO_BLOQUE, help="Noticias por bloque (y por punto de control).")
+    parser.add_argument("--tamano-lote", type=int, default=None, help="Textos por pasada de cada modelo.")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos que analizan cada bloque en paralelo.")
+    parser.add_argument("--reiniciar", action="store_true", help="Descarta el punto de control y empieza desde el principio.")
+    argumentos = parser.parse_args()
+    if argumentos.accion == "cargar":
+        cargar(argumentos.directorio)
+    elif not argumentos.entrada:
+        parser.error("`procesar` necesita la ruta del volcado JSONL")
+    else:
+        try:
+            procesar(argumentos.entrada, argumentos.directorio, argumentos.tamano_bloque, argumentos.tamano_lote,
+                     argumentos.workers, argumentos.reiniciar)
+        except KeyboardInterrupt:
+            sys.exit(130)
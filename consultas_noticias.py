@@ -0,0 +1,70 @@
+import json
+import os
+
+import almacen_resultados
+
+# Consultas por sección sobre la base de resultados (almacen_resultados.py) para app_web.py.
+# Cada sección es una condición SQL con un índice propio que termina en la fecha (ver
+# almacen_resultados.conectar), así que las noticias salen del índice ya ordenadas, las más recientes
+# primero, sin ordenar la sección entera. Las páginas se piden por cursor (la fecha y el id de la última
+# noticia de la página anterior) en vez de con OFFSET: la página 50 cuesta lo mismo que la primera.
+
+SECCIONES = {
+    "objetivas": ("objetiva = 1", ()),
+    "destacadas": ("seccion = ?", ("noticias_destacadas",)),
+    "mejores": ("seccion = ?", ("mejores_noticias",)),
+    "subjetivas_verdaderas": ("fake_news = 'LABEL_1' AND categoria_final = 'Subjetiva pero verdadera'", ()),
+    "dudosas": ("dudosa = 1", ()),  # Criterio en almacen_resultados.es_dudosa
+    "emocion_verdaderas": ("emocion = ? AND fake_news = 'LABEL_1'", None),  # Parámetro: la emoción
+}
+
+
+def hay_base(ruta="resultados.sqlite"):
+    """Indica si existe la base de resultados (si no, la web usa los JSON)."""
+    return os.path.exists(ruta)
+
+
+def abrir(ruta="resultados.sqlite"):
+    """Abre la base de resultados para consultarla (solo lectura; el esquema lo crea el análisis)."""
+    return almacen_resultados.abrir_lectura(ruta)
+
+
+def version_datos(conexion):
+    """Versión de los datos de la base; sirve como clave para cachear consultas en la web."""
+    return almacen_resultados.version(conexion)
+
+
+def _condicion(seccion, parametro):
+    condicion, parametros = SECCIONES[seccion]
+    return condicion, (parametro.lower(),) if parametros is None else parametros
+
+
+def contar_seccion(conexion, seccion, parametro=None):
+    """Número total de noticias de la sección."""
+    condicion, parametros = _condicion(seccion, parametro)
+    return conexion.execute(f"SELECT COUNT(*) FROM noticias WHERE {condicion}", parametros).fetchone()[0]
+
+
+def consultar_seccion(conexion, seccion, limite=20, cursor=None, parametro=None):
+    """Devuelve una página de noticias de la sección (las más recientes primero) y el cursor de la siguiente.
+
+    `cursor` es el que devolvió la página anterior (None para la primera); el devuelto es None si no hay más.
+    """
+    condicion, parametros = _condicion(seccion, parametro)
+    if cursor is not None:
+        condicion, parametros = f"({condicion}) AND (fecha, id) < (?, ?)", (*parametros, *cursor)
+    filas = conexion.execute(
+        f"SELECT fecha, id, datos FROM noticias WHERE {condicion} ORDER BY fecha DESC, id DESC LIMIT ?",
+        (*parametros, limite)
+    ).fetchall()
+    siguiente = (filas[-1][0], filas[-1][1]) if len(filas) == limite else None
+    return [json.loads(datos) for _, _, datos in filas], siguiente
+
+
+def todas_las_noticias(ruta="resultados.sqlite"):
+    """Todas las noticias de la base (las más recientes primero), p. ej. para el índice de búsqueda de la web."""
+    conexion = abrir(ruta)
+    try:
+        return [json.loads(datos) for (datos,) in conexion.execute("SELECT datos FROM noticias ORDER BY fecha DESC, id DESC")]
+    finally:
+        conexion.close()
@@ -0,0 +1,224 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from almacen_noticias import AlmacenNoticias, ESTADO_PENDIENTE
+
+# Descarga concurrente de varios feeds de GNews (temas, países, páginas) definidos en feeds.json.
+#   - Un único cliente HTTP asíncrono con conexiones reutilizables (pool) para todas las peticiones.
+#   - Como mucho `concurrencia` peticiones a la vez y un cubo de tokens que limita las peticiones por segundo.
+#   - Reintentos con espera exponencial (y aleatoria) ante errores de red, 429 y 5xx; respeta Retry-After.
+#   - Peticiones condicionales (If-None-Match / If-Modified-Since): si el servidor responde 304, no se
+#     descarga nada. Los ETag se guardan en la tabla meta del almacén.
+#   - Cada página se guarda en el almacén en cuanto llega (no se acumula todo en memoria).
+# Uso: python descargador_feeds.py [--config feeds.json] [--url-base http://127.0.0.1:8765/api/v4]
+# (con servidor_gnews_local.py se puede probar sin clave ni conexión a internet)
+
+URL_BASE_GNEWS = "https://gnews.io/api/v4"
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+CONFIGURACION_POR_DEFECTO = {
+    "url_base": URL_BASE_GNEWS,
+    "concurrencia": 4,             # Peticiones simultáneas como máximo
+    "peticiones_por_segundo": 1,   # Ritmo sostenido permitido por el plan de la API
+    "rafaga": 2,                   # Peticiones que se pueden hacer seguidas antes de esperar
+    "reintentos": 3,
+    "espera_base": 1.0,            # Segundos de la primera espera entre reintentos (luego se duplica)
+    "timeout": 15,
+    "paginas": 1,                  # Páginas por feed (cada feed puede indicar las suyas)
+    "parametros": {"lang": "es", "max": 10},  # Parámetros comunes a todos los feeds
+    "feeds": [],
+}
+
+
+class CuboTokens:
+    """Limita el ritmo de peticiones: `tasa` por segundo, con ráfagas de hasta `capacidad`."""
+
+    def __init__(self, tasa, capacidad=1):
+        self.tasa = tasa
+        self.capacidad = max(1, capacidad)
+        self.tokens = self.capacidad
+        self.ultima_recarga = time.monotonic()
+        self._candado = asyncio.Lock()
+
+    async def adquirir(self):
+        """Espera hasta que haya un token disponible y lo consume."""
+        async with self._candado:
+            while True:
+                ahora = time.monotonic()
+                self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultima_recarga) * self.tasa)
+                self.ultima_recarga = ahora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.tasa)
+
+
+class ErrorDescarga(Exception):
+    """La petición falló después de agotar los reintentos."""
+
+
+def cargar_configuracion(ruta="feeds.json"):
+    """Lee la configuración de feeds completando los valores que falten con los de por defecto."""
+    with open(ruta, "r", encoding="utf-8") as f:
+        configuracion = {**CONFIGURACION_POR_DEFECTO, **json.load(f)}
+    for i, feed in enumerate(configuracion["feeds"]):
+        feed.setdefault("nombre", f"feed_{i}")
+        feed.setdefault("endpoint", "top-headlines")
+    return configuracion
+
+
+def _paginas_feed(feed, configuracion):
+    """Genera (página, parámetros del feed, clave de sus validadores condicionales) para cada página del feed."""
+    parametros_feed = {**configuracion["parametros"], **feed.get("parametros", {})}
+    for pagina in range(1, feed.get("paginas", configuracion["paginas"]) + 1):
+        yield pagina, parametros_feed, f"condicional:{feed['endpoint']}:{json.dumps(parametros_feed, sort_keys=True)}:{pagina}"
+
+
+def _espera_reintento(intento, espera_base, retry_after=None):
+    """Segundos a esperar antes del reintento: Retry-After si el servidor lo indica, si no exponencial con jitter."""
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass  # Retry-After con fecha HTTP: usamos la espera exponencial
+    return espera_base * (2 ** intento) * (0.5 + random.random())
+
+
+async def descargar_pagina(cliente, cubo, semaforo, endpoint, parametros, cabeceras, reintentos, espera_base):
+    """Hace una petición GET con límite de ritmo y concurrencia, reintentando los errores transitorios."""
+    import httpx
+
+    for intento in range(reintentos + 1):
+        await cubo.adquirir()
+        retry_after = None
+        try:
+            async with semaforo:
+                respuesta = await cliente.get(endpoint, params=parametros, headers=cabeceras)
+            if respuesta.status_code not in CODIGOS_REINTENTABLES:
+                return respuesta
+            error = f"HTTP {respuesta.status_code}"
+            retry_after = respuesta.headers.get("Retry-After")
+        except httpx.TransportError as e:  # Conexión rechazada, timeout, etc.
+            error = f"{type(e).__name__}: {e}"
+        if intento < reintentos:
+            espera = _espera_reintento(intento, espera_base, retry_after)
+            print(f"⏳ {endpoint} ({error}): reintento {intento + 1}/{reintentos} en {espera:.1f} s")
+            await asyncio.sleep(espera)
+    raise ErrorDescarga(f"{endpoint}: {error} tras {reintentos} reintentos")
+
+
+async def _descargar_feed(cliente, cubo, semaforo, feed, configuracion, api_key, condicionales, cola, estadisticas):
+    """Descarga las páginas de un feed y las va dejando en la cola del escritor."""
+    for pagina, parametros_feed, clave in _paginas_feed(feed, configuracion):
+        parametros = {**parametros_feed, "apikey": api_key}
+        if feed.get("paginas", configuracion["paginas"]) > 1:
+            parametros["page"] = pagina
+        cabeceras = {}
+        validadores = condicionales.get(clave) or {}
+        if validadores.get("etag"):
+            cabeceras["If-None-Match"] = validadores["etag"]
+        if validadores.get("last_modified"):
+            cabeceras["If-Modified-Since"] = validadores["last_modified"]
+
+        try:
+            respuesta = await descargar_pagina(cliente, cubo, semaforo, feed["endpoint"], parametros, cabeceras,
+                                               configuracion["reintentos"], configuracion["espera_base"])
+        except ErrorDescarga as e:
+            print(f"🚨 Feed '{feed['nombre']}', página {pagina}: {e}")
+            estadisticas["errores"] += 1
+            return
+        estadisticas["peticiones"] += 1
+        if respuesta.status_code == 304:
+            print(f"💤 Feed '{feed['nombre']}', página {pagina}: sin cambios desde la última descarga.")
+            estadisticas["sin_cambios"] += 1
+            return  # Si esta página no cambió, las siguientes tampoco
+        if respuesta.status_code != 200:
+            print(f"🚨 Feed '{feed['nombre']}', página {pagina}: HTTP {respuesta.status_code} {respuesta.text[:200]}")
+            estadisticas["errores"] += 1
+            return
+
+        articulos = respuesta.json().get("articles", [])
+        validadores = {"etag": respuesta.headers.get("ETag"), "last_modified": respuesta.headers.get("Last-Modified")}
+        await cola.put((feed["nombre"], pagina, articulos, clave, validadores))
+        if len(articulos) < int(parametros_feed.get("max", 10)):
+            return  # Última página con resultados
+
+
+async def _escribir_en_almacen(cola, almacen, estadisticas):
+    """Único escritor del almacén: guarda cada página en cuanto llega y después su ETag."""
+    while True:
+        elemento = await cola.get()
+        if elemento is None:
+            return
+        nombre_feed, pagina, articulos, clave, validadores = elemento
+        anadidas, duplicadas = almacen.agregar(articulos)
+        # El validador se guarda después de las noticias: si algo falla antes, la página se volverá a pedir
+        if validadores["etag"] or validadores["last_modified"]:
+            almacen.guardar_meta(clave, json.dumps(validadores))
+        estadisticas["noticias"] += len(articulos)
+        estadisticas["nuevas"] += anadidas
+        estadisticas["duplicadas"] += duplicadas
+        print(f"📥 Feed '{nombre_feed}', página {pagina}: {anadidas} nuevas, {duplicadas} ya estaban.")
+
+
+async def descargar_feeds(configuracion, almacen, api_key, url_base=None):
+    """Descarga todos los feeds de la configuración en paralelo y guarda las noticias en el almacén."""
+    import httpx  # Import tardío: solo hace falta para descargar
+
+    estadisticas = {"peticiones": 0, "noticias": 0, "nuevas": 0, "duplicadas": 0, "sin_cambios": 0, "errores": 0}
+    concurrencia = max(1, int(configuracion["concurrencia"]))
+    cubo = CuboTokens(configuracion["peticiones_por_segundo"], configuracion["rafaga"])
+    semaforo = asyncio.Semaphore(concurrencia)
+    cola = asyncio.Queue(maxsize=2 * concurrencia)  # Si el escritor se retrasa, las descargas esperan
+    condicionales = {}  # El almacén (SQLite) solo se toca desde fuera de las descargas
+    for feed in configuracion["feeds"]:
+        for _, _, clave in _paginas_feed(feed, configuracion):
+            valor = almacen.leer_meta(clave)
+            condicionales[clave] = json.loads(valor) if valor else None
+
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=(url_base or configuracion["url_base"]).rstrip("/") + "/",
+                                 limits=limites, timeout=configuracion["timeout"]) as cliente:
+        async def _descargar_todos():
+            await asyncio.gather(*(
+                _descargar_feed(cliente, cubo, semaforo, feed, configuracion, api_key, condicionales, cola, estadisticas)
+                for feed in configuracion["feeds"]
+            ))
+            await cola.put(None)  # Aviso de fin para el escritor
+
+        # Si el escritor falla, gather propaga el error y no se queda nadie esperando a la cola
+        await asyncio.gather(_escribir_en_almacen(cola, almacen, estadisticas), _descargar_todos())
+    return estadisticas
+
+
+def ejecutar(ruta_configuracion="feeds.json", ruta_almacen="noticias.sqlite", api_key=None, url_base=None):
+    """Descarga los feeds configurados y muestra un resumen. Devuelve las estadísticas."""
+    configuracion = cargar_configuracion(ruta_configuracion)
+    almacen = AlmacenNoticias(ruta_almacen)
+    inicio = time.perf_counter()
+    try:
+        estadisticas = asyncio.run(descargar_feeds(configuracion, almacen, api_key, url_base))
+        print(f"\n✅ {len(configuracion['feeds'])} feeds en {time.perf_counter() - inicio:.1f} s: "
+              f"{estadisticas['peticiones']} peticiones, {estadisticas['nuevas']} noticias nuevas, "
+              f"{estadisticas['duplicadas']} repetidas, {estadisticas['sin_cambios']} sin cambios, "
+              f"{estadisticas['errores']} errores.")
+        print(f"🕒 Pendientes de análisis: {almacen.contar(ESTADO_PENDIENTE)}\n")
+    finally:
+        almacen.cerrar()
+    return estadisticas
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Descarga en paralelo los feeds de GNews configurados.")
+    parser.add_argument("--config", default="feeds.json", help="Archivo JSON con los feeds a descargar.")
+    parser.add_argument("--almacen", default="noticias.sqlite")
+    parser.add_argument("--url-base", default=None, help="Sustituye la URL de la API (p. ej. el servidor local de pruebas).")
+    argumentos = parser.parse_args()
+    ejecutar(argumentos.config, argumentos.almacen, os.getenv("GNEWS_API_KEY"), argumentos.url_base)
@@ -0,0 +1,113 @@
+import re
+import unicodedata
+import zlib
+
+# Detección de noticias casi duplicadas (la misma noticia de agencia publicada por varios medios
+# con el título algo cambiado), para analizar cada historia una sola vez.
+# Cada texto se convierte en su conjunto de "shingles" (secuencias de k palabras) y se resume con una
+# firma MinHash: la fracción de posiciones iguales entre dos firmas estima la similitud de Jaccard.
+# Para no comparar todos con todos, las firmas se cortan en bandas (LSH): solo se comparan los textos
+# que coinciden en alguna banda entera, así que el coste crece casi linealmente con el número de noticias.
+
+MAX_LIDERES_POR_CUBETA = 8  # Comparaciones máximas de un texto dentro de una misma cubeta
+_MARCAS_DIACRITICAS = re.compile("[\u0300-\u036f]")  # Tildes y diéresis separadas por la normalización NFKD
+_PALABRA = re.compile(r"\w+")
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes ni signos de puntuación y con los espacios colapsados."""
+    texto = _MARCAS_DIACRITICAS.sub("", unicodedata.normalize("NFKD", texto.lower()))
+    return " ".join(_PALABRA.findall(texto))
+
+
+def shingles(texto, k=3):
+    """Conjunto de hashes de las secuencias de `k` palabras seguidas del texto normalizado."""
+    palabras = normalizar(texto).split()
+    if len(palabras) <= k:
+        return {zlib.crc32(" ".join(palabras).encode("utf-8"))}
+    return {zlib.crc32(" ".join(palabras[i:i + k]).encode("utf-8")) for i in range(len(palabras) - k + 1)}
+
+
+class _Grupos:
+    """Unión-búsqueda: cada texto apunta a su grupo; el representante es el índice más bajo."""
+
+    def __init__(self, n):
+        self.padre = list(range(n))
+
+    def raiz(self, i):
+        while self.padre[i] != i:
+            self.padre[i] = self.padre[self.padre[i]]
+            i = self.padre[i]
+        return i
+
+    def unir(self, a, b):
+        a, b = self.raiz(a), self.raiz(b)
+        if a != b:
+            self.padre[max(a, b)] = min(a, b)
+
+
+class DetectorDuplicados:
+    """Agrupa textos casi iguales con MinHash + LSH (similitud de Jaccard estimada >= `umbral`)."""
+
+    def __init__(self, umbral=0.8, num_permutaciones=128, bandas=16, k=3, semilla=42):
+        if num_permutaciones % bandas:
+            raise ValueError("num_permutaciones debe ser múltiplo de bandas")
+        import numpy as np  # Import tardío: solo hace falta si se detectan duplicados
+
+        self.np = np
+        self.umbral = umbral
+        self.bandas = bandas
+        self.filas = num_permutaciones // bandas
+        self.k = k
+        aleatorio = np.random.default_rng(semilla)
+        # Cada "permutación" es un hash multiplicativo: los 32 bits altos de (a * h + b) mod 2^64
+        # (el desbordamiento de uint64 hace el módulo gratis; a impar para que sea una biyección)
+        self.a = aleatorio.integers(0, 1 << 63, num_permutaciones, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = aleatorio.integers(0, 1 << 63, num_permutaciones, dtype=np.uint64)
+
+    def firma(self, texto):
+        """Firma MinHash del texto: el mínimo de cada permutación sobre sus shingles."""
+        return self.firmas([texto])[0]
+
+    def firmas(self, textos, shingles_por_bloque=4096):
+        """Firmas MinHash de varios textos, calculadas en bloques de shingles para acotar la memoria."""
+        np = self.np
+        conjuntos = [shingles(texto, self.k) for texto in textos]
+        resultado = np.empty((len(textos), len(self.a)), dtype=np.uint64)
+        inicio = 0
+        while inicio < len(conjuntos):
+            # Agrupar textos consecutivos hasta llenar el bloque (al menos uno)
+            fin, total = inicio, 0
+            while fin < len(conjuntos) and (fin == inicio or total + len(conjuntos[fin]) <= shingles_por_bloque):
+                total += len(conjuntos[fin])
+                fin += 1
+            hashes = np.fromiter((h for conjunto in conjuntos[inicio:fin] for h in conjunto), dtype=np.uint64, count=total)
+            desplazamientos = np.cumsum([0] + [len(c) for c in conjuntos[inicio:fin - 1]])
+            permutados = (np.multiply.outer(hashes, self.a) + self.b) >> np.uint64(32)
+            resultado[inicio:fin] = np.minimum.reduceat(permutados, desplazamientos, axis=0)
+            inicio = fin
+        return resultado
+
+    def agrupar(self, textos):
+        """Devuelve, para cada texto, el índice del representante de su grupo (él mismo si no tiene duplicados)."""
+        if not textos:
+            return []
+        firmas = self.firmas(textos)
+        grupos = _Grupos(len(textos))
+        for banda in range(self.bandas):
+            columnas = firmas[:, banda * self.filas:(banda + 1) * self.filas]
+            cubetas = {}
+            for i, fila in enumerate(columnas):
+                cubetas.setdefault(fila.tobytes(), []).append(i)
+            for miembros in cubetas.values():
+                if len(miembros) < 2:
+                    continue
+                # Cada miembro se compara solo con unos pocos "líderes" de la cubeta (no con todos)
+                lideres = [miembros[0]]
+                for i in miembros[1:]:
+                    similar = next((l for l in lideres if (firmas[i] == firmas[l]).mean() >= self.umbral), None)
+                    if similar is not None:
+                        grupos.unir(similar, i)
+                    elif len(lideres) < MAX_LIDERES_POR_CUBETA:
+                        lideres.append(i)
+        return [grupos.raiz(i) for i in range(len(textos))]
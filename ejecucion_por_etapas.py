@@ -0,0 +1,241 @@
+import gc
+import json
+import os
+import shutil
+import time
+import weakref
+
+import analizar_filtrar
+import paquete_modelos
+from memoria import MonitorMemoria, rss_actual_mb, rss_maximo_mb
+
+# Ejecución del análisis por etapas con un presupuesto de memoria (--max-memory).
+# Con todos los modelos cargados a la vez (dos bart-large, BERT, DistilRoBERTa y bert-tiny) hacen falta
+# varios GB de RAM. En este modo cada etapa (sentimiento, fake news, emoción, temática, resumen) recorre
+# todas las noticias con un solo modelo en memoria: antes de la etapa se descarga cualquier otro modelo,
+# sus resultados se vuelcan a disco (un JSONL por etapa en `directorio_etapas`) y, al terminar, su modelo
+# se libera. La cascada y el ensamblado final leen esos archivos, así que el resultado es idéntico al
+# del análisis normal. Al final se muestra el pico de RSS y la memoria y los modelos de cada etapa.
+# El presupuesto decide qué se carga: un modelo que no cabe ni estando solo en memoria (según el tamaño de
+# sus pesos en el paquete local o, si no está en el paquete, según la memoria medida al cargarlo) no se usa,
+# y el análisis se detiene con ErrorPresupuestoMemoria antes de pasar ninguna noticia por él.
+# Uso: python analizar_filtrar.py --max-memory 2GB
+
+UNIDADES = {"": 1, "K": 1 / 1024, "M": 1, "G": 1024, "T": 1024 * 1024}
+
+
+class ErrorPresupuestoMemoria(MemoryError):
+    """Un modelo no cabe en el presupuesto de --max-memory ni siendo el único en memoria."""
+
+
+def parsear_memoria(texto):
+    """Convierte "1500", "1500MB", "2G" o "2GB" a megabytes."""
+    limpio = texto.strip().upper().removesuffix("B").removesuffix("I")
+    unidad = limpio[-1] if limpio and limpio[-1] in UNIDADES else ""
+    try:
+        valor = float(limpio[:len(limpio) - len(unidad)])
+    except ValueError:
+        raise ValueError(f"Memoria no válida: '{texto}' (ejemplos: 1500MB, 2GB).")
+    return valor * UNIDADES[unidad]
+
+
+def liberar_memoria():
+    """Recolecta basura y devuelve al sistema la memoria libre del heap (glibc no lo hace por sí solo)."""
+    gc.collect()
+    try:
+        import ctypes
+
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass  # Sin glibc (macOS, musl...): la memoria se reutiliza igualmente dentro del proceso
+
+
+class ResultadosEnDisco:
+    """Resultados intermedios de cada etapa en un JSONL (una línea por texto, en el orden de entrada)."""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        shutil.rmtree(directorio, ignore_errors=True)  # Restos de una ejecución interrumpida
+        os.makedirs(directorio)
+
+    def _ruta(self, etapa):
+        return os.path.join(self.directorio, f"{etapa}.jsonl")
+
+    def guardar(self, etapa, resultados):
+        with open(self._ruta(etapa), "w", encoding="utf-8") as f:
+            for resultado in resultados:
+                f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+
+    def leer(self, etapa):
+        """Genera los resultados de la etapa con el mismo tipo que devuelve el análisis."""
+        with open(self._ruta(etapa), "r", encoding="utf-8") as f:
+            for linea in f:
+                yield analizar_filtrar._desde_cache(json.loads(linea))
+
+    def leer_compuestos(self, etapa):
+        """Como `leer`, para etapas en las que cada línea es una tupla de resultados (el ensamblado final)."""
+        with open(self._ruta(etapa), "r", encoding="utf-8") as f:
+            for linea in f:
+                yield tuple(analizar_filtrar._desde_cache(valor) for valor in json.loads(linea))
+
+    def borrar(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+
+class AnalisisEnDisco:
+    """Resultado del análisis por etapas: se recorre leyendo del disco, sin tenerlo entero en memoria.
+
+    Tiene `len` y se puede recorrer varias veces, como la lista de `analizar_filtrar.analizar_textos`.
+    La carpeta de resultados intermedios se borra cuando el objeto deja de usarse.
+    """
+
+    def __init__(self, resultados, total):
+        self._resultados = resultados
+        self._total = total
+        weakref.finalize(self, resultados.borrar)
+
+    def __len__(self):
+        return self._total
+
+    def __iter__(self):
+        yield from self._resultados.leer_compuestos("analisis")  # El generador mantiene vivo el objeto (y la carpeta)
+
+
+def tamano_estimado_mb(nombre):
+    """Tamaño aproximado del modelo en memoria (sus pesos en el paquete local) o None si no se conoce."""
+    _, modelo, opciones = analizar_filtrar.registro_modelos.especificacion(nombre)
+    entrada = paquete_modelos.entrada_paquete(modelo, opciones.get("revision"), opciones.get("paquete"))
+    if entrada is None:
+        return None
+    return sum(datos["bytes"] for archivo, datos in entrada["archivos"].items()
+               if archivo.endswith(".safetensors")) / (1024 * 1024)
+
+
+class EjecutorEtapas:
+    """Ejecuta las etapas de una en una con un solo modelo en memoria y vuelca sus resultados a disco."""
+
+    def __init__(self, max_memoria_mb, directorio):
+        self.max_memoria_mb = max_memoria_mb
+        self.registro = analizar_filtrar.registro_modelos
+        self.resultados = ResultadosEnDisco(directorio)
+        self.informe = []  # Una entrada por etapa: modelos, tiempo y memoria
+
+    def _modelos_cargados(self):
+        return [nombre for nombre in self.registro.nombres() if self.registro.esta_cargado(nombre)]
+
+    def _descargar(self, nombres):
+        for nombre in nombres:
+            self.registro.descargar(nombre)
+        if nombres:
+            liberar_memoria()
+
+    def _hacer_sitio(self, etapa, modelo):
+        """Descarga los demás modelos y rechaza el de la etapa si su tamaño no cabe en lo que queda del presupuesto."""
+        self._descargar([nombre for nombre in self._modelos_cargados() if nombre != modelo])
+        libres = self.max_memoria_mb - rss_actual_mb()
+        estimado = tamano_estimado_mb(modelo)
+        if estimado is not None and estimado > libres:
+            raise ErrorPresupuestoMemoria(
+                f"{etapa}: el modelo '{modelo}' ocupa unos {estimado:.0f} MB y, aun siendo el único en memoria, solo "
+                f"quedan {libres:.0f} MB del presupuesto de {self.max_memoria_mb:.0f} MB. Sube --max-memory.")
+
+    def _constructor_con_presupuesto(self, etapa):
+        """Constructor del registro que comprueba, recién cargado cada modelo, que el proceso sigue en el presupuesto."""
+        constructor = self.registro.constructor
+
+        def construir(tarea, model=None, **opciones):
+            if constructor is None:
+                from transformers import pipeline as constructor_hf
+
+                pipeline = constructor_hf(tarea, model=model, **opciones)
+            else:
+                pipeline = constructor(tarea, model=model, **opciones)
+            rss = rss_actual_mb()
+            if rss > self.max_memoria_mb:
+                del pipeline
+                liberar_memoria()
+                raise ErrorPresupuestoMemoria(
+                    f"{etapa}: con '{model}' cargado (el único modelo en memoria) el proceso ocupa {rss:.0f} MB, "
+                    f"más que el presupuesto de {self.max_memoria_mb:.0f} MB. Sube --max-memory.")
+            return pipeline
+        return construir
+
+    def ejecutar(self, etapa, modelo, analizar_lote, textos, tamano):
+        """Pasa los textos por `analizar_lote`, guarda los resultados en disco y libera el modelo."""
+        self._hacer_sitio(etapa, modelo)
+        rss_inicio = rss_actual_mb()
+        inicio = time.perf_counter()
+        constructor, self.registro.constructor = self.registro.constructor, self._constructor_con_presupuesto(etapa)
+        try:
+            with MonitorMemoria() as monitor:
+                resultados = analizar_lote(textos, tamano)
+        finally:
+            self.registro.constructor = constructor
+        segundos = time.perf_counter() - inicio
+        residentes = self._modelos_cargados()
+        self.resultados.guardar(etapa, resultados)
+        del resultados
+        self._descargar(residentes)  # Cada modelo se usa en una sola etapa
+
+        fila = {"etapa": etapa, "textos": len(textos), "modelos": residentes, "segundos": segundos,
+                "rss_inicio_mb": rss_inicio, "rss_pico_mb": monitor.pico, "rss_final_mb": rss_actual_mb()}
+        self.informe.append(fila)
+        for medida in ("inicio", "pico", "final"):
+            analizar_filtrar.metricas_analisis.fijar("noticias_memoria_mb", fila[f"rss_{medida}_mb"],
+                                                     etapa=etapa, medida=medida)
+
+    def imprimir_informe(self):
+        print(f"\n{'etapa':<13}{'textos':>8}{'s':>8}{'RSS inicio':>12}{'pico':>9}{'tras liberar':>14}  modelos en memoria")
+        for fila in self.informe:
+            print(f"{fila['etapa']:<13}{fila['textos']:>8}{fila['segundos']:>8.1f}{fila['rss_inicio_mb']:>12.0f}"
+                  f"{fila['rss_pico_mb']:>9.0f}{fila['rss_final_mb']:>14.0f}  {', '.join(fila['modelos']) or '-'}")
+        pico = rss_maximo_mb()
+        aviso = "" if pico <= self.max_memoria_mb else " ⚠️ por encima del presupuesto"
+        print(f"📏 Pico de RSS del proceso: {pico:.0f} MB (presupuesto: {self.max_memoria_mb:.0f} MB){aviso}\n")
+        analizar_filtrar.metricas_analisis.fijar("noticias_memoria_mb", pico, etapa="total", medida="pico")
+
+
+def analizar_textos(textos, tamano=analizar_filtrar.tamano_lote, max_memoria_mb=None,
+                    directorio=analizar_filtrar.directorio_etapas):
+    """Igual que `analizar_filtrar.analizar_textos`, pero etapa a etapa con un solo modelo en memoria."""
+    af = analizar_filtrar
+    ejecutor = EjecutorEtapas(max_memoria_mb, directorio)
+    print(f"🧮 Análisis por etapas con un presupuesto de {max_memoria_mb:.0f} MB "
+          f"(resultados intermedios en '{directorio}')...")
+    try:
+        print(f"Analizando sentimiento ({len(textos)} textos, lotes de {tamano})...")
+        ejecutor.ejecutar("sentimiento", "sentimiento", af.analizar_sentimiento_lote, textos, tamano)
+        print("Analizando fake news...")
+        ejecutor.ejecutar("fake_news", "fake_news", af.analizar_fake_news_lote, textos, tamano)
+        print("Analizando emociones...")
+        ejecutor.ejecutar("emocional", "emocional", af.analizar_emocional_lote, textos, tamano)
+
+        # La cascada y el ensamblado leen los resultados del disco noticia a noticia
+        conservados = af.indices_conservados(*(ejecutor.resultados.leer(etapa)
+                                               for etapa in ("sentimiento", "fake_news", "emocional")))
+        textos_conservados = [textos[i] for i in conservados]
+        omitidos = len(textos) - len(conservados)
+        print("Clasificando temática...")
+        ejecutor.ejecutar("tematica", af._modelo_tematica(), af.analizar_tematica_lote, textos_conservados, tamano)
+        af.contar_omitidos("tematica", len(conservados), omitidos)
+        print("Generando resúmenes...\n")
+        ejecutor.ejecutar("resumen", "resumen", af.resumir_texto_lote, textos_conservados, tamano)
+        af.contar_omitidos("resumen", len(conservados), omitidos)
+
+        # Ensamblado (a otro JSONL): las noticias omitidas por la cascada reciben los resultados "omitidos"
+        conservados = set(conservados)
+        tematica, resumenes = ejecutor.resultados.leer("tematica"), ejecutor.resultados.leer("resumen")
+
+        def ensamblar():
+            for i, (sentimiento, fake, emocional) in enumerate(zip(*(ejecutor.resultados.leer(etapa)
+                                                                     for etapa in ("sentimiento", "fake_news", "emocional")))):
+                if i in conservados:
+                    yield sentimiento, fake, next(tematica), emocional, next(resumenes)
+                else:
+                    yield sentimiento, fake, af.TEMATICA_OMITIDA, emocional, af.RESUMEN_OMITIDO
+        ejecutor.resultados.guardar("analisis", ensamblar())
+        ejecutor.imprimir_informe()
+        return AnalisisEnDisco(ejecutor.resultados, len(textos))
+    except BaseException:
+        ejecutor.resultados.borrar()
+        raise
@@ -0,0 +1,177 @@
+import argparse
+import itertools
+import json
+import os
+
+import almacen_resultados
+import analizar_filtrar
+from instantaneas import escribir_json
+
+# Modo streaming del análisis: memoria acotada y resultados en disco desde el primer momento.
+# Las noticias se leen de una en una (array JSON o JSONL), pasan por etapas encadenadas como
+# generadores (analizar -> categorizar -> enrutar) y cada resultado se añade a un archivo JSONL
+# en cuanto está listo. Solo hay `max_en_vuelo` noticias en memoria a la vez, y si el proceso
+# se cae, lo ya escrito en el JSONL se conserva. Al final, una compactación incorpora el JSONL al
+# noticias_filtradas.json de siempre para app_web.py: como en analizar_filtrar.main, los resultados nuevos
+# se fusionan con los de ejecuciones anteriores y sustituyen a los de las noticias re-analizadas.
+# Uso: python flujo_streaming.py [--entrada noticias.json] [--salida noticias_filtradas.jsonl]
+
+TAMANO_BLOQUE_LECTURA = 1 << 16
+
+
+def _leer_array_json(f):
+    """Genera los elementos de un array JSON sin cargar el archivo completo en memoria."""
+    decodificador = json.JSONDecoder()
+    buffer = ""
+    # Saltar hasta el "[" inicial
+    while "[" not in buffer:
+        bloque = f.read(TAMANO_BLOQUE_LECTURA)
+        if not bloque:
+            return
+        buffer += bloque
+    buffer = buffer[buffer.index("[") + 1:]
+    while True:
+        buffer = buffer.lstrip().lstrip(",").lstrip()
+        if buffer.startswith("]"):
+            return
+        try:
+            elemento, fin = decodificador.raw_decode(buffer)
+        except json.JSONDecodeError:
+            # El elemento está incompleto: leer más (si no queda nada, el JSON está truncado)
+            bloque = f.read(TAMANO_BLOQUE_LECTURA)
+            if not bloque:
+                raise
+            buffer += bloque
+            continue
+        yield elemento
+        buffer = buffer[fin:]
+
+
+def leer_noticias(ruta):
+    """Genera las noticias de un archivo JSON (array) o JSONL (una noticia por línea), de una en una."""
+    with open(ruta, "r", encoding="utf-8") as f:
+        primer_caracter = ""
+        while not primer_caracter.strip():
+            primer_caracter = f.read(1)
+            if not primer_caracter:
+                return
+        f.seek(0)
+        if primer_caracter == "[":
+            yield from _leer_array_json(f)
+        else:
+            for linea in f:
+                if linea.strip():
+                    yield json.loads(linea)
+
+
+def etapa_analisis(noticias, tamano=analizar_filtrar.tamano_lote, max_en_vuelo=64):
+    """Analiza las noticias en bloques de `max_en_vuelo` y genera (noticia, análisis, tamaño de su grupo de duplicados)."""
+    noticias_validas = (n for n in noticias if analizar_filtrar.texto_para_analisis(n).strip() not in ("", "."))
+    while True:
+        bloque = list(itertools.islice(noticias_validas, max_en_vuelo))
+        if not bloque:
+            return
+        textos = [analizar_filtrar.texto_para_analisis(n) for n in bloque]
+        # Los duplicados solo se detectan dentro de cada bloque (la memoria sigue acotada)
+        analisis, tamanos_grupo = analizar_filtrar.analizar_agrupando_duplicados(
+            textos, lambda unicos: analizar_filtrar.analizar_textos(unicos, tamano))
+        analizar_filtrar.almacen_puntuaciones.agregar([n.get("url") or n.get("title") for n in bloque], analisis)
+        yield from zip(bloque, analisis, tamanos_grupo)
+
+
+def etapa_categorizacion(analizadas):
+    """Construye la noticia procesada (con su categoría final) a partir de cada análisis."""
+    for noticia_original, analisis, tamano_grupo in analizadas:
+        noticia_procesada = analizar_filtrar.construir_noticia_procesada(noticia_original, *analisis)
+        noticia_procesada["fuentes_misma_noticia"] = tamano_grupo
+        yield noticia_procesada
+
+
+def etapa_enrutado(procesadas, claves_analizadas=None):
+    """Decide a qué lista de noticias_filtradas.json va cada noticia; las que no entran en ninguna se descartan.
+
+    Si se pasa el conjunto `claves_analizadas`, se añade la clave de cada noticia (también de las descartadas),
+    para que la compactación sustituya o quite sus resultados anteriores.
+    """
+    for noticia_procesada in procesadas:
+        if claves_analizadas is not None:
+            claves_analizadas.add(analizar_filtrar._clave_noticia(noticia_procesada))
+        if analizar_filtrar.ruta_agregados:
+            analizar_filtrar.agregados_analisis.registrar(noticia_procesada)  # También las descartadas, como en main()
+        destino = analizar_filtrar.clasificar_noticia(noticia_procesada)
+        analizar_filtrar.metricas_analisis.incrementar("noticias_elementos_total", etapa="enrutado", sentido="salida",
+                                                       categoria=destino or "descartada")
+        if destino:
+            if analizar_filtrar.generar_miniaturas:
+                noticia_procesada["miniatura"] = analizar_filtrar.cache_miniaturas.obtener(noticia_procesada.get("imagen_url"))
+            yield destino, noticia_procesada
+
+
+def escribir_jsonl(enrutadas, ruta_salida):
+    """Añade cada resultado al JSONL en cuanto llega (y lo fuerza a disco). Devuelve cuántos escribió."""
+    escritas = 0
+    with open(ruta_salida, "a", encoding="utf-8") as f:
+        for destino, noticia_procesada in enrutadas:
+            f.write(json.dumps({"destino": destino, "noticia": noticia_procesada}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            escritas += 1
+            print(f"💾 [{escritas}] {destino}: {noticia_procesada.get('titulo') or 'Sin título'}")
+    return escritas
+
+
+def compactar(ruta_jsonl, ruta_salida=analizar_filtrar.ruta_salida_filtradas, claves_analizadas=()):
+    """Fusiona el JSONL de resultados con el noticias_filtradas.json que lee app_web.py.
+
+    Las noticias del JSONL y las de `claves_analizadas` sustituyen a su versión anterior. Devuelve
+    (resultados fusionados, listas con solo las noticias del JSONL).
+    """
+    listas = {"noticias_destacadas": [], "mejores_noticias": [], "peores_noticias": []}
+    for registro in leer_noticias(ruta_jsonl):
+        listas.setdefault(registro["destino"], []).append(registro["noticia"])
+    claves = set(claves_analizadas) | {analizar_filtrar._clave_noticia(n) for lista in listas.values() for n in lista}
+    fusionadas = analizar_filtrar.fusionar_resultados(analizar_filtrar.cargar_resultados_previos(ruta_salida), listas, claves)
+    escribir_json(ruta_salida, fusionadas)
+    print(f"✅ Compactación completada. Resultados guardados en '{ruta_salida}'")
+    return fusionadas, listas
+
+
+def ejecutar(ruta_entrada, ruta_jsonl, tamano=analizar_filtrar.tamano_lote, max_en_vuelo=64):
+    """Procesa `ruta_entrada` de principio a fin en modo streaming y compacta el resultado."""
+    analizar_filtrar.metricas_analisis.reiniciar()
+    if os.path.exists(ruta_jsonl):
+        os.remove(ruta_jsonl)  # Cada ejecución escribe su propio resultado desde cero
+    print(f"\n🌀 Analizando '{ruta_entrada}' en streaming (máximo {max_en_vuelo} noticias en memoria)...\n")
+    claves_analizadas = set()
+    flujo = etapa_enrutado(etapa_categorizacion(etapa_analisis(leer_noticias(ruta_entrada), tamano, max_en_vuelo)),
+                           claves_analizadas)
+    escritas = escribir_jsonl(flujo, ruta_jsonl)
+    print(f"\n📄 {escritas} noticias clasificadas escritas en '{ruta_jsonl}'")
+    analizar_filtrar.imprimir_estadisticas_cascada()
+    analizar_filtrar.almacen_puntuaciones.guardar()
+    analizar_filtrar.cache_miniaturas.guardar()
+    if analizar_filtrar.ruta_agregados:
+        with analizar_filtrar.metricas_analisis.medir("noticias_etapa_segundos", etapa="agregados"):
+            analizar_filtrar.agregados_analisis.guardar()
+
+    resultado_final_para_json, listas_nuevas = compactar(ruta_jsonl, claves_analizadas=claves_analizadas)
+    objetivas = analizar_filtrar.extraer_noticias_totalmente_objetivas(todas_las_noticias_procesadas_completas=[],
+                                                                      noticias_ya_analizadas=resultado_final_para_json)
+    analizar_filtrar.publicar_resultados(resultado_final_para_json, objetivas)
+    conexion_resultados = almacen_resultados.conectar(analizar_filtrar.ruta_resultados)
+    # Solo se añaden (o sustituyen) las noticias de este archivo: la base conserva el resto del histórico
+    almacen_resultados.actualizar(conexion_resultados, listas_nuevas, claves_analizadas, analizar_filtrar.es_totalmente_objetiva)
+    conexion_resultados.close()
+    if analizar_filtrar.usar_cache:
+        analizar_filtrar.cache_analisis.imprimir_estadisticas()
+    analizar_filtrar.exportar_metricas(modo="streaming", noticias_escritas=escritas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analiza un archivo de noticias en streaming con memoria acotada.")
+    parser.add_argument("--entrada", default=analizar_filtrar.ruta_noticias_json, help="Array JSON o JSONL de noticias GNews.")
+    parser.add_argument("--salida", default="noticias_filtradas.jsonl", help="JSONL donde se van añadiendo los resultados.")
+    parser.add_argument("--tamano-lote", type=int, default=analizar_filtrar.tamano_lote)
+    parser.add_argument("--max-en-vuelo", type=int, default=64, help="Máximo de noticias en memoria a la vez.")
+    argumentos = parser.parse_args()
+    ejecutar(argumentos.entrada, argumentos.salida, argumentos.tamano_lote, argumentos.max_en_vuelo)
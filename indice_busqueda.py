@@ -0,0 +1,231 @@
+import argparse
+import collections
+import functools
+import itertools
+import re
+import time
+import unicodedata
+from array import array
+
+import numpy as np
+
+# Índice en memoria para los filtros y el buscador de app_web.py. Se construye una vez por versión
+# de los datos y después cada consulta son unas pocas operaciones de NumPy (pocos ms con 100k noticias):
+#   - Facetas (tema, emoción, categoría, veracidad y fuente): un índice invertido valor -> noticias,
+#     guardado como un bitmap empaquetado por valor (1 bit por noticia). Filtrar es OR dentro de una
+#     faceta y AND entre facetas; los recuentos salen de un bincount sobre el código de cada noticia.
+#   - Texto completo (título, descripción y resumen): BM25 sobre listas de apariciones por término
+#     (formato CSR), con la parte del score que no depende de la consulta ya calculada.
+# Uso: python indice_busqueda.py --sinteticas 100000 "economía digital"   # mide construcción y consultas
+
+CAMPOS_FACETAS = ("tema", "emocion", "categoria_final", "fake_news", "fuente_nombre")
+CAMPOS_TEXTO = ("titulo", "descripcion_original", "resumen")
+K1, B = 1.2, 0.75  # Parámetros habituales de BM25
+
+PALABRAS_VACIAS = set(
+    "de la que el en y a los del se las por un para con no una su al lo como mas pero sus le ya o este si porque "
+    "esta entre cuando muy sin sobre tambien me hasta hay donde quien desde todo nos durante todos uno les ni "
+    "contra otros ese eso ante ellos e esto mi antes algunos que unos yo otro otras otra el tanto esa estos mucho "
+    "quienes nada muchos cual poco ella estar estas algunas algo nosotros es son fue ha han ser".split()
+)
+
+
+_MARCAS = re.compile("[\u0300-\u036f]")  # Tildes y diéresis que quedan sueltas al descomponer (NFKD) las letras
+_PALABRA = re.compile(r"\w\w+")
+
+
+def tokenizar(texto):
+    """Términos de un texto: en minúsculas, sin tildes y sin palabras vacías."""
+    sin_tildes = _MARCAS.sub("", unicodedata.normalize("NFKD", (texto or "").lower()))
+    return [t for t in _PALABRA.findall(sin_tildes) if t not in PALABRAS_VACIAS]
+
+
+def valor_faceta(noticia, campo):
+    valor = noticia.get(campo) or ""
+    return valor.lower() if campo == "emocion" else str(valor)  # Igual que la columna de la base de resultados
+
+
+class IndiceNoticias:
+    """Facetas con bitmaps y búsqueda BM25 sobre una lista fija de noticias procesadas."""
+
+    def __init__(self, noticias):
+        inicio = time.perf_counter()
+        self.noticias = list(noticias)
+        n = len(self.noticias)
+        # Orden por defecto: las más recientes primero (como las consultas de la base de resultados)
+        fechas = [noticia.get("fecha_publicacion") or "" for noticia in self.noticias]
+        self.orden_fecha = np.array(sorted(range(n), key=lambda i: fechas[i], reverse=True), dtype=np.int64)
+        self.rango_fecha = np.empty(n, dtype=np.int64)
+        self.rango_fecha[self.orden_fecha] = np.arange(n)
+
+        # --- Facetas ---
+        self.valores = {}   # campo -> valores distintos (los más frecuentes primero)
+        self.codigos = {}   # campo -> código del valor de cada noticia
+        self.bitmaps = {}   # campo -> matriz (valores x bytes) con un bitmap empaquetado por valor
+        self._posiciones = {}  # campo -> {valor: código}
+        for campo in CAMPOS_FACETAS:
+            columna = [valor_faceta(noticia, campo) for noticia in self.noticias]
+            valores = [valor for valor, _ in collections.Counter(columna).most_common()]
+            posicion = {valor: i for i, valor in enumerate(valores)}
+            codigos = np.fromiter((posicion[valor] for valor in columna), dtype=np.int32, count=n)
+            bitmaps = np.empty((len(valores), -(-n // 8)), dtype=np.uint8)
+            for codigo in range(len(valores)):
+                bitmaps[codigo] = np.packbits(codigos == codigo)
+            self.valores[campo], self.codigos[campo], self.bitmaps[campo] = valores, codigos, bitmaps
+            self._posiciones[campo] = posicion
+
+        # --- Texto completo (BM25) ---
+        vocabulario = collections.defaultdict(itertools.count().__next__)  # Término nuevo -> siguiente id
+        terminos, longitudes = array("i"), np.zeros(n, dtype=np.float32)
+        for d, noticia in enumerate(self.noticias):
+            tokens = tokenizar(" ".join(noticia.get(campo) or "" for campo in CAMPOS_TEXTO))
+            terminos.extend([vocabulario[t] for t in tokens])
+            longitudes[d] = len(tokens)
+        self.vocabulario = dict(vocabulario)  # Sin el valor por defecto: buscar un término no lo añade
+        documentos = np.repeat(np.arange(n, dtype=np.int64), longitudes.astype(np.int64))
+        # Pares (término, noticia) distintos con su frecuencia, ya ordenados por término y después por noticia
+        pares, frecuencias = np.unique(np.frombuffer(terminos, dtype=np.int32).astype(np.int64) * max(n, 1) + documentos,
+                                       return_counts=True)
+        self._documentos = (pares % max(n, 1)).astype(np.int32)
+        frecuencias = frecuencias.astype(np.float32)
+        self._inicios = np.searchsorted(pares // max(n, 1), np.arange(len(self.vocabulario) + 1))
+        # Parte de BM25 que solo depende de la noticia y del término: tf saturada y normalizada por longitud
+        media = longitudes.mean() if n else 1.0
+        normalizacion = K1 * (1 - B + B * longitudes[self._documentos] / max(media, 1.0))
+        self._pesos = frecuencias * (K1 + 1) / (frecuencias + normalizacion)
+        apariciones = np.diff(self._inicios)
+        self._idf = np.log(1 + (n - apariciones + 0.5) / (apariciones + 0.5)).astype(np.float32)
+        # Caché de los scores de las últimas consultas (por instancia: muere con el índice)
+        self._puntuaciones = functools.lru_cache(maxsize=16)(self._calcular_puntuaciones)
+        self.segundos_construccion = time.perf_counter() - inicio
+
+    def __len__(self):
+        return len(self.noticias)
+
+    # --- Consultas ---
+
+    def _calcular_puntuaciones(self, consulta):
+        """Score BM25 de cada noticia para la consulta (None si la consulta no tiene términos)."""
+        terminos = [self.vocabulario.get(t) for t in dict.fromkeys(tokenizar(consulta))]
+        if not terminos:
+            return None
+        puntuaciones = np.zeros(len(self.noticias), dtype=np.float32)
+        for termino in terminos:
+            if termino is None:
+                continue  # Término que no aparece en ninguna noticia
+            inicio, fin = self._inicios[termino], self._inicios[termino + 1]
+            puntuaciones[self._documentos[inicio:fin]] += self._idf[termino] * self._pesos[inicio:fin]
+        puntuaciones.flags.writeable = False  # Se comparte entre llamadas (caché)
+        return puntuaciones
+
+    def _mascara(self, filtros, excepto=None):
+        """Bitmap empaquetado de las noticias que cumplen los filtros (salvo los de la faceta `excepto`)."""
+        mascara = None
+        for campo, seleccionados in (filtros or {}).items():
+            if campo == excepto or not seleccionados:
+                continue
+            codigos = [self._posiciones[campo][v] for v in seleccionados if v in self._posiciones[campo]]
+            bits = (np.bitwise_or.reduce(self.bitmaps[campo][codigos], axis=0) if codigos
+                    else np.zeros(self.bitmaps[campo].shape[1], dtype=np.uint8))
+            mascara = bits if mascara is None else mascara & bits
+        return mascara
+
+    def _coincidencias(self, consulta, filtros, excepto=None):
+        """Array booleano de las noticias que cumplen filtros y consulta (None si no hay ninguna restricción)."""
+        mascara = self._mascara(filtros, excepto)
+        seleccion = None if mascara is None else np.unpackbits(mascara, count=len(self.noticias)).astype(bool)
+        puntuaciones = self._puntuaciones(consulta.strip()) if consulta else None
+        if puntuaciones is not None:
+            seleccion = puntuaciones > 0 if seleccion is None else seleccion & (puntuaciones > 0)
+        return seleccion, puntuaciones
+
+    def buscar(self, consulta="", filtros=None, limite=20, desplazamiento=0):
+        """Devuelve (página de noticias, total). Con consulta, por relevancia BM25; sin ella, las más recientes primero."""
+        seleccion, puntuaciones = self._coincidencias(consulta, filtros)
+        if seleccion is None:
+            ids = self.orden_fecha
+        elif puntuaciones is None:
+            ids = self.orden_fecha[seleccion[self.orden_fecha]]
+        else:
+            candidatos = np.flatnonzero(seleccion)
+            necesarios = desplazamiento + limite
+            if len(candidatos) > necesarios:  # Solo se ordenan los que pueden salir en la página
+                candidatos = candidatos[np.argpartition(-puntuaciones[candidatos], necesarios - 1)[:necesarios]]
+            ids = candidatos[np.lexsort((self.rango_fecha[candidatos], -puntuaciones[candidatos]))]
+            return [self.noticias[i] for i in ids[desplazamiento:necesarios]], int(seleccion.sum())
+        total = len(ids)
+        return [self.noticias[i] for i in ids[desplazamiento:desplazamiento + limite]], total
+
+    def facetas(self, consulta="", filtros=None):
+        """Recuento de cada valor de cada faceta, {campo: [(valor, n), ...]}.
+
+        Cada faceta se cuenta con la consulta y los filtros de las demás (no con los suyos), para que
+        sigan apareciendo las alternativas a lo ya seleccionado.
+        """
+        recuentos = {}
+        for campo in CAMPOS_FACETAS:
+            seleccion, _ = self._coincidencias(consulta, filtros, excepto=campo)
+            codigos = self.codigos[campo] if seleccion is None else self.codigos[campo][seleccion]
+            cuentas = np.bincount(codigos, minlength=len(self.valores[campo]))
+            recuentos[campo] = [(valor, int(cuenta)) for valor, cuenta in zip(self.valores[campo], cuentas)]
+        return recuentos
+
+
+def noticias_sinteticas(cantidad, semilla=0):
+    """Noticias procesadas inventadas (con el formato de noticias_filtradas.json) para medir el índice."""
+    import random
+
+    generador = random.Random(semilla)
+    palabras = ("gobierno economía salud hospital vacuna elecciones congreso empresa mercado inflación "
+                "tecnología inteligencia artificial datos fútbol liga selección clima lluvia sequía "
+                "universidad estudiantes ciencia espacio museo festival cine música empleo turismo").split()
+    temas = ["salud", "tecnología", "educación", "deportes", "economía", "entretenimiento", "política", "ciencia"]
+    emociones = ["neutral", "joy", "sadness", "anger", "fear", "surprise", "disgust"]
+    categorias = ["Buena/Objetiva", "Subjetiva pero verdadera", "Dudosa/Falsa", "Veracidad no determinada"]
+    frase = lambda n: " ".join(generador.choice(palabras) for _ in range(n))
+    return [{
+        "titulo": frase(10).capitalize(),
+        "descripcion_original": frase(30),
+        "resumen": frase(25),
+        "url_noticia": f"https://medio.local/{i}",
+        "fuente_nombre": f"Medio {generador.randrange(200)}",
+        "fecha_publicacion": f"2024-{generador.randint(1, 12):02d}-{generador.randint(1, 28):02d}T10:00:00Z",
+        "tema": generador.choice(temas),
+        "emocion": generador.choice(emociones),
+        "categoria_final": generador.choice(categorias),
+        "fake_news": generador.choice(["LABEL_0", "LABEL_1"]),
+    } for i in range(cantidad)]
+
+
+def _medir(funcion, repeticiones=20):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return resultado, 1000 * (time.perf_counter() - inicio) / repeticiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construye el índice de búsqueda y mide sus consultas.")
+    parser.add_argument("consulta", nargs="?", default="economía digital")
+    parser.add_argument("--sinteticas", type=int, default=None, help="Usa N noticias inventadas en lugar de noticias_filtradas.json.")
+    argumentos = parser.parse_args()
+    if argumentos.sinteticas:
+        noticias = noticias_sinteticas(argumentos.sinteticas)
+    else:
+        from analizar_filtrar import cargar_resultados_previos
+
+        noticias = [noticia for lista in cargar_resultados_previos().values() for noticia in lista]
+    indice = IndiceNoticias(noticias)
+    print(f"📚 Índice de {len(indice)} noticias ({len(indice.vocabulario)} términos) construido en "
+          f"{indice.segundos_construccion:.1f} s")
+    filtros = {"tema": [indice.valores["tema"][0]], "fake_news": ["LABEL_1"]}
+    for descripcion, funcion in [
+        ("sin filtros", lambda: indice.buscar()),
+        (f"filtros {filtros}", lambda: indice.buscar(filtros=filtros)),
+        (f"búsqueda '{argumentos.consulta}'", lambda: (indice._puntuaciones.cache_clear(), indice.buscar(argumentos.consulta))[1]),
+        ("búsqueda + filtros", lambda: (indice._puntuaciones.cache_clear(), indice.buscar(argumentos.consulta, filtros))[1]),
+        ("recuentos de facetas", lambda: (indice._puntuaciones.cache_clear(), indice.facetas(argumentos.consulta, filtros))[1]),
+    ]:
+        resultado, milisegundos = _medir(funcion)
+        total = f"{resultado[1]} resultados" if isinstance(resultado, tuple) else f"{len(resultado)} facetas"
+        print(f"   - {descripcion}: {milisegundos:.2f} ms ({total})")
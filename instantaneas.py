@@ -0,0 +1,274 @@
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Publicación de los resultados para la web en versiones inmutables ("instantáneas").
+# Cada publicación escribe noticias_filtradas.json y noticias_objetivas.json en una carpeta temporal,
+# la renombra de una vez a `v000042/` y solo entonces actualiza `manifiesto.json` (también con
+# escritura a temporal + rename) con el número de la versión actual. Quien lee el manifiesto y después
+# la carpeta que nombra nunca ve un archivo a medio escribir: las carpetas publicadas no se modifican.
+# Cada versión incluye además `delta.json` con los cambios respecto a la anterior (noticias añadidas,
+# eliminadas y cambiadas de cada sección), así app_web.py actualiza su copia en memoria sin releerlo todo.
+# Se conservan las últimas `VERSIONES_CONSERVADAS` versiones. Varias publicaciones a la vez (p. ej.
+# analizar_filtrar.py y flujo_streaming.py) se turnan con un candado de archivo, así que cada una lee
+# la versión anterior y publica la siguiente sin pisar la de otra.
+
+DIRECTORIO = "instantaneas"
+MANIFIESTO = "manifiesto.json"
+ARCHIVO_FILTRADAS = "noticias_filtradas.json"
+ARCHIVO_OBJETIVAS = "noticias_objetivas.json"
+ARCHIVO_DELTA = "delta.json"
+VERSIONES_CONSERVADAS = 5
+CANDADO = ".publicacion.lock"
+ANTIGUEDAD_TEMPORALES = 3600  # Segundos sin tocar tras los que una carpeta temporal se da por abandonada
+SECCION_OBJETIVAS = "objetivas"  # Nombre de la lista de noticias_objetivas.json dentro de los deltas
+
+
+def escribir_json(ruta, datos, indent=4):
+    """Escribe el JSON en un temporal y lo renombra: los lectores ven el archivo anterior o el nuevo, nunca uno a medias."""
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=indent)
+    os.replace(temporal, ruta)
+
+
+def _leer_json(ruta):
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _carpeta_version(version):
+    return f"v{version:06d}"
+
+
+def leer_manifiesto(directorio=DIRECTORIO):
+    """Devuelve el manifiesto de la versión publicada (o None si aún no se ha publicado nada)."""
+    try:
+        return _leer_json(os.path.join(directorio, MANIFIESTO))
+    except FileNotFoundError:
+        return None
+
+
+def hay_instantaneas(directorio=DIRECTORIO):
+    return os.path.exists(os.path.join(directorio, MANIFIESTO))
+
+
+def lista_objetivas(contenido):
+    """Noticias de noticias_objetivas.json (que, si no hay ninguna, solo contiene un mensaje)."""
+    return contenido if isinstance(contenido, list) else []
+
+
+def _clave(noticia):
+    return noticia.get("url_noticia") or noticia.get("titulo")
+
+
+# --- Deltas ---
+
+def aplicar_cambios(lista, cambios):
+    """Aplica a una lista de noticias los cambios de una sección del delta."""
+    if "completa" in cambios:
+        return cambios["completa"]
+    eliminadas = set(cambios["eliminadas"])
+    cambiadas = {_clave(noticia): noticia for noticia in cambios["cambiadas"]}
+    resultado = [cambiadas.get(_clave(n), n) for n in lista if _clave(n) not in eliminadas] + cambios["anadidas"]
+    if "orden" in cambios:  # Solo si el orden no es el natural (conservadas en su sitio y nuevas al final)
+        por_clave = {_clave(n): n for n in resultado}
+        resultado = [por_clave[clave] for clave in cambios["orden"]]
+    return resultado
+
+
+def _cambios_lista(antes, despues):
+    """Cambios de una sección entre dos versiones (None si no cambió)."""
+    if antes == despues:
+        return None
+    claves_antes, claves_despues = [_clave(n) for n in antes], [_clave(n) for n in despues]
+    if len(set(claves_antes)) < len(claves_antes) or len(set(claves_despues)) < len(claves_despues):
+        return {"completa": despues}  # Con claves repetidas no se puede identificar cada noticia
+    previas = dict(zip(claves_antes, antes))
+    nuevas = dict(zip(claves_despues, despues))
+    cambios = {
+        "anadidas": [n for clave, n in nuevas.items() if clave not in previas],
+        "eliminadas": [clave for clave in previas if clave not in nuevas],
+        "cambiadas": [n for clave, n in nuevas.items() if clave in previas and previas[clave] != n],
+    }
+    if [_clave(n) for n in aplicar_cambios(antes, cambios)] != claves_despues:
+        cambios["orden"] = claves_despues
+    return cambios
+
+
+def calcular_delta(filtradas_antes, objetivas_antes, filtradas, objetivas):
+    """Delta entre dos versiones: {"secciones": {sección: cambios}, "objetivas": cambios o None}."""
+    secciones = {}
+    for seccion in dict.fromkeys([*filtradas_antes, *filtradas]):
+        if seccion not in filtradas:
+            secciones[seccion] = {"completa": None}  # La sección desaparece
+            continue
+        cambios = _cambios_lista(filtradas_antes.get(seccion, []), filtradas[seccion])
+        if cambios is not None:
+            secciones[seccion] = cambios
+    return {"secciones": secciones, "objetivas": _cambios_lista(objetivas_antes, objetivas)}
+
+
+def aplicar_delta(filtradas, objetivas, delta):
+    """Devuelve (filtradas, objetivas) de la versión siguiente a partir de las de la anterior y su delta."""
+    filtradas = dict(filtradas)
+    for seccion, cambios in delta["secciones"].items():
+        if cambios.get("completa", ...) is None:
+            filtradas.pop(seccion, None)
+        else:
+            filtradas[seccion] = aplicar_cambios(filtradas.get(seccion, []), cambios)
+    if delta["objetivas"] is not None:
+        objetivas = aplicar_cambios(objetivas, delta["objetivas"])
+    return filtradas, objetivas
+
+
+# --- Publicación (analizar_filtrar.py) ---
+
+@contextmanager
+def _candado_publicacion(directorio):
+    """Candado exclusivo entre procesos para publicar (flock: el sistema lo suelta si el proceso muere)."""
+    try:
+        import fcntl
+    except ImportError:  # Windows: sin candado entre procesos
+        yield
+        return
+    with open(os.path.join(directorio, CANDADO), "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def publicar(filtradas, objetivas, directorio=DIRECTORIO, conservar=VERSIONES_CONSERVADAS):
+    """Publica una versión nueva (`objetivas`: contenido de noticias_objetivas.json) y devuelve su número."""
+    os.makedirs(directorio, exist_ok=True)
+    with _candado_publicacion(directorio):  # Desde leer la versión actual hasta actualizar el manifiesto
+        return _publicar(filtradas, objetivas, directorio, conservar)
+
+
+def _publicar(filtradas, objetivas, directorio, conservar):
+    anterior = leer_manifiesto(directorio)
+    version = (anterior or {}).get("version", 0) + 1
+    carpeta = os.path.join(directorio, _carpeta_version(version))
+    temporal = os.path.join(directorio, f".{_carpeta_version(version)}.{os.getpid()}.tmp")
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+
+    escribir_json(os.path.join(temporal, ARCHIVO_FILTRADAS), filtradas)
+    escribir_json(os.path.join(temporal, ARCHIVO_OBJETIVAS), objetivas)
+    delta = None
+    if anterior is not None:
+        carpeta_anterior = os.path.join(directorio, anterior["carpeta"])
+        try:
+            delta = calcular_delta(_leer_json(os.path.join(carpeta_anterior, ARCHIVO_FILTRADAS)),
+                                   lista_objetivas(_leer_json(os.path.join(carpeta_anterior, ARCHIVO_OBJETIVAS))),
+                                   filtradas, lista_objetivas(objetivas))
+        except (OSError, ValueError):
+            pass  # Sin la versión anterior no hay delta: la web cargará esta versión completa
+    if delta is not None:
+        escribir_json(os.path.join(temporal, ARCHIVO_DELTA), {"desde": anterior["version"], "version": version, **delta},
+                      indent=None)
+
+    # Con el candado, una carpeta con este número solo puede ser de una publicación interrumpida (el manifiesto no la nombra)
+    shutil.rmtree(carpeta, ignore_errors=True)
+    os.rename(temporal, carpeta)
+    escribir_json(os.path.join(directorio, MANIFIESTO), {
+        "version": version,
+        "carpeta": _carpeta_version(version),
+        "delta_desde": anterior["version"] if delta is not None else None,
+        "totales": {**{seccion: len(lista) for seccion, lista in filtradas.items()},
+                    SECCION_OBJETIVAS: len(lista_objetivas(objetivas))},
+        "publicada": datetime.now().isoformat(timespec="seconds"),
+    })
+    _limpiar(directorio, version, conservar)
+    return version
+
+
+def _limpiar(directorio, version, conservar):
+    """Borra las versiones antiguas (salvo las `conservar` últimas) y los temporales abandonados.
+
+    Una carpeta temporal reciente puede ser la de otra publicación en curso, así que solo se borran las que
+    llevan más de `ANTIGUEDAD_TEMPORALES` segundos sin modificarse.
+    """
+    limite = time.time() - ANTIGUEDAD_TEMPORALES
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        if nombre.startswith(".v") and nombre.endswith(".tmp"):
+            try:
+                abandonada = os.stat(ruta).st_mtime < limite
+            except OSError:
+                continue  # Otra publicación acaba de renombrarla o borrarla
+            if abandonada:
+                shutil.rmtree(ruta, ignore_errors=True)
+        elif nombre.startswith("v") and nombre[1:].isdigit() and int(nombre[1:]) <= version - conservar:
+            shutil.rmtree(ruta, ignore_errors=True)
+
+
+# --- Lectura (app_web.py) ---
+
+class LectorInstantaneas:
+    """Copia en memoria de la versión publicada que se pone al día aplicando deltas.
+
+    `actual()` solo mira la fecha del manifiesto mientras no cambie; cuando hay una versión nueva,
+    aplica los deltas que faltan (o, si falta alguno, lee la versión completa).
+    """
+
+    def __init__(self, directorio=DIRECTORIO):
+        self.directorio = directorio
+        self.version = None
+        self.filtradas, self.objetivas = {}, []
+        self._firma_manifiesto = None
+        self._candado = threading.Lock()  # Streamlit atiende cada sesión en su propio hilo
+
+    def _firma(self):
+        try:
+            estado = os.stat(os.path.join(self.directorio, MANIFIESTO))
+            return estado.st_mtime_ns, estado.st_size, estado.st_ino
+        except OSError:
+            return None
+
+    def _cargar_completa(self, manifiesto):
+        carpeta = os.path.join(self.directorio, manifiesto["carpeta"])
+        self.filtradas = _leer_json(os.path.join(carpeta, ARCHIVO_FILTRADAS))
+        self.objetivas = lista_objetivas(_leer_json(os.path.join(carpeta, ARCHIVO_OBJETIVAS)))
+        self.version = manifiesto["version"]
+
+    def _aplicar_deltas(self, manifiesto):
+        """Lleva la copia hasta la versión del manifiesto con sus deltas. Devuelve False si falta alguno."""
+        filtradas, objetivas = self.filtradas, self.objetivas
+        for version in range(self.version + 1, manifiesto["version"] + 1):
+            try:
+                delta = _leer_json(os.path.join(self.directorio, _carpeta_version(version), ARCHIVO_DELTA))
+            except (OSError, ValueError):
+                return False
+            if delta["desde"] != version - 1:
+                return False
+            filtradas, objetivas = aplicar_delta(filtradas, objetivas, delta)
+        totales = {**{seccion: len(lista) for seccion, lista in filtradas.items()}, SECCION_OBJETIVAS: len(objetivas)}
+        if totales != manifiesto.get("totales", totales):
+            return False  # Por si acaso: si no cuadra, mejor leer la versión completa
+        self.filtradas, self.objetivas, self.version = filtradas, objetivas, manifiesto["version"]
+        return True
+
+    def actual(self):
+        """Devuelve (versión, noticias filtradas por sección, noticias objetivas) de la última versión publicada."""
+        with self._candado:
+            firma = self._firma()
+            if firma is None or firma == self._firma_manifiesto:
+                return self.version, self.filtradas, self.objetivas
+            for _ in range(3):  # Si se borra una versión mientras se lee (muchas publicaciones seguidas), se reintenta
+                manifiesto = leer_manifiesto(self.directorio)
+                try:
+                    if manifiesto["version"] != self.version:
+                        if self.version is None or self.version > manifiesto["version"] or not self._aplicar_deltas(manifiesto):
+                            self._cargar_completa(manifiesto)
+                    self._firma_manifiesto = firma
+                    break
+                except FileNotFoundError:
+                    firma = self._firma()
+            return self.version, self.filtradas, self.objetivas
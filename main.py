@@ -1,37 +1,16 @@
-import requests
 import os
-import json
 from dotenv import load_dotenv
 
-load_dotenv()
-API_KEY = os.getenv("GNEWS_API_KEY")
-
-url = f"Usa tu clave de API de gnew para obtener noticias"
-
-response = requests.get(url)
-print("Código de estado:", response.status_code)
+import descargador_feeds
 
-if response.status_code == 200:
-    data = response.json()
-    articles = data.get("articles", [])
-
-    if articles:
-        # Guardar en archivo JSON
-        with open("noticias.json", "w", encoding="utf-8") as f:
-            json.dump(articles, f, ensure_ascii=False, indent=4)
-        print("✅ Noticias guardadas en 'noticias.json'\n")
-
-        # Mostrar en consola
-        for i, articulo in enumerate(articles, 1):
-            print(f"\n📰 Noticia {i}")
-            print(f"Título: {articulo['title']}")
-            print(f"Descripción: {articulo['description']}")
-            print(f"Fuente: {articulo['source']['name']}")
-            print(f"URL: {articulo['url']}")
-    else:
-        print("No se encontraron noticias.")
-else:
-    print("Error:", response.status_code, response.text)
+# Descarga las noticias de todos los feeds configurados en feeds.json (temas, países, páginas)
+# en paralelo y las guarda en el almacén de noticias (las ya vistas, por URL o título, se descartan).
+# Para probar sin clave ni conexión: arranca servidor_gnews_local.py y define GNEWS_URL_BASE=http://127.0.0.1:8765/api/v4
 
+load_dotenv()
+API_KEY = os.getenv("GNEWS_API_KEY")
 
+if not API_KEY:
+    print("⚠️ Falta GNEWS_API_KEY en el archivo .env: usa tu clave de API de GNews para obtener noticias.")
 
+descargador_feeds.ejecutar("feeds.json", "noticias.sqlite", API_KEY, os.getenv("GNEWS_URL_BASE"))
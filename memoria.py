@@ -0,0 +1,52 @@
+import os
+import platform
+import resource
+import threading
+
+# Medición de la memoria residente (RSS) del proceso, compartida por la ejecución con presupuesto
+# de memoria (ejecucion_por_etapas.py), el benchmark (benchmark_pipeline.py) y el informe de
+# arranque del paquete de modelos (paquete_modelos.py).
+
+INTERVALO_MUESTREO = 0.05  # Segundos entre dos lecturas de la memoria residente en MonitorMemoria
+
+
+def rss_maximo_mb():
+    """Pico de memoria residente del proceso hasta ahora (ru_maxrss está en KB en Linux y en bytes en macOS)."""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if platform.system() == "Darwin" else pico / 1024
+
+
+def rss_actual_mb():
+    """Memoria residente actual del proceso (solo Linux; en otros sistemas, el pico hasta ahora)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return rss_maximo_mb()
+
+
+class MonitorMemoria:
+    """Context manager que muestrea la memoria residente en un hilo y guarda el pico del bloque."""
+
+    def __init__(self, intervalo=INTERVALO_MUESTREO):
+        self.intervalo = intervalo
+        self.pico = 0.0
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def _muestrear(self):
+        while True:
+            self.pico = max(self.pico, rss_actual_mb())
+            if self._parar.wait(self.intervalo):
+                return
+
+    def __enter__(self):
+        self.pico = rss_actual_mb()
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *excepcion):
+        self._parar.set()
+        self._hilo.join()
+        self.pico = max(self.pico, rss_actual_mb())
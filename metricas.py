@@ -0,0 +1,218 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Métricas de una ejecución del análisis: histogramas de tiempos, contadores (errores por etapa y tipo
+# de excepción, noticias que entran y salen de cada etapa, aciertos de caché...) y valores sueltos
+# (tiempos de carga de modelos). Al final se exportan en formato de texto de Prometheus (para el
+# "textfile collector" de node_exporter) y como un resumen JSON de la ejecución.
+# También incluye un perfilador opcional (cProfile o torch.profiler) para ejecuciones puntuales.
+
+LIMITES_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+DESCRIPCIONES = {
+    "noticias_modelo_segundos": "Duración de cada llamada a un modelo (un lote o un texto).",
+    "noticias_etapa_segundos": "Duración de cada etapa de la ejecución.",
+    "noticias_archivo_segundos": "Duración de las lecturas y escrituras de archivos.",
+    "noticias_errores_total": "Errores capturados, por etapa y tipo de excepción.",
+    "noticias_elementos_total": "Noticias que entran y salen de cada etapa, por categoría.",
+    "noticias_cache_total": "Consultas a la caché de análisis, por modelo y resultado.",
+    "noticias_carga_modelo_segundos": "Tiempo que tardó en cargarse cada modelo.",
+    "noticias_memoria_mb": "Memoria residente (MB) de cada etapa en la ejecución con presupuesto de memoria.",
+}
+
+
+def _clave(nombre, etiquetas):
+    return nombre, tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+def _formatear_etiquetas(etiquetas, extra=()):
+    pares = [*etiquetas, *extra]
+    if not pares:
+        return ""
+    escapar = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escapar(v)}"' for k, v in pares) + "}"
+
+
+class Metricas:
+    """Registro thread-safe de histogramas, contadores y valores, exportable a Prometheus y JSON."""
+
+    def __init__(self, limites=LIMITES_SEGUNDOS):
+        self.limites = tuple(limites)
+        self._candado = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._candado:
+            self.inicio = time.time()
+            self.histogramas = {}  # (nombre, etiquetas) -> {"cubetas": [...], "suma": s, "cuenta": n}
+            self.contadores = {}   # (nombre, etiquetas) -> valor
+            self.valores = {}      # (nombre, etiquetas) -> último valor
+
+    def observar(self, nombre, segundos, **etiquetas):
+        """Añade una medida de tiempo al histograma `nombre`."""
+        with self._candado:
+            histograma = self.histogramas.setdefault(
+                _clave(nombre, etiquetas), {"cubetas": [0] * (len(self.limites) + 1), "suma": 0.0, "cuenta": 0})
+            histograma["cubetas"][bisect.bisect_left(self.limites, segundos)] += 1
+            histograma["suma"] += segundos
+            histograma["cuenta"] += 1
+
+    def incrementar(self, nombre, cantidad=1, **etiquetas):
+        """Suma `cantidad` al contador `nombre`."""
+        if not cantidad:
+            return
+        with self._candado:
+            clave = _clave(nombre, etiquetas)
+            self.contadores[clave] = self.contadores.get(clave, 0) + cantidad
+
+    def fijar(self, nombre, valor, **etiquetas):
+        """Guarda el valor actual de una medida (p. ej. el tiempo de carga de un modelo)."""
+        with self._candado:
+            self.valores[_clave(nombre, etiquetas)] = valor
+
+    def registrar_error(self, etapa, error, **etiquetas):
+        """Cuenta un error capturado en `etapa` por su tipo de excepción."""
+        self.incrementar("noticias_errores_total", etapa=etapa, tipo=type(error).__name__, **etiquetas)
+
+    @contextmanager
+    def medir(self, nombre, **etiquetas):
+        """Mide la duración del bloque (también si lanza una excepción, que se deja pasar)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+    # --- Combinar métricas de varios procesos ---
+
+    def estado(self):
+        """Copia serializable (pickle) de las métricas, para enviarla desde un proceso trabajador."""
+        with self._candado:
+            return {
+                "histogramas": {clave: {**h, "cubetas": list(h["cubetas"])} for clave, h in self.histogramas.items()},
+                "contadores": dict(self.contadores),
+                "valores": dict(self.valores),
+            }
+
+    def fusionar(self, estado):
+        """Suma a estas métricas las de otro proceso (obtenidas con `estado()`)."""
+        with self._candado:
+            for clave, otro in estado["histogramas"].items():
+                propio = self.histogramas.setdefault(
+                    clave, {"cubetas": [0] * (len(self.limites) + 1), "suma": 0.0, "cuenta": 0})
+                propio["cubetas"] = [a + b for a, b in zip(propio["cubetas"], otro["cubetas"])]
+                propio["suma"] += otro["suma"]
+                propio["cuenta"] += otro["cuenta"]
+            for clave, valor in estado["contadores"].items():
+                self.contadores[clave] = self.contadores.get(clave, 0) + valor
+            self.valores.update(estado["valores"])
+
+    # --- Exportación ---
+
+    def _percentil(self, histograma, p):
+        """Estimación del percentil: límite superior de la cubeta donde cae."""
+        objetivo, acumulado = p / 100 * histograma["cuenta"], 0
+        for limite, cuenta in zip((*self.limites, float("inf")), histograma["cubetas"]):
+            acumulado += cuenta
+            if acumulado >= objetivo:
+                return limite
+        return float("inf")
+
+    def a_prometheus(self):
+        """Devuelve las métricas en formato de texto de Prometheus."""
+        with self._candado:
+            lineas = []
+            tipos = [("histogram", self.histogramas), ("counter", self.contadores), ("gauge", self.valores)]
+            for tipo, datos in tipos:
+                for nombre in sorted({nombre for nombre, _ in datos}):
+                    if nombre in DESCRIPCIONES:
+                        lineas.append(f"# HELP {nombre} {DESCRIPCIONES[nombre]}")
+                    lineas.append(f"# TYPE {nombre} {tipo}")
+                    for (n, etiquetas), valor in sorted(datos.items()):
+                        if n != nombre:
+                            continue
+                        if tipo != "histogram":
+                            lineas.append(f"{nombre}{_formatear_etiquetas(etiquetas)} {valor}")
+                            continue
+                        acumulado = 0
+                        for limite, cuenta in zip((*self.limites, "+Inf"), valor["cubetas"]):
+                            acumulado += cuenta
+                            lineas.append(f"{nombre}_bucket{_formatear_etiquetas(etiquetas, [('le', str(limite))])} {acumulado}")
+                        lineas.append(f"{nombre}_sum{_formatear_etiquetas(etiquetas)} {valor['suma']}")
+                        lineas.append(f"{nombre}_count{_formatear_etiquetas(etiquetas)} {valor['cuenta']}")
+            return "\n".join(lineas) + "\n"
+
+    def resumen(self, **extra):
+        """Resumen JSON de la ejecución: duración, contadores, valores y estadísticas de cada histograma."""
+        with self._candado:
+            fin = time.time()
+            return {
+                "inicio": datetime.fromtimestamp(self.inicio).isoformat(timespec="seconds"),
+                "fin": datetime.fromtimestamp(fin).isoformat(timespec="seconds"),
+                "duracion_segundos": round(fin - self.inicio, 3),
+                **extra,
+                "contadores": [{"nombre": n, "etiquetas": dict(e), "valor": v} for (n, e), v in sorted(self.contadores.items())],
+                "valores": [{"nombre": n, "etiquetas": dict(e), "valor": v} for (n, e), v in sorted(self.valores.items())],
+                "tiempos": [
+                    {
+                        "nombre": n, "etiquetas": dict(e), "cuenta": h["cuenta"], "total_segundos": round(h["suma"], 6),
+                        "media_segundos": round(h["suma"] / h["cuenta"], 6) if h["cuenta"] else 0.0,
+                        "p50_segundos": self._percentil(h, 50), "p95_segundos": self._percentil(h, 95),
+                        "p99_segundos": self._percentil(h, 99),
+                    }
+                    for (n, e), h in sorted(self.histogramas.items())
+                ],
+            }
+
+    def exportar(self, ruta_prometheus=None, ruta_resumen=None, **extra):
+        """Escribe (de forma atómica) el archivo de Prometheus y/o el resumen JSON."""
+        contenidos = []
+        if ruta_prometheus:
+            contenidos.append((ruta_prometheus, self.a_prometheus()))
+        if ruta_resumen:
+            resumen = json.dumps(self.resumen(**extra), ensure_ascii=False, indent=2, default=str)
+            contenidos.append((ruta_resumen, resumen))
+        for ruta, contenido in contenidos:
+            temporal = ruta + ".tmp"
+            with open(temporal, "w", encoding="utf-8") as f:
+                f.write(contenido)
+            os.replace(temporal, ruta)  # Prometheus nunca lee un archivo a medio escribir
+
+
+@contextmanager
+def perfilar(tipo=None, ruta="perfil_analisis"):
+    """Perfila el bloque con "cprofile" o "torch" (o no hace nada si `tipo` es None).
+
+    cProfile guarda `<ruta>.prof` (ábrelo con snakeviz o pstats) y muestra las funciones más costosas;
+    torch guarda `<ruta>.json` (ábrelo en chrome://tracing o Perfetto) y la tabla de operadores.
+    """
+    if tipo is None:
+        yield
+    elif tipo == "cprofile":
+        import cProfile
+        import pstats
+
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            perfil.dump_stats(ruta + ".prof")
+            pstats.Stats(perfil).sort_stats("cumulative").print_stats(25)
+            print(f"🔬 Perfil de cProfile guardado en '{ruta}.prof'")
+    elif tipo == "torch":
+        from torch.profiler import ProfilerActivity, profile
+
+        with profile(activities=[ProfilerActivity.CPU], record_shapes=True) as perfil:
+            yield
+        perfil.export_chrome_trace(ruta + ".json")
+        print(perfil.key_averages().table(sort_by="cpu_time_total", row_limit=25))
+        print(f"🔬 Traza de torch.profiler guardada en '{ruta}.json'")
+    else:
+        raise ValueError(f"Perfilador desconocido '{tipo}' (usa 'cprofile' o 'torch').")
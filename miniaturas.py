@@ -0,0 +1,157 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# Caché local de miniaturas para las tarjetas de la web.
+# Durante el análisis, cada imagen se descarga una sola vez, se reduce al tamaño de la tarjeta y se
+# guarda con el hash de su contenido como nombre (dos URLs con la misma imagen comparten archivo).
+# Un índice URL -> archivo evita volver a descargarla, y cuando la carpeta supera `max_megas` se
+# borran las miniaturas usadas hace más tiempo. La descarga pasa por un "fetcher" intercambiable:
+# cualquier función url -> bytes (por ejemplo, uno que lea archivos locales para probar sin red).
+
+
+class FetcherHTTP:
+    """Descarga imágenes por HTTP(S) con un tiempo máximo y un límite de tamaño."""
+
+    def __init__(self, timeout=10, max_bytes=10 * 1024 * 1024):
+        import requests  # Import tardío: solo hace falta si se descargan imágenes de verdad
+
+        self.sesion = requests.Session()  # Reutiliza conexiones con el mismo servidor
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+
+    def __call__(self, url):
+        with self.sesion.get(url, timeout=self.timeout, stream=True) as respuesta:
+            respuesta.raise_for_status()
+            contenido = respuesta.raw.read(self.max_bytes + 1, decode_content=True)
+        if len(contenido) > self.max_bytes:
+            raise ValueError(f"imagen de más de {self.max_bytes} bytes")
+        return contenido
+
+
+class FetcherArchivoLocal:
+    """Lee las "descargas" de disco: acepta rutas y URLs file://, o mapea el nombre del archivo a un directorio."""
+
+    def __init__(self, directorio_base=None):
+        self.directorio_base = directorio_base
+
+    def __call__(self, url):
+        partes = urlparse(url)
+        ruta = partes.path if partes.scheme in ("file", "") else None
+        if self.directorio_base:
+            ruta = os.path.join(self.directorio_base, os.path.basename(partes.path))
+        if ruta is None:
+            raise ValueError(f"URL no local: {url}")
+        with open(ruta, "rb") as f:
+            return f.read()
+
+
+class CacheMiniaturas:
+    """Miniaturas reducidas al tamaño de la tarjeta, direccionadas por contenido y con desalojo por tamaño."""
+
+    def __init__(self, directorio="miniaturas", tamano=(320, 180), max_megas=200, fetcher=None, calidad=80):
+        self.directorio = directorio
+        self.tamano = tamano
+        self.max_bytes = max_megas * 1024 * 1024
+        self.fetcher = fetcher
+        self.calidad = calidad
+        self._ruta_indice = os.path.join(directorio, "indice.json")
+        self._candado = threading.Lock()
+        self._indice = None  # hash de la URL -> nombre del archivo de la miniatura
+
+    def _cargar_indice(self):
+        if self._indice is None:
+            try:
+                with open(self._ruta_indice, "r", encoding="utf-8") as f:
+                    self._indice = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._indice = {}
+        return self._indice
+
+    def _guardar_indice(self):
+        temporal = self._ruta_indice + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(self._indice, f)
+        os.replace(temporal, self._ruta_indice)
+
+    def _reducir(self, contenido):
+        from PIL import Image  # Import tardío: Pillow solo hace falta para generar miniaturas
+
+        with Image.open(io.BytesIO(contenido)) as imagen:
+            imagen = imagen.convert("RGB")
+            imagen.thumbnail(self.tamano)  # Mantiene la proporción y nunca amplía
+            salida = io.BytesIO()
+            imagen.save(salida, format="JPEG", quality=self.calidad, optimize=True)
+            return salida.getvalue()
+
+    def obtener(self, url):
+        """Devuelve la ruta de la miniatura de `url` (descargándola si hace falta), o None si no se pudo."""
+        if not url:
+            return None
+        clave_url = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        with self._candado:
+            nombre = self._cargar_indice().get(clave_url)
+        if nombre and os.path.exists(os.path.join(self.directorio, nombre)):
+            ruta = os.path.join(self.directorio, nombre)
+            os.utime(ruta)  # Marca de uso reciente para el desalojo
+            return ruta
+        try:
+            if self.fetcher is None:
+                self.fetcher = FetcherHTTP()
+            miniatura = self._reducir(self.fetcher(url))
+        except Exception as e:
+            print(f"⚠️ No se pudo generar la miniatura de {url}: {e}")
+            return None
+        nombre = hashlib.sha256(miniatura).hexdigest()[:32] + ".jpg"
+        ruta = os.path.join(self.directorio, nombre)
+        with self._candado:
+            os.makedirs(self.directorio, exist_ok=True)
+            if not os.path.exists(ruta):
+                with open(ruta + ".tmp", "wb") as f:
+                    f.write(miniatura)
+                os.replace(ruta + ".tmp", ruta)
+            self._indice[clave_url] = nombre
+        return ruta
+
+    def obtener_varias(self, urls, hilos=8):
+        """Obtiene varias miniaturas en paralelo (la descarga es E/S) y guarda el índice una sola vez."""
+        with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+            rutas = list(ejecutor.map(self.obtener, urls))
+        self.guardar()
+        return rutas
+
+    def guardar(self):
+        """Guarda el índice en disco y aplica el límite de tamaño de la carpeta."""
+        with self._candado:
+            if self._indice:
+                self._guardar_indice()
+        self.desalojar()
+
+    def desalojar(self):
+        """Borra las miniaturas usadas hace más tiempo hasta que la carpeta quepa en `max_megas`."""
+        if not os.path.isdir(self.directorio):
+            return 0
+        with self._candado:
+            archivos = []
+            for nombre in os.listdir(self.directorio):
+                if nombre.endswith(".jpg"):
+                    estado = os.stat(os.path.join(self.directorio, nombre))
+                    archivos.append((estado.st_mtime, estado.st_size, nombre))
+            total = sum(tamano for _, tamano, _ in archivos)
+            borrados = set()
+            for _, tamano, nombre in sorted(archivos):
+                if total <= self.max_bytes:
+                    break
+                os.remove(os.path.join(self.directorio, nombre))
+                borrados.add(nombre)
+                total -= tamano
+            if borrados:
+                indice = self._cargar_indice()
+                for clave_url in [c for c, n in indice.items() if n in borrados]:
+                    del indice[clave_url]
+                self._guardar_indice()
+        return len(borrados)
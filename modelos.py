@@ -0,0 +1,76 @@
+import threading
+import time
+
+# Registro de modelos de IA con carga perezosa.
+# Cada modelo se declara con `registrar()` (sin cargar nada) y se construye la primera vez
+# que alguien lo pide con `obtener()`. Así, importar los módulos del proyecto es instantáneo
+# y solo se paga la carga (segundos y GB de RAM) de los modelos que realmente se usan.
+
+
+class RegistroModelos:
+    """Registro thread-safe de pipelines de Hugging Face que se cargan bajo demanda."""
+
+    def __init__(self, constructor=None):
+        # Función (tarea, model=..., **opciones) -> pipeline; por defecto, `transformers.pipeline`
+        self.constructor = constructor
+        self._especificaciones = {}  # nombre -> (tarea, modelo, opciones del pipeline)
+        self._modelos = {}           # nombre -> pipeline ya cargado
+        self._candados = {}          # nombre -> Lock propio, para no bloquear la carga de otros modelos
+        self._candado_registro = threading.Lock()
+        self.tiempos_carga = {}      # nombre -> segundos que tardó en cargarse
+
+    def registrar(self, nombre, tarea, modelo, **opciones):
+        """Declara un modelo sin cargarlo. Si ya estaba cargado con otra configuración, se descarta."""
+        with self._candado_registro:
+            especificacion = (tarea, modelo, opciones)
+            if self._especificaciones.get(nombre) != especificacion:
+                self._modelos.pop(nombre, None)
+                self.tiempos_carga.pop(nombre, None)
+            self._especificaciones[nombre] = especificacion
+            self._candados.setdefault(nombre, threading.Lock())
+
+    def especificacion(self, nombre):
+        """Devuelve (tarea, modelo, opciones) con los que se registró el modelo."""
+        try:
+            return self._especificaciones[nombre]
+        except KeyError:
+            raise KeyError(f"Modelo '{nombre}' no registrado. Registrados: {', '.join(self._especificaciones)}")
+
+    def nombres(self):
+        """Lista los nombres de los modelos registrados."""
+        return list(self._especificaciones)
+
+    def esta_cargado(self, nombre):
+        """Indica si el modelo ya está en memoria."""
+        return nombre in self._modelos
+
+    def obtener(self, nombre):
+        """Devuelve el pipeline del modelo, cargándolo la primera vez que se pide."""
+        modelo = self._modelos.get(nombre)
+        if modelo is not None:
+            return modelo
+        tarea, nombre_modelo, opciones = self.especificacion(nombre)
+        with self._candados[nombre]:
+            # Otro hilo pudo haberlo cargado mientras esperábamos el candado
+            modelo = self._modelos.get(nombre)
+            if modelo is None:
+                constructor = self.constructor
+                if constructor is None:
+                    from transformers import pipeline as constructor  # Import tardío: transformers/torch tardan en importarse
+
+                inicio = time.perf_counter()
+                modelo = constructor(tarea, model=nombre_modelo, **opciones)
+                self.tiempos_carga[nombre] = time.perf_counter() - inicio
+                self._modelos[nombre] = modelo
+        return modelo
+
+    def precargar(self, nombres=None):
+        """Carga por adelantado los modelos indicados (o todos) y devuelve sus tiempos de carga."""
+        for nombre in nombres or self.nombres():
+            self.obtener(nombre)
+        return {nombre: self.tiempos_carga[nombre] for nombre in nombres or self.nombres() if nombre in self.tiempos_carga}
+
+    def descargar(self, nombre):
+        """Libera el modelo de memoria; se volverá a cargar si se pide de nuevo."""
+        with self._candados[nombre]:
+            self._modelos.pop(nombre, None)
@@ -0,0 +1,239 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Paquete local de modelos para arrancar sin red (p. ej. en nodos sin acceso a internet).
+# `empaquetar` descarga una vez los modelos configurados en analizar_filtrar.py y guarda cada uno en
+# una carpeta con sus pesos en formato safetensors, su configuración y su tokenizer, más un
+# manifiesto con el modelo, la revisión (y el commit exacto), el tamaño y el SHA-256 de cada archivo.
+# Al cargar desde el paquete no se consulta el Hub: los pesos safetensors se mapean en memoria (mmap),
+# así que arrancar es casi instantáneo y varios procesos de la misma máquina comparten las mismas
+# páginas de memoria en lugar de tener cada uno su copia.
+# Uso:
+#   python paquete_modelos.py empaquetar [--modelos sentimiento resumen] [--directorio paquete_modelos]
+#   python paquete_modelos.py verificar     # comprueba los SHA-256 (p. ej. tras copiar el paquete a otra máquina)
+#   python paquete_modelos.py arranque      # compara el arranque en frío desde el Hub y desde el paquete
+
+DIRECTORIO_PAQUETE = "paquete_modelos"
+MANIFIESTO = "manifiesto.json"
+
+# Clase de transformers que corresponde a cada tarea de pipeline
+CLASES_MODELO = {
+    "text-classification": "AutoModelForSequenceClassification",
+    "zero-shot-classification": "AutoModelForSequenceClassification",
+    "summarization": "AutoModelForSeq2SeqLM",
+    "feature-extraction": "AutoModel",
+}
+
+
+def _carpeta_modelo(modelo, directorio=DIRECTORIO_PAQUETE):
+    return os.path.join(directorio, re.sub(r"[^\w.-]", "_", modelo))
+
+
+def _sha256(ruta):
+    resumen = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+def leer_manifiesto(directorio=DIRECTORIO_PAQUETE):
+    """Devuelve el manifiesto del paquete (o None si no hay paquete)."""
+    try:
+        with open(os.path.join(directorio, MANIFIESTO), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _guardar_manifiesto(manifiesto, directorio):
+    ruta = os.path.join(directorio, MANIFIESTO)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    os.replace(ruta + ".tmp", ruta)  # El manifiesto es lo último que se escribe: sin él, el modelo no se usa
+
+
+def entrada_paquete(modelo, revision=None, directorio=DIRECTORIO_PAQUETE):
+    """Entrada del manifiesto para el modelo y revisión indicados (o None si no está empaquetado)."""
+    manifiesto = leer_manifiesto(directorio) if directorio else None
+    entrada = (manifiesto or {}).get("modelos", {}).get(modelo)
+    if entrada and entrada["revision"] == (revision or "main"):
+        return entrada
+    return None
+
+
+def empaquetar(tarea, modelo, revision=None, directorio=DIRECTORIO_PAQUETE):
+    """Descarga el modelo y su tokenizer, los guarda en el paquete (pesos safetensors) y actualiza el manifiesto."""
+    import transformers
+
+    carpeta = _carpeta_modelo(modelo, directorio)
+    os.makedirs(carpeta, exist_ok=True)
+    modelo_cargado = getattr(transformers, CLASES_MODELO[tarea]).from_pretrained(modelo, revision=revision)
+    modelo_cargado.save_pretrained(carpeta, safe_serialization=True)
+    transformers.AutoTokenizer.from_pretrained(modelo, revision=revision).save_pretrained(carpeta)
+
+    archivos = {}
+    for nombre in sorted(os.listdir(carpeta)):
+        ruta = os.path.join(carpeta, nombre)
+        if os.path.isfile(ruta):
+            archivos[nombre] = {"bytes": os.path.getsize(ruta), "sha256": _sha256(ruta)}
+    if not any(nombre.endswith(".safetensors") for nombre in archivos):
+        raise RuntimeError(f"'{modelo}' no se guardó en formato safetensors.")
+
+    manifiesto = leer_manifiesto(directorio) or {"modelos": {}}
+    manifiesto["modelos"][modelo] = {
+        "tarea": tarea,
+        "revision": revision or "main",
+        "commit": getattr(modelo_cargado.config, "_commit_hash", None),  # Revisión exacta que se descargó
+        "carpeta": os.path.basename(carpeta),
+        "archivos": archivos,
+        "empaquetado": datetime.now().isoformat(timespec="seconds"),
+    }
+    manifiesto["versiones"] = {"transformers": transformers.__version__}
+    _guardar_manifiesto(manifiesto, directorio)
+    return carpeta
+
+
+def verificar(directorio=DIRECTORIO_PAQUETE):
+    """Comprueba que los archivos del paquete coinciden con el manifiesto. Devuelve la lista de problemas."""
+    manifiesto = leer_manifiesto(directorio)
+    if manifiesto is None:
+        return [f"No hay manifiesto en '{directorio}'."]
+    problemas = []
+    for modelo, entrada in manifiesto["modelos"].items():
+        for nombre, datos in entrada["archivos"].items():
+            ruta = os.path.join(directorio, entrada["carpeta"], nombre)
+            if not os.path.isfile(ruta):
+                problemas.append(f"{modelo}: falta '{nombre}'")
+            elif os.path.getsize(ruta) != datos["bytes"] or _sha256(ruta) != datos["sha256"]:
+                problemas.append(f"{modelo}: '{nombre}' no coincide con el manifiesto")
+    return problemas
+
+
+def cargar_pipeline(tarea, model, directorio=DIRECTORIO_PAQUETE, **opciones):
+    """Construye el pipeline desde el paquete, sin red y con los pesos mapeados en memoria."""
+    import transformers
+
+    entrada = entrada_paquete(model, opciones.pop("revision", None), directorio)
+    carpeta = os.path.join(directorio, entrada["carpeta"])
+    # Con safetensors y low_cpu_mem_usage, los tensores se crean sobre el archivo mapeado en memoria
+    # (no se lee ni se copia el archivo entero): las páginas se cargan al usarse y se comparten entre procesos
+    modelo_cargado = getattr(transformers, CLASES_MODELO[tarea]).from_pretrained(
+        carpeta, local_files_only=True, use_safetensors=True, low_cpu_mem_usage=True)
+    modelo_cargado.eval()
+    # El tokenizador también sale de la carpeta local, así que no hay consultas al Hub
+    tokenizador = transformers.AutoTokenizer.from_pretrained(carpeta, local_files_only=True)
+    return transformers.pipeline(tarea, model=modelo_cargado, tokenizer=tokenizador, **opciones)
+
+
+# --- Informe de arranque en frío ---
+
+def _memoria_mapeada_mb(directorio):
+    """MB residentes en memoria de archivos del paquete mapeados por este proceso (solo Linux)."""
+    try:
+        with open("/proc/self/smaps", "r", encoding="utf-8") as f:
+            lineas = f.readlines()
+    except OSError:
+        return None
+    raiz, total, en_paquete = os.path.abspath(directorio), 0, False
+    for linea in lineas:
+        partes = linea.split()
+        if len(partes) >= 5 and "-" in partes[0]:  # Cabecera de una región: "inicio-fin permisos ... [ruta]"
+            en_paquete = len(partes) >= 6 and partes[5].startswith(raiz)
+        elif en_paquete and partes and partes[0] == "Rss:":
+            total += int(partes[1])
+    return total / 1024
+
+
+def _medir_arranque(origen, directorio, nombres):
+    """Carga los modelos en este proceso (recién creado) desde el Hub o desde el paquete y mide cuánto tarda."""
+    inicio_total = time.perf_counter()
+    import backends_inferencia
+    import analizar_filtrar
+    from memoria import rss_maximo_mb
+
+    tiempos = {}
+    for nombre in nombres:
+        tarea, modelo, opciones = analizar_filtrar.registro_modelos.especificacion(nombre)
+        opciones = {k: v for k, v in opciones.items() if k not in ("backend", "paquete")}
+        inicio = time.perf_counter()
+        if origen == "paquete":
+            cargar_pipeline(tarea, modelo, directorio, **opciones)
+        else:
+            backends_inferencia.construir_pipeline(tarea, modelo, **opciones)
+        tiempos[nombre] = round(time.perf_counter() - inicio, 3)
+    return {
+        "origen": origen,
+        "segundos_total": round(time.perf_counter() - inicio_total, 3),  # Incluye importar transformers/torch
+        "segundos_por_modelo": tiempos,
+        "rss_maximo_mb": round(rss_maximo_mb(), 1),
+        "mapeado_mb": _memoria_mapeada_mb(directorio) if origen == "paquete" else None,
+    }
+
+
+def informe_arranque(directorio, nombres):
+    """Mide el arranque en frío desde el Hub y desde el paquete, cada uno en un proceso nuevo."""
+    informes = {}
+    for origen in ("hub", "paquete"):
+        proceso = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "_medir", "--origen", origen, "--directorio", directorio,
+             "--modelos", *nombres],
+            capture_output=True, text=True)
+        if proceso.returncode != 0:
+            print(f"🚨 No se pudo medir el arranque desde {origen}:\n{proceso.stderr.strip()[-1000:]}")
+            continue
+        informes[origen] = json.loads(proceso.stdout.strip().splitlines()[-1])
+
+    formatear = lambda segundos: "-" if segundos is None else f"{segundos:.2f}"
+    print(f"\n{'modelo':<14}{'hub (s)':>10}{'paquete (s)':>14}")
+    for nombre in nombres:
+        hub, paquete = (informes.get(o, {}).get("segundos_por_modelo", {}).get(nombre) for o in ("hub", "paquete"))
+        print(f"{nombre:<14}{formatear(hub):>10}{formatear(paquete):>14}")
+    for origen, informe in informes.items():
+        mapeado = f", {informe['mapeado_mb']:.0f} MB mapeados del paquete" if informe["mapeado_mb"] is not None else ""
+        print(f"⏱️ Arranque en frío desde {origen}: {informe['segundos_total']:.1f} s en total "
+              f"(RSS máximo {informe['rss_maximo_mb']:.0f} MB{mapeado})")
+    return informes
+
+
+def main():
+    import analizar_filtrar
+
+    parser = argparse.ArgumentParser(description="Empaqueta los modelos para cargarlos sin red y con mmap.")
+    parser.add_argument("accion", choices=["empaquetar", "verificar", "arranque", "_medir"])
+    parser.add_argument("--directorio", default=analizar_filtrar.directorio_paquete_modelos or DIRECTORIO_PAQUETE)
+    parser.add_argument("--modelos", nargs="*", default=None,
+                        help=f"Nombres del registro (por defecto los que usa la configuración: {', '.join(analizar_filtrar.modelos_en_uso())}).")
+    parser.add_argument("--origen", choices=["hub", "paquete"], default="paquete", help=argparse.SUPPRESS)
+    argumentos = parser.parse_args()
+    nombres = argumentos.modelos or analizar_filtrar.modelos_en_uso()
+
+    if argumentos.accion == "_medir":  # Uso interno de `arranque` (en un proceso nuevo, sin nada cargado)
+        print(json.dumps(_medir_arranque(argumentos.origen, argumentos.directorio, nombres)))
+    elif argumentos.accion == "empaquetar":
+        for nombre in nombres:
+            tarea, modelo, opciones = analizar_filtrar.registro_modelos.especificacion(nombre)
+            inicio = time.perf_counter()
+            carpeta = empaquetar(tarea, modelo, opciones.get("revision"), argumentos.directorio)
+            print(f"📦 {nombre}: '{modelo}' guardado en '{carpeta}' ({time.perf_counter() - inicio:.1f} s)")
+        print(f"✅ Manifiesto actualizado en '{os.path.join(argumentos.directorio, MANIFIESTO)}'")
+    elif argumentos.accion == "verificar":
+        problemas = verificar(argumentos.directorio)
+        for problema in problemas:
+            print(f"🚨 {problema}")
+        if problemas:
+            sys.exit(1)
+        print(f"✅ Todos los archivos de '{argumentos.directorio}' coinciden con el manifiesto.")
+    else:
+        informe_arranque(argumentos.directorio, nombres)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import argparse
+import glob
+import hashlib
+import os
+import time
+
+# Archivo columnar con los scores completos de cada noticia analizada: probabilidades de todas las
+# estrellas de sentimiento, de las dos etiquetas de fake news, de todas las emociones y de todas las
+# categorías temáticas (float32, NaN si el análisis falló o se omitió en la cascada).
+# Con esto, las reglas de enrutado (umbrales de estrellas, emociones...) se pueden cambiar después:
+# `python puntuaciones.py reenrutar` recalcula con NumPy, de una vez para todo el histórico, la categoría
+# final y la lista de cada noticia, sin volver a pasar ningún modelo.
+# Cada ejecución añade una "parte" (.npz) a `directorio`; cuando hay muchas se compactan en una sola.
+# Si una noticia se analiza varias veces, cuenta su última fila.
+# Uso: python puntuaciones.py reenrutar [--simular]
+
+COLUMNAS = ("sentimiento", "fake_news", "emocion", "tematica")
+MAX_PARTES = 16  # Por encima, las partes se compactan en una
+FILAS_POR_PARTE = 4096  # Filas que se acumulan en memoria antes de escribir una parte
+
+DESTINOS = (None, "noticias_destacadas", "mejores_noticias", "peores_noticias")
+CATEGORIAS = ("Dudosa/Falsa", "Buena/Objetiva", "Subjetiva pero verdadera", "Veracidad no determinada")
+
+
+def hash_clave(clave):
+    """Identificador de 64 bits de una noticia (a partir de su URL o su título)."""
+    return int.from_bytes(hashlib.blake2b((clave or "").encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _puntuaciones_de(analisis):
+    """{etiqueta: score} de cada columna a partir de la tupla (sentimiento, fake, temática, emoción, resumen)."""
+    sentimiento, fake, tematica, emocional, _ = analisis
+    return {
+        "sentimiento": sentimiento.get("puntuaciones") or {},
+        "fake_news": fake.get("puntuaciones") or {},
+        "emocion": {x["label"]: x["score"] for x in emocional[2]} if len(emocional) > 2 else {},
+        "tematica": tematica[2] if len(tematica) > 2 else {},
+    }
+
+
+class AlmacenPuntuaciones:
+    """Scores completos por noticia en arrays columnares float32, repartidos en partes .npz de solo añadir."""
+
+    def __init__(self, directorio="puntuaciones", etiquetas_iniciales=None):
+        self.directorio = directorio
+        # Orden fijo con el que empiezan las etiquetas de cada columna (p. ej. las categorías temáticas)
+        self.etiquetas_iniciales = etiquetas_iniciales or {}
+        self._claves = []
+        self._filas = []
+
+    def agregar(self, claves, analisis):
+        """Añade los scores de un grupo de noticias (claves = URL o título; análisis = tuplas de analizar_textos)."""
+        for clave, resultado in zip(claves, analisis):
+            self._claves.append(hash_clave(clave))
+            self._filas.append(_puntuaciones_de(resultado))
+        if len(self._claves) >= FILAS_POR_PARTE:
+            self.guardar()
+
+    def guardar(self):
+        """Escribe en una parte nueva las filas acumuladas (y compacta si ya hay demasiadas partes)."""
+        import numpy as np  # Import tardío: solo hace falta si hay algo que guardar
+
+        if not self._claves:
+            return
+        arrays = {"clave": np.array(self._claves, dtype=np.uint64)}
+        for columna in COLUMNAS:
+            # Orden fijo: el inicial (si lo hay) y después el resto de etiquetas ordenadas alfabéticamente
+            etiquetas = list(self.etiquetas_iniciales.get(columna, []))
+            etiquetas += sorted({e for fila in self._filas for e in fila[columna]} - set(etiquetas))
+            matriz = np.full((len(self._filas), len(etiquetas)), np.nan, dtype=np.float32)
+            posicion = {etiqueta: j for j, etiqueta in enumerate(etiquetas)}
+            for i, fila in enumerate(self._filas):
+                for etiqueta, score in fila[columna].items():
+                    matriz[i, posicion[etiqueta]] = score
+            arrays[columna] = matriz
+            arrays[f"etiquetas_{columna}"] = np.array(etiquetas, dtype=str)
+        self._escribir_parte(arrays)
+        self._claves, self._filas = [], []
+        if len(self._partes()) > MAX_PARTES:
+            self.compactar()
+
+    def _partes(self):
+        return sorted(glob.glob(os.path.join(self.directorio, "parte_*.npz")))
+
+    def _escribir_parte(self, arrays):
+        import numpy as np
+
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta = os.path.join(self.directorio, f"parte_{time.time_ns():020d}_{os.getpid()}.npz")
+        with open(ruta + ".tmp", "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(ruta + ".tmp", ruta)  # Una parte a medio escribir nunca se lee
+        return ruta
+
+    def cargar(self):
+        """Devuelve (claves, {columna: (matriz float32, etiquetas)}) con la última fila de cada noticia."""
+        import numpy as np
+
+        partes = []
+        for ruta in self._partes():
+            with np.load(ruta) as datos:
+                partes.append({nombre: datos[nombre] for nombre in datos.files})
+        if not partes:
+            return np.zeros(0, dtype=np.uint64), {c: (np.zeros((0, 0), dtype=np.float32), []) for c in COLUMNAS}
+
+        claves = np.concatenate([p["clave"] for p in partes])
+        columnas = {}
+        for columna in COLUMNAS:
+            # Las etiquetas pueden variar entre partes (p. ej. si cambian las categorías): se alinean por nombre
+            etiquetas = []
+            for parte in partes:
+                etiquetas.extend(e for e in parte[f"etiquetas_{columna}"].tolist() if e not in etiquetas)
+            matriz = np.full((len(claves), len(etiquetas)), np.nan, dtype=np.float32)
+            inicio = 0
+            for parte in partes:
+                indices = [etiquetas.index(e) for e in parte[f"etiquetas_{columna}"].tolist()]
+                matriz[inicio:inicio + len(parte["clave"]), indices] = parte[columna]
+                inicio += len(parte["clave"])
+            columnas[columna] = (matriz, etiquetas)
+
+        # Última aparición de cada clave, conservando el orden de llegada
+        _, desde_el_final = np.unique(claves[::-1], return_index=True)
+        ultimas = np.sort(len(claves) - 1 - desde_el_final)
+        return claves[ultimas], {c: (m[ultimas], e) for c, (m, e) in columnas.items()}
+
+    def compactar(self):
+        """Junta todas las partes en una sola (sin filas repetidas)."""
+        import numpy as np
+
+        antiguas = self._partes()
+        claves, columnas = self.cargar()
+        arrays = {"clave": claves}
+        for columna, (matriz, etiquetas) in columnas.items():
+            arrays[columna] = matriz
+            arrays[f"etiquetas_{columna}"] = np.array(etiquetas, dtype=str)
+        self._escribir_parte(arrays)  # Primero la nueva: si algo falla, las antiguas siguen ahí
+        for ruta in antiguas:
+            os.remove(ruta)
+
+
+# --- Enrutado vectorizado ---
+# Réplica con arrays de NumPy de determinar_categoria, clasificar_noticia y es_totalmente_objetiva
+# (analizar_filtrar.py), con las mismas reglas configurables.
+
+def _principal(matriz):
+    """Índice de la etiqueta con más score de cada fila (-1 si la fila no tiene scores)."""
+    import numpy as np
+
+    if matriz.shape[1] == 0:
+        return np.full(len(matriz), -1)
+    sin_nan = np.where(np.isnan(matriz), -np.inf, matriz)
+    return np.where(np.isnan(matriz).all(axis=1), -1, sin_nan.argmax(axis=1))
+
+
+def _por_etiqueta(indices, etiquetas, funcion, valor_sin_etiqueta):
+    """Aplica `funcion` a la etiqueta principal de cada fila (el índice -1 toma `valor_sin_etiqueta`)."""
+    import numpy as np
+
+    tabla = np.array([funcion(etiqueta) for etiqueta in etiquetas] + [valor_sin_etiqueta])
+    return tabla[indices]
+
+
+def enrutar(columnas):
+    """Devuelve (índice en CATEGORIAS, índice en DESTINOS, es totalmente objetiva) de cada fila."""
+    import numpy as np
+    import analizar_filtrar  # Import tardío: analizar_filtrar importa este módulo
+
+    matriz_sentimiento, etiquetas_sentimiento = columnas["sentimiento"]
+    matriz_fake, etiquetas_fake = columnas["fake_news"]
+    matriz_emocion, etiquetas_emocion = columnas["emocion"]
+    sentimiento, fake, emocion = _principal(matriz_sentimiento), _principal(matriz_fake), _principal(matriz_emocion)
+
+    estrellas = _por_etiqueta(sentimiento, etiquetas_sentimiento, analizar_filtrar.extraer_estrellas, 0)
+    es_fake = _por_etiqueta(fake, etiquetas_fake, lambda e: e == "LABEL_0", False)  # LABEL_0 = FAKE
+    es_real = _por_etiqueta(fake, etiquetas_fake, lambda e: e == "LABEL_1", False)  # LABEL_1 = REAL
+
+    categoria = np.full(len(estrellas), CATEGORIAS.index("Veracidad no determinada"))
+    categoria[es_real] = CATEGORIAS.index("Subjetiva pero verdadera")
+    categoria[es_real & (estrellas >= analizar_filtrar.umbral_estrellas_buena)] = CATEGORIAS.index("Buena/Objetiva")
+    categoria[es_fake] = CATEGORIAS.index("Dudosa/Falsa")
+    buena = categoria == CATEGORIAS.index("Buena/Objetiva")
+
+    # Mismo orden de prioridad que clasificar_noticia: destacadas > mejores > peores
+    neutra_positiva = _por_etiqueta(emocion, etiquetas_emocion,
+                                    lambda e: e.lower() in analizar_filtrar.emociones_neutras_positivas, False)
+    destino = np.zeros(len(estrellas), dtype=np.int8)
+    destino[(categoria == CATEGORIAS.index("Dudosa/Falsa"))
+            | (es_real & (estrellas <= analizar_filtrar.umbral_estrellas_peores))] = DESTINOS.index("peores_noticias")
+    destino[buena & (estrellas >= analizar_filtrar.umbral_estrellas_mejores)] = DESTINOS.index("mejores_noticias")
+    destino[buena & neutra_positiva] = DESTINOS.index("noticias_destacadas")
+
+    # Solo se buscan noticias totalmente objetivas entre las destacadas y las mejores
+    objetiva = (
+        es_real & buena
+        & _por_etiqueta(sentimiento, etiquetas_sentimiento, lambda e: e == analizar_filtrar.sentimiento_objetivo, False)
+        & _por_etiqueta(emocion, etiquetas_emocion, lambda e: e.lower() in analizar_filtrar.emociones_objetivas, False)
+        & np.isin(destino, [DESTINOS.index("noticias_destacadas"), DESTINOS.index("mejores_noticias")])
+    )
+    return categoria, destino, objetiva
+
+
+def reenrutar(simular=False):
+    """Recalcula categoría y lista de todo el histórico con las reglas actuales y actualiza los resultados."""
+    import numpy as np
+    import almacen_resultados
+    import analizar_filtrar
+    from almacen_noticias import AlmacenNoticias
+    from instantaneas import escribir_json
+
+    almacen = AlmacenPuntuaciones(analizar_filtrar.directorio_puntuaciones)
+    inicio = time.perf_counter()
+    claves, columnas = almacen.cargar()
+    segundos_carga = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    categorias, destinos, objetivas = enrutar(columnas)
+    segundos_enrutado = time.perf_counter() - inicio
+    print(f"⚡ {len(claves)} noticias re-enrutadas en {1000 * segundos_enrutado:.1f} ms "
+          f"(lectura de {len(almacen._partes())} partes: {1000 * segundos_carga:.1f} ms)")
+    for indice, destino in enumerate(DESTINOS):
+        print(f"   - {destino or 'descartadas'}: {int((destinos == indice).sum())}")
+    print(f"   - totalmente objetivas: {int(objetivas.sum())}")
+    matriz_sentimiento = columnas["sentimiento"][0]
+    if matriz_sentimiento.size:
+        poco_fiables = int((np.nanmax(np.where(np.isnan(matriz_sentimiento), -np.inf, matriz_sentimiento), axis=1)
+                            < analizar_filtrar.umbral_confianza_sentimiento).sum())
+        print(f"   - con sentimiento poco fiable (confianza < {analizar_filtrar.umbral_confianza_sentimiento}): {poco_fiables}")
+    if simular:
+        return
+
+    # Las noticias que ya tienen registro completo cambian de categoría y de lista
+    fila_de = {int(clave): i for i, clave in enumerate(claves.tolist())}
+    previos = analizar_filtrar.cargar_resultados_previos()
+    listas = {destino: [] for destino in DESTINOS[1:]}
+    con_registro, sin_puntuaciones, movidas = set(), 0, 0
+    for lista, noticias in previos.items():
+        for noticia in noticias:
+            fila = fila_de.get(hash_clave(analizar_filtrar._clave_noticia(noticia)))
+            if fila is None:  # Analizada antes de que se guardaran los scores: se queda como está
+                listas.setdefault(lista, []).append(noticia)
+                sin_puntuaciones += 1
+                continue
+            con_registro.add(fila)
+            destino = DESTINOS[destinos[fila]]
+            movidas += destino != lista
+            if destino:
+                listas[destino].append({**noticia, "categoria_final": CATEGORIAS[categorias[fila]]})
+
+    # Las que ahora entran en una lista pero se descartaron en la cascada no tienen temática ni resumen:
+    # vuelven a la cola de pendientes (sentimiento, fake news y emoción saldrán de la caché)
+    nuevas = {int(claves[i]) for i in np.flatnonzero(destinos) if i not in con_registro}
+    reencoladas = 0
+    if nuevas:
+        almacen_noticias = AlmacenNoticias(analizar_filtrar.ruta_almacen_noticias)
+        reencoladas = almacen_noticias.reencolar(
+            lambda noticia: hash_clave(noticia.get("url") or noticia.get("title")) in nuevas)
+        almacen_noticias.cerrar()
+
+    escribir_json(analizar_filtrar.ruta_salida_filtradas, listas)
+    print(f"✅ {movidas} noticias cambian de lista. Resultados guardados en '{analizar_filtrar.ruta_salida_filtradas}'")
+    if sin_puntuaciones:
+        print(f"ℹ️ {sin_puntuaciones} noticias analizadas antes de guardar los scores se quedan como estaban.")
+    if reencoladas:
+        print(f"🕒 {reencoladas} noticias que ahora entran en una lista vuelven a estar pendientes: ejecuta "
+              "analizar_filtrar.py para calcular su temática y su resumen.")
+    objetivas = analizar_filtrar.extraer_noticias_totalmente_objetivas(todas_las_noticias_procesadas_completas=[],
+                                                                      noticias_ya_analizadas=listas)
+    analizar_filtrar.publicar_resultados(listas, objetivas)
+    conexion = almacen_resultados.conectar(analizar_filtrar.ruta_resultados)
+    almacen_resultados.reconstruir(conexion, listas, analizar_filtrar.es_totalmente_objetiva)
+    conexion.close()
+    if analizar_filtrar.ruta_agregados:
+        import agregados
+
+        agregados.reconstruir()  # Las categorías de los paneles también siguen las reglas nuevas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-enruta el histórico con las reglas actuales, sin volver a pasar los modelos.")
+    parser.add_argument("accion", choices=["reenrutar", "compactar"])
+    parser.add_argument("--simular", action="store_true", help="Solo muestra cuántas noticias irían a cada lista.")
+    argumentos = parser.parse_args()
+    if argumentos.accion == "reenrutar":
+        reenrutar(argumentos.simular)
+    else:
+        import analizar_filtrar
+
+        AlmacenPuntuaciones(analizar_filtrar.directorio_puntuaciones).compactar()
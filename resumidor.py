@@ -0,0 +1,107 @@
+import re
+from collections import Counter
+
+# Resúmenes por niveles:
+#   - "extractivo": elige las frases más representativas del propio texto (sin red neuronal, microsegundos).
+#   - "abstractivo": genera un resumen nuevo con el modelo de resumen (bart-large-cnn, lento).
+#   - "auto": usa el abstractivo solo si el texto es lo bastante largo para merecerlo y la latencia
+#     estimada cabe en el presupuesto; si no, el extractivo.
+
+TIPO_ORIGINAL = "original"        # Texto demasiado corto: se devuelve tal cual
+TIPO_EXTRACTIVO = "extractivo"
+TIPO_ABSTRACTIVO = "abstractivo"
+TIPO_NO_DISPONIBLE = "ninguno"    # El modelo falló y no hay resumen
+TIPO_OMITIDO = "omitido"          # No se resumió porque la noticia se descarta (evaluación en cascada)
+
+# Palabras vacías más comunes (español e inglés) que no aportan al puntuar frases
+PALABRAS_VACIAS = {
+    "el", "la", "los", "las", "un", "una", "unos", "unas", "de", "del", "al", "a", "en", "y", "o", "que", "por",
+    "para", "con", "sin", "se", "su", "sus", "es", "son", "fue", "ha", "han", "lo", "le", "les", "como", "más",
+    "pero", "este", "esta", "estos", "estas", "ese", "esa", "tras", "sobre", "entre", "ya", "muy", "también",
+    "the", "of", "and", "to", "in", "is", "for", "on", "with", "as", "at", "by", "an", "be", "this", "that",
+}
+
+
+def dividir_oraciones(texto):
+    """Divide un texto en oraciones usando la puntuación final como separador."""
+    return [o.strip() for o in re.split(r"(?<=[.!?…])\s+", texto.strip()) if o.strip()]
+
+
+def _palabras(texto):
+    return [p for p in re.findall(r"\w+", texto.lower()) if len(p) > 2 and p not in PALABRAS_VACIAS]
+
+
+def resumir_extractivo(texto, max_oraciones=3, max_palabras=120):
+    """Resume el texto quedándose con las oraciones cuyas palabras son más frecuentes en el propio texto."""
+    oraciones = dividir_oraciones(texto)
+    if len(oraciones) > max_oraciones:
+        frecuencias = Counter(_palabras(texto))
+        maximo = max(frecuencias.values(), default=1)
+
+        def puntuacion(indice):
+            palabras = _palabras(oraciones[indice])
+            if not palabras:
+                return 0.0
+            relevancia = sum(frecuencias[p] / maximo for p in palabras) / len(palabras) ** 0.5
+            return relevancia + (0.5 if indice == 0 else 0.0)  # En noticias, la primera frase suele ser la clave
+
+        elegidas = sorted(sorted(range(len(oraciones)), key=puntuacion, reverse=True)[:max_oraciones])
+        oraciones = [oraciones[i] for i in elegidas]
+
+    resumen, total_palabras = [], 0
+    for oracion in oraciones:
+        palabras_oracion = len(oracion.split())
+        if resumen and total_palabras + palabras_oracion > max_palabras:
+            break
+        resumen.append(oracion)
+        total_palabras += palabras_oracion
+    return " ".join(resumen)
+
+
+class EstimadorLatencia:
+    """Estima la latencia del resumen abstractivo (ms por palabra) con una media móvil de lo medido.
+
+    Empieza sin estimación: hasta la primera medición real (la "sonda" que hace analizar_filtrar.py en
+    cada ejecución en modo "auto"), `estimar_ms` devuelve None.
+    """
+
+    def __init__(self, ms_por_palabra_inicial=None, suavizado=0.3):
+        self.ms_por_palabra = ms_por_palabra_inicial
+        self.suavizado = suavizado
+
+    @property
+    def calibrado(self):
+        return self.ms_por_palabra is not None
+
+    def registrar(self, segundos, palabras):
+        """Actualiza la estimación con una medición real (segundos que tardaron `palabras` palabras)."""
+        if palabras > 0:
+            medido = 1000 * segundos / palabras
+            if self.ms_por_palabra is None:
+                self.ms_por_palabra = medido
+            else:
+                self.ms_por_palabra = (1 - self.suavizado) * self.ms_por_palabra + self.suavizado * medido
+
+    def estimar_ms(self, texto):
+        return None if self.ms_por_palabra is None else self.ms_por_palabra * len(texto.split())
+
+
+def admite_abstractivo(texto, min_palabras, min_palabras_abstractivo):
+    """Indica si el texto es lo bastante largo para el resumen abstractivo en modo "auto"."""
+    palabras = len(texto.split())
+    return palabras >= min_palabras and palabras >= min_palabras_abstractivo
+
+
+def elegir_tipo_resumen(texto, modo, min_palabras, min_palabras_abstractivo, presupuesto_ms, estimador):
+    """Decide qué resumen usar para el texto según el modo configurado."""
+    if len(texto.split()) < min_palabras:
+        return TIPO_ORIGINAL
+    if modo == TIPO_EXTRACTIVO:
+        return TIPO_EXTRACTIVO
+    if modo == "auto":
+        if not admite_abstractivo(texto, min_palabras, min_palabras_abstractivo):
+            return TIPO_EXTRACTIVO
+        estimado = estimador.estimar_ms(texto)
+        if estimado is None or estimado > presupuesto_ms:  # Sin medición todavía, mejor no arriesgar
+            return TIPO_EXTRACTIVO
+    return TIPO_ABSTRACTIVO
@@ -0,0 +1,110 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Servidor HTTP local que imita la API de GNews (/api/v4/top-headlines y /api/v4/search), para probar
+# descargador_feeds.py sin clave ni conexión. Devuelve noticias deterministas según los parámetros
+# y la página, con ETag (responde 304 a If-None-Match), y puede simular latencia, errores 503 y
+# límites de ritmo (429 con Retry-After).
+# Uso: python servidor_gnews_local.py [--puerto 8765] [--retardo 0.2] [--fallos 0.1] [--max-por-segundo 5]
+# y después: python descargador_feeds.py --url-base http://127.0.0.1:8765/api/v4
+
+TOTAL_POR_CONSULTA = 35  # Noticias "disponibles" para cada combinación de parámetros
+
+
+def generar_articulos(parametros, pagina, maximo):
+    """Noticias con formato GNews, siempre las mismas para los mismos parámetros y página."""
+    consulta = parametros.get("q") or parametros.get("category") or "general"
+    pais = parametros.get("country", "any")
+    fecha_base = datetime(2024, 1, 1)
+    articulos = []
+    for i in range((pagina - 1) * maximo, min(pagina * maximo, TOTAL_POR_CONSULTA)):
+        semilla = int(hashlib.md5(f"{consulta}|{pais}|{i}".encode("utf-8")).hexdigest()[:8], 16)
+        articulos.append({
+            "title": f"Noticia {i + 1} sobre {consulta} ({pais})",
+            "description": f"Descripción de la noticia {i + 1} sobre {consulta} en {pais}. Código {semilla}.",
+            "content": f"Contenido completo de la noticia {i + 1} sobre {consulta}...",
+            "url": f"https://medio-{semilla % 7}.local/{consulta}/{pais}/{i + 1}",
+            "image": f"https://medio-{semilla % 7}.local/imagenes/{i + 1}.jpg",
+            "publishedAt": (fecha_base + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "source": {"name": f"Medio {semilla % 7}", "url": f"https://medio-{semilla % 7}.local"},
+        })
+    return articulos
+
+
+class ManejadorGNews(BaseHTTPRequestHandler):
+    retardo = 0.0
+    fallos = 0.0
+    max_por_segundo = None
+    _peticiones = []  # Instantes de las últimas peticiones (para simular el límite de ritmo)
+    _candado = threading.Lock()
+
+    def _responder(self, codigo, cuerpo=b"", cabeceras=()):
+        self.send_response(codigo)
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path not in ("/api/v4/top-headlines", "/api/v4/search"):
+            return self._responder(404, b'{"errors": ["Not found"]}')
+        parametros = {clave: valores[0] for clave, valores in parse_qs(url.query).items()}
+        if not parametros.get("apikey"):
+            return self._responder(401, b'{"errors": ["You did not provide an API key."]}')
+
+        with self._candado:
+            ahora = time.monotonic()
+            self._peticiones[:] = [t for t in self._peticiones if ahora - t < 1]
+            self._peticiones.append(ahora)
+            demasiadas = self.max_por_segundo and len(self._peticiones) > self.max_por_segundo
+        if demasiadas:
+            return self._responder(429, b'{"errors": ["Too many requests"]}', [("Retry-After", "1")])
+        if random.random() < self.fallos:
+            return self._responder(503, b'{"errors": ["Service unavailable"]}')
+        time.sleep(self.retardo)
+
+        pagina = int(parametros.get("page", 1))
+        maximo = int(parametros.get("max", 10))
+        cuerpo = json.dumps({
+            "totalArticles": TOTAL_POR_CONSULTA,
+            "articles": generar_articulos(parametros, pagina, maximo),
+        }, ensure_ascii=False).encode("utf-8")
+        etag = '"' + hashlib.sha256(cuerpo).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._responder(304, cabeceras=[("ETag", etag)])
+        self._responder(200, cuerpo, [("Content-Type", "application/json; charset=utf-8"), ("ETag", etag)])
+
+    def log_message(self, formato, *args):
+        print(f"🌐 {self.address_string()} {formato % args}")
+
+
+def crear_servidor(puerto=8765, retardo=0.0, fallos=0.0, max_por_segundo=None):
+    """Crea el servidor (sin arrancarlo); útil para lanzarlo en un hilo desde otro script."""
+    ManejadorGNews.retardo = retardo
+    ManejadorGNews.fallos = fallos
+    ManejadorGNews.max_por_segundo = max_por_segundo
+    return ThreadingHTTPServer(("127.0.0.1", puerto), ManejadorGNews)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita la API de GNews.")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--retardo", type=float, default=0.0, help="Segundos de latencia por petición.")
+    parser.add_argument("--fallos", type=float, default=0.0, help="Probabilidad de responder 503.")
+    parser.add_argument("--max-por-segundo", type=int, default=None, help="Por encima de este ritmo responde 429.")
+    argumentos = parser.parse_args()
+    servidor = crear_servidor(argumentos.puerto, argumentos.retardo, argumentos.fallos, argumentos.max_por_segundo)
+    print(f"🚀 GNews local escuchando en http://127.0.0.1:{argumentos.puerto}/api/v4 (Ctrl+C para parar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,282 @@
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import urlparse
+
+# Servidor local de inferencia: carga los modelos una vez y los mantiene en memoria para que
+# analizar_filtrar.py (y cualquier otro script) los use sin pagar su carga en cada ejecución.
+# Las peticiones que llegan casi a la vez se juntan en un mismo lote (micro-lotes): un único hilo
+# ejecuta los modelos y, desde la primera petición pendiente, espera como mucho `espera_maxima_ms`
+# a que lleguen otras del mismo análisis antes de pasarlas todas juntas al modelo.
+# Escucha por HTTP en localhost o por un socket Unix ("unix:/ruta/al/socket").
+#   POST /analizar_sentimiento, /analizar_fake_news, /analizar_tematica, /analizar_emocional
+#        {"textos": [...]} -> {"resultados": [...]}  (o {"texto": "..."} -> {"resultado": ...})
+#   POST /resumir_texto  además admite "max_length", "min_length" y "modo"
+#   GET  /salud (configuración y estadísticas de los micro-lotes), GET /metricas (formato Prometheus)
+# Uso: python servidor_inferencia.py [--direccion http://127.0.0.1:8766] [--espera-maxima-ms 10]
+
+DIRECCION_POR_DEFECTO = "http://127.0.0.1:8766"
+ANALISIS = ("analizar_sentimiento", "analizar_fake_news", "analizar_tematica", "analizar_emocional", "resumir_texto")
+PARAMETROS_PERMITIDOS = {"resumir_texto": ("max_length", "min_length", "modo")}
+
+
+def _parsear_direccion(direccion):
+    """Devuelve ("unix", ruta) o ("tcp", (host, puerto)) a partir de la dirección configurada."""
+    if direccion.startswith("unix:"):
+        return "unix", direccion[len("unix:"):]
+    url = urlparse(direccion if "://" in direccion else f"http://{direccion}")
+    return "tcp", (url.hostname or "127.0.0.1", url.port or 8766)
+
+
+# --- Cliente ---
+
+class ErrorServidorInferencia(Exception):
+    """El servidor respondió con un error."""
+
+
+class _ConexionUnix(http.client.HTTPConnection):
+    """Conexión HTTP sobre un socket Unix."""
+
+    def __init__(self, ruta, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.ruta = ruta
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.ruta)
+
+
+class ClienteInferencia:
+    """Cliente del servidor de inferencia (solo usa la librería estándar)."""
+
+    def __init__(self, direccion=DIRECCION_POR_DEFECTO, timeout=600, textos_por_peticion=64):
+        self.direccion = direccion
+        self.timeout = timeout
+        # Las listas largas se envían en varias peticiones para no acaparar el servidor
+        self.textos_por_peticion = textos_por_peticion
+
+    def _peticion(self, metodo, ruta, datos=None, timeout=None):
+        tipo, destino = _parsear_direccion(self.direccion)
+        timeout = timeout or self.timeout
+        conexion = _ConexionUnix(destino, timeout) if tipo == "unix" else http.client.HTTPConnection(*destino, timeout=timeout)
+        try:
+            cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8") if datos is not None else None
+            conexion.request(metodo, ruta, body=cuerpo, headers={"Content-Type": "application/json"})
+            respuesta = conexion.getresponse()
+            contenido = respuesta.read()
+        finally:
+            conexion.close()
+        if respuesta.status != 200:
+            raise ErrorServidorInferencia(f"{ruta}: HTTP {respuesta.status} {contenido[:200].decode('utf-8', 'replace')}")
+        return json.loads(contenido)
+
+    def salud(self, timeout=1.0):
+        """Devuelve el estado del servidor, o None si no está arrancado."""
+        try:
+            return self._peticion("GET", "/salud", timeout=timeout)
+        except (OSError, ValueError, ErrorServidorInferencia):
+            return None
+
+    def analizar(self, analisis, textos, **parametros):
+        """Pasa los textos por `analisis` (p. ej. "analizar_sentimiento") y devuelve sus resultados (JSON)."""
+        resultados = []
+        for inicio in range(0, len(textos), self.textos_por_peticion):
+            datos = {"textos": textos[inicio:inicio + self.textos_por_peticion], **parametros}
+            resultados.extend(self._peticion("POST", f"/{analisis}", datos)["resultados"])
+        return resultados
+
+
+# --- Micro-lotes ---
+
+class _Peticion:
+    def __init__(self, analisis, textos, parametros):
+        self.analisis = analisis
+        self.textos = textos
+        self.parametros = parametros
+        self.clave = (analisis, json.dumps(parametros, sort_keys=True))  # Solo se juntan peticiones equivalentes
+        self.llegada = time.monotonic()
+        self.terminada = threading.Event()
+        self.resultados = None
+        self.error = None
+
+
+class MicroLotes:
+    """Junta en un solo lote las peticiones del mismo análisis que llegan dentro de una ventana de espera."""
+
+    def __init__(self, funciones, espera_maxima=0.01, max_textos=32, tamano_lote=8):
+        self.funciones = funciones  # análisis -> función(textos, tamano, **parámetros) -> resultados
+        self.espera_maxima = espera_maxima
+        self.max_textos = max_textos
+        self.tamano_lote = tamano_lote
+        self.estadisticas = {"peticiones": 0, "lotes": 0, "textos": 0}
+        self._pendientes = []
+        self._condicion = threading.Condition()
+        self._hilo = threading.Thread(target=self._bucle, name="micro-lotes", daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def enviar(self, analisis, textos, parametros=None):
+        """Encola una petición y espera a su resultado (lanza la excepción del modelo si falla)."""
+        peticion = _Peticion(analisis, textos, parametros or {})
+        with self._condicion:
+            self._pendientes.append(peticion)
+            self._condicion.notify()
+        peticion.terminada.wait()
+        if peticion.error is not None:
+            raise peticion.error
+        return peticion.resultados
+
+    def _siguiente_lote(self):
+        """Espera a que haya trabajo y devuelve las peticiones que se ejecutarán juntas."""
+        with self._condicion:
+            while not self._pendientes:
+                self._condicion.wait()
+            primera = self._pendientes[0]
+            limite = primera.llegada + self.espera_maxima
+            while True:
+                textos = sum(len(p.textos) for p in self._pendientes if p.clave == primera.clave)
+                restante = limite - time.monotonic()
+                if textos >= self.max_textos or restante <= 0:
+                    break
+                self._condicion.wait(restante)
+            lote, textos = [], 0
+            for peticion in self._pendientes:
+                if peticion.clave == primera.clave and (not lote or textos + len(peticion.textos) <= self.max_textos):
+                    lote.append(peticion)
+                    textos += len(peticion.textos)
+            self._pendientes = [p for p in self._pendientes if p not in lote]
+            return lote
+
+    def _bucle(self):
+        while True:
+            lote = self._siguiente_lote()
+            textos = [texto for peticion in lote for texto in peticion.textos]
+            try:
+                resultados = self.funciones[lote[0].analisis](textos, self.tamano_lote, **lote[0].parametros)
+            except BaseException as e:  # También SystemExit (cargar_modelos sale si un modelo no carga)
+                for peticion in lote:
+                    peticion.error = e if isinstance(e, Exception) else RuntimeError(f"El modelo no está disponible: {e!r}")
+                    peticion.terminada.set()
+                continue
+            self.estadisticas["peticiones"] += len(lote)
+            self.estadisticas["lotes"] += 1
+            self.estadisticas["textos"] += len(textos)
+            inicio = 0
+            for peticion in lote:
+                peticion.resultados = resultados[inicio:inicio + len(peticion.textos)]
+                inicio += len(peticion.textos)
+                peticion.terminada.set()
+
+
+# --- Servidor ---
+
+class ManejadorInferencia(BaseHTTPRequestHandler):
+    micro_lotes = None
+    salud = {}
+    metricas = None
+
+    def _responder(self, codigo, datos, tipo="application/json; charset=utf-8"):
+        cuerpo = datos if isinstance(datos, bytes) else json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        if self.path == "/salud":
+            return self._responder(200, {**self.salud, "micro_lotes": self.micro_lotes.estadisticas})
+        if self.path == "/metricas":
+            return self._responder(200, self.metricas.a_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+        self._responder(404, {"error": f"Ruta desconocida: {self.path}"})
+
+    def do_POST(self):
+        analisis = self.path.strip("/")
+        if analisis not in ANALISIS:
+            return self._responder(404, {"error": f"Análisis desconocido: {analisis}"})
+        try:
+            datos = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            individual = "texto" in datos
+            textos = [datos["texto"]] if individual else datos["textos"]
+            if not isinstance(textos, list) or not all(isinstance(t, str) for t in textos):
+                raise ValueError("'textos' debe ser una lista de cadenas")
+        except (ValueError, KeyError, TypeError) as e:
+            return self._responder(400, {"error": f"Petición no válida: {e}"})
+        parametros = {k: datos[k] for k in PARAMETROS_PERMITIDOS.get(analisis, ()) if datos.get(k) is not None}
+        try:
+            resultados = self.micro_lotes.enviar(analisis, textos, parametros) if textos else []
+        except Exception as e:
+            return self._responder(500, {"error": f"{type(e).__name__}: {e}"})
+        self._responder(200, {"resultado": resultados[0]} if individual else {"resultados": resultados})
+
+    def address_string(self):
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, formato, *args):
+        pass  # Una línea por petición sería demasiado ruido con muchos clientes
+
+
+class _ServidorUnix(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def crear_servidor(direccion=DIRECCION_POR_DEFECTO, espera_maxima_ms=10, max_textos=32, tamano_lote=None, precargar=True):
+    """Prepara los modelos de analizar_filtrar.py y devuelve el servidor (sin arrancarlo)."""
+    import analizar_filtrar  # Import tardío: analizar_filtrar importa este módulo para el cliente
+
+    analizar_filtrar.usar_servidor_inferencia = False  # El servidor analiza él mismo, nunca se llama a sí mismo
+    funciones = {
+        "analizar_sentimiento": lambda textos, tamano: analizar_filtrar.analizar_sentimiento_lote(textos, tamano),
+        "analizar_fake_news": lambda textos, tamano: analizar_filtrar.analizar_fake_news_lote(textos, tamano),
+        "analizar_tematica": lambda textos, tamano: analizar_filtrar.analizar_tematica_lote(textos, tamano),
+        "analizar_emocional": lambda textos, tamano: analizar_filtrar.analizar_emocional_lote(textos, tamano),
+        "resumir_texto": lambda textos, tamano, **parametros: analizar_filtrar.resumir_texto_lote(textos, tamano, **parametros),
+    }
+    if precargar:
+        analizar_filtrar.cargar_modelos(analizar_filtrar.modelos_en_uso())
+    micro_lotes = MicroLotes(funciones, espera_maxima_ms / 1000, max_textos, tamano_lote or analizar_filtrar.tamano_lote)
+    micro_lotes.iniciar()
+
+    ManejadorInferencia.micro_lotes = micro_lotes
+    ManejadorInferencia.metricas = analizar_filtrar.metricas_analisis
+    ManejadorInferencia.salud = {"pid": os.getpid(), "configuracion": analizar_filtrar.configuracion_analisis()}
+    tipo, destino = _parsear_direccion(direccion)
+    if tipo == "unix":
+        if os.path.exists(destino):
+            os.remove(destino)  # Socket de una ejecución anterior que no se cerró bien
+        return _ServidorUnix(destino, ManejadorInferencia)
+    return ThreadingHTTPServer(destino, ManejadorInferencia)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que mantiene los modelos cargados y agrupa peticiones en lotes.")
+    parser.add_argument("--direccion", default=DIRECCION_POR_DEFECTO,
+                        help="http://host:puerto (solo localhost) o unix:/ruta/al/socket.")
+    parser.add_argument("--espera-maxima-ms", type=float, default=10,
+                        help="Cuánto se espera a otras peticiones para juntarlas en el mismo lote.")
+    parser.add_argument("--max-textos", type=int, default=32, help="Textos máximos por micro-lote.")
+    parser.add_argument("--tamano-lote", type=int, default=None, help="Textos por pasada de cada modelo.")
+    parser.add_argument("--sin-precarga", action="store_true", help="Carga cada modelo con la primera petición que lo use.")
+    argumentos = parser.parse_args()
+    servidor = crear_servidor(argumentos.direccion, argumentos.espera_maxima_ms, argumentos.max_textos,
+                              argumentos.tamano_lote, not argumentos.sin_precarga)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # `kill` también cierra el servidor ordenadamente
+    print(f"🚀 Servidor de inferencia escuchando en {argumentos.direccion} (Ctrl+C para parar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        if argumentos.direccion.startswith("unix:") and os.path.exists(argumentos.direccion[len("unix:"):]):
+            os.remove(argumentos.direccion[len("unix:"):])
@@ -0,0 +1,92 @@
+import hashlib
+import os
+
+import numpy as np
+
+# Clasificador temático rápido basado en embeddings.
+# En lugar de una pasada de NLI (bart-large-mnli) por cada etiqueta y noticia, se calcula una sola
+# vez el embedding de cada etiqueta, se guarda en disco, y cada lote de noticias se puntúa con una
+# multiplicación de matrices (similitud coseno) contra esa matriz de etiquetas.
+
+
+class ClasificadorTematicoEmbeddings:
+    """Asigna a cada texto la categoría cuyo embedding es más parecido (similitud coseno)."""
+
+    def __init__(self, registro_modelos, nombre_modelo, categorias, plantilla="Esta noticia trata sobre {}.",
+                 temperatura=0.05, directorio_cache="cache_embeddings"):
+        self.registro_modelos = registro_modelos
+        self.nombre_modelo = nombre_modelo  # Nombre con el que está registrado el pipeline "feature-extraction"
+        self.categorias = list(categorias)
+        self.plantilla = plantilla
+        self.temperatura = temperatura  # Cuanto más baja, más "segura" la probabilidad de la etiqueta ganadora
+        self.directorio_cache = directorio_cache
+        self._matriz_etiquetas = None
+
+    def embeber(self, textos, tamano_lote=32):
+        """Devuelve una matriz (n_textos x dimensión) de embeddings normalizados (media de los tokens reales)."""
+        extractor = self.registro_modelos.obtener(self.nombre_modelo)
+        textos = list(textos)
+        if getattr(extractor, "tokenizer", None) is None or not hasattr(getattr(extractor, "model", None), "forward"):
+            # Pipeline sin tokenizador ni modelo accesibles (p. ej. simulado): de uno en uno, así no hay relleno
+            salidas = extractor(textos, batch_size=1)
+            matriz = np.stack([np.asarray(salida, dtype=np.float32).reshape(-1, np.shape(salida)[-1]).mean(axis=0)
+                               for salida in salidas])
+        else:
+            matriz = np.concatenate([_media_tokens(extractor, textos[i:i + tamano_lote])
+                                     for i in range(0, len(textos), tamano_lote)])
+        normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+        return matriz / np.maximum(normas, 1e-12)
+
+    def _ruta_cache_etiquetas(self):
+        _, nombre_hub, opciones = self.registro_modelos.especificacion(self.nombre_modelo)
+        # El backend cambia los embeddings (int8 y ONNX se desvían un poco del eager): cada uno tiene su matriz
+        huella = "\x00".join([nombre_hub, str(opciones.get("revision")), str(opciones.get("backend", "eager")),
+                              self.plantilla, *self.categorias])
+        return os.path.join(self.directorio_cache, f"etiquetas_{hashlib.sha256(huella.encode('utf-8')).hexdigest()[:16]}.npy")
+
+    def matriz_etiquetas(self):
+        """Embeddings de las categorías: se calculan una vez y se reutilizan desde disco en las siguientes ejecuciones."""
+        if self._matriz_etiquetas is None:
+            ruta = self._ruta_cache_etiquetas()
+            if os.path.exists(ruta):
+                self._matriz_etiquetas = np.load(ruta)
+            else:
+                self._matriz_etiquetas = self.embeber([self.plantilla.format(c) for c in self.categorias])
+                os.makedirs(self.directorio_cache, exist_ok=True)
+                np.save(ruta, self._matriz_etiquetas)
+        return self._matriz_etiquetas
+
+    def puntuar(self, textos, tamano_lote=32):
+        """Devuelve la matriz (n_textos x n_categorías) de probabilidades por categoría."""
+        similitudes = self.embeber(textos, tamano_lote) @ self.matriz_etiquetas().T
+        logits = similitudes / self.temperatura
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilidades = np.exp(logits)
+        return probabilidades / probabilidades.sum(axis=1, keepdims=True)
+
+    def clasificar_lote(self, textos, tamano_lote=32):
+        """Devuelve una lista de (categoría principal, probabilidad, probabilidades por categoría), como `analizar_tematica`."""
+        if not textos:
+            return []
+        probabilidades = self.puntuar(textos, tamano_lote)
+        mejores = probabilidades.argmax(axis=1)
+        return [(self.categorias[j], float(probabilidades[i, j]), dict(zip(self.categorias, probabilidades[i].tolist())))
+                for i, j in enumerate(mejores)]
+
+
+def _media_tokens(extractor, textos):
+    """Media de los estados ocultos de cada texto ponderada con la máscara de atención.
+
+    El pipeline "feature-extraction" devuelve también las posiciones de relleno cuando agrupa textos de
+    distinta longitud; sin la máscara, el embedding de un texto dependería de con quién comparte el lote.
+    """
+    import torch  # Import tardío: ya lo carga el modelo
+
+    entradas = extractor.tokenizer(textos, padding=True, truncation=True, return_tensors="pt")
+    if getattr(extractor, "device", None) is not None:
+        entradas = entradas.to(extractor.device)
+    with torch.no_grad():
+        ocultos = extractor.model(**entradas)[0]  # last_hidden_state: lote x tokens x dimensión
+    mascara = entradas["attention_mask"].unsqueeze(-1).to(ocultos.dtype)
+    medias = (ocultos * mascara).sum(dim=1) / mascara.sum(dim=1).clamp(min=1)
+    return medias.float().cpu().numpy()